@@ -0,0 +1,116 @@
+"""List the tracked files a hook applies to, for `--all-files`.
+
+Files are tagged like pre-commit (through `identify`) does for a hook's
+`types`, for the tags this project's hooks use: `file`, `symlink`,
+`directory`, `executable` / `non-executable`, `text` / `binary` and the
+`json`, `python`, `toml`, `xml` and `yaml` file types.  Only files of an
+unknown type are read, to tell text from binary (a NUL in the first block,
+as elsewhere here) and executables' `#!` interpreter.
+"""
+from __future__ import annotations
+
+import os.path
+import re
+import stat
+from typing import Collection
+from typing import Generator
+
+from pre_commit_hooks.git_index import iter_ls_files
+from pre_commit_hooks.util import BINARY_SNIFF_SIZE
+
+# these are all text
+EXTENSIONS = {
+    'json': 'json',
+    'py': 'python',
+    'pyi': 'python',
+    'pyw': 'python',
+    'toml': 'toml',
+    'xml': 'xml',
+    'xsd': 'xml',
+    'xsl': 'xml',
+    'yaml': 'yaml',
+    'yml': 'yaml',
+}
+INTERPRETERS = {'python': 'python', 'pypy': 'python'}
+# the tags which can take reading the file
+SNIFFED = frozenset(('binary', 'text', *INTERPRETERS.values()))
+
+
+def _interpreter(first_line: bytes) -> str | None:
+    cmd = first_line[2:].decode('UTF-8', 'replace').split()
+    if cmd and os.path.basename(cmd[0]) == 'env':
+        cmd = [arg for arg in cmd[1:] if not arg.startswith('-')]
+    if not cmd:
+        return None
+    # `python3.12` -> `python`
+    return os.path.basename(cmd[0]).rstrip('0123456789.')
+
+
+def _sniff(path: str, executable: bool) -> set[str]:
+    with open(path, 'rb') as f:
+        head = f.read(BINARY_SNIFF_SIZE)
+    if b'\0' in head:
+        return {'binary'}
+
+    ret = {'text'}
+    if executable and head.startswith(b'#!'):
+        interpreter = _interpreter(head.split(b'\n', 1)[0])
+        if interpreter in INTERPRETERS:
+            ret.add(INTERPRETERS[interpreter])
+    return ret
+
+
+def tags(path: str, *, sniff: bool = True) -> set[str]:
+    """The tags of the file at `path`, raising `OSError` if it is missing.
+
+    Without `sniff`, files of an unknown type aren't read (and so have none
+    of the `SNIFFED` tags).
+    """
+    st = os.lstat(path)
+    if stat.S_ISLNK(st.st_mode):
+        return {'symlink'}
+    elif stat.S_ISDIR(st.st_mode):  # a submodule
+        return {'directory'}
+    elif not stat.S_ISREG(st.st_mode):
+        return set()
+
+    executable = bool(st.st_mode & 0o111)
+    ret = {'file', 'executable' if executable else 'non-executable'}
+    _, ext = os.path.splitext(path)
+    file_type = EXTENSIONS.get(ext[1:].lower())
+    if file_type is not None:
+        ret.update((file_type, 'text'))
+    elif sniff:
+        ret.update(_sniff(path, executable))
+    return ret
+
+
+def all_files(
+        types: Collection[str] = (),
+        files: str = '',
+        exclude: str = '^$',
+) -> Generator[str, None, None]:
+    """The tracked files having all of `types`, with paths matching the
+    `files` regex and not the `exclude` one.
+
+    The index is read as this is consumed.  Files which are staged but
+    missing from the work tree are skipped.
+    """
+    files_re = re.compile(files)
+    exclude_re = re.compile(exclude)
+    required = set(types)
+    sniff = not SNIFFED.isdisjoint(required)
+    previous = None
+    for entry in iter_ls_files():
+        # a conflicted path has an entry per stage
+        if entry.path == previous:
+            continue
+        previous = entry.path
+        if not files_re.search(entry.path) or exclude_re.search(entry.path):
+            continue
+        try:
+            path_tags = tags(entry.path, sniff=sniff)
+        except OSError:
+            continue
+        if required <= path_tags:
+            yield entry.path
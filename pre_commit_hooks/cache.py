@@ -0,0 +1,313 @@
+"""Persistent results cache for the read-only checkers.
+
+Results are keyed by the hook, its (normalized) arguments, the version of
+this package's source and its dependencies and the git blob id of the file's
+contents, so a file which is byte-identical to one that already passed is not
+parsed again.  Results with output (which
+usually names the file) are also keyed by the filename.  The cache lives in
+`$GIT_DIR/pre-commit-hooks/results.db` and is capped at `MAX_ENTRIES`, least
+recently used entries are evicted first.
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import functools
+import hashlib
+import json
+import mmap
+import os.path
+import sqlite3
+import sys
+import time
+from typing import Any
+from typing import Callable
+from typing import Generator
+
+from pre_commit_hooks.git_repo import git_dir
+from pre_commit_hooks.util import CalledProcessError
+from pre_commit_hooks.util import capture_output
+from pre_commit_hooks.util import close_func
+from pre_commit_hooks.util import prepare_func
+from pre_commit_hooks.util import write_output
+
+MAX_ENTRIES = 100000
+# arguments which do not change the result for a single file
+_IGNORED_ARGS = frozenset((
+    'filenames', 'files_from', 'null', 'jobs', 'cache', 'staged',
+    'read_ahead', 'all_files', 'files', 'exclude',
+))
+# results also depend on the versions of these
+_DEPENDENCIES = ('ruamel.yaml', 'tomli')
+
+_SCHEMA = '''\
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    retv INTEGER NOT NULL,
+    stdout BLOB NOT NULL,
+    stderr BLOB NOT NULL,
+    used REAL NOT NULL
+)
+'''
+
+
+def blob_id(contents: bytes | mmap.mmap) -> str:
+    """The id git would give `contents` as a blob"""
+    h = hashlib.sha1(b'blob %d\0' % len(contents))
+    h.update(contents)
+    return h.hexdigest()
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, (set, frozenset)):
+        return sorted(_normalize(v) for v in value)
+    elif isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    elif isinstance(value, (str, int, float, bool, type(None))):
+        return value
+    else:
+        return repr(value)
+
+
+def normalize_args(args: argparse.Namespace) -> str:
+    return json.dumps(
+        {
+            k: _normalize(v) for k, v in vars(args).items()
+            if k not in _IGNORED_ARGS
+        },
+        sort_keys=True,
+    )
+
+
+def _hook_fn(func: Callable[..., Any]) -> Callable[..., Any]:
+    while True:
+        if isinstance(func, functools.partial):
+            func = func.func
+        elif hasattr(func, '__wrapped__'):
+            func = func.__wrapped__
+        else:
+            return func
+
+
+def _distribution_version(name: str) -> str:
+    if sys.version_info >= (3, 8):  # pragma: >=3.8 cover
+        import importlib.metadata
+
+        try:
+            return importlib.metadata.version(name)
+        except importlib.metadata.PackageNotFoundError:
+            return ''
+    else:  # pragma: <3.8 cover
+        import pkg_resources
+
+        try:
+            return pkg_resources.get_distribution(name).version
+        except pkg_resources.DistributionNotFound:
+            return ''
+
+
+@functools.lru_cache(maxsize=None)
+def _sources_version(*modnames: str) -> str:
+    # editing a hook or anything it shares (`util`, say) invalidates results
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    filenames = {
+        os.path.join(package_dir, filename)
+        for filename in os.listdir(package_dir)
+        if filename.endswith('.py')
+    }
+    filenames.update(sys.modules[name].__file__ or '' for name in modnames)
+    h = hashlib.sha1()
+    for filename in sorted(filenames):
+        with open(filename, 'rb') as f:
+            h.update(f.read())
+    for name in _DEPENDENCIES:
+        h.update(f'{name}=={_distribution_version(name)}'.encode())
+    h.update(sys.version.encode())
+    return h.hexdigest()
+
+
+def hook_version(func: Callable[..., Any]) -> str:
+    return _sources_version(_hook_fn(func).__module__)
+
+
+def cache_path() -> str | None:
+    try:
+        gitdir = git_dir()
+    except (CalledProcessError, OSError):
+        return None
+    else:
+        return os.path.join(gitdir, 'pre-commit-hooks', 'results.db')
+
+
+class ResultCache:
+    def __init__(self, path: str, max_entries: int = MAX_ENTRIES) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self._db: sqlite3.Connection | None = None
+        # key -> last used, and key -> row to store, written in one
+        # transaction by `flush`
+        self._used: dict[str, float] = {}
+        self._puts: dict[str, tuple[int, bytes, bytes, float]] = {}
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._db = sqlite3.connect(self.path, timeout=30)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute(_SCHEMA)
+            self._db.execute(
+                'CREATE INDEX IF NOT EXISTS results_used ON results (used)',
+            )
+        return self._db
+
+    def __getstate__(self) -> dict[str, Any]:
+        # connections are per-process, workers open their own
+        return {**self.__dict__, '_db': None, '_used': {}, '_puts': {}}
+
+    def get(self, key: str) -> tuple[int, bytes, bytes] | None:
+        if key in self._puts:
+            retv, stdout, stderr, _ = self._puts[key]
+            row: tuple[int, bytes, bytes] | None = (retv, stdout, stderr)
+        else:
+            row = self.db.execute(
+                'SELECT retv, stdout, stderr FROM results WHERE key = ?',
+                (key,),
+            ).fetchone()
+        if row is not None:
+            self._used[key] = time.time()
+        return row
+
+    def put(self, key: str, retv: int, stdout: bytes, stderr: bytes) -> None:
+        self._puts[key] = (retv, stdout, stderr, time.time())
+
+    def flush(self) -> None:
+        """Store the entries which were `put`, and record when the ones which
+        were `get` were last used"""
+        if self._puts or self._used:
+            with self.db:
+                self.db.executemany(
+                    'INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)',
+                    [(key, *row) for key, row in self._puts.items()],
+                )
+                self.db.executemany(
+                    'UPDATE results SET used = ? WHERE key = ?',
+                    [(used, key) for key, used in self._used.items()],
+                )
+            self._puts.clear()
+            self._used.clear()
+
+    def prune(self) -> None:
+        self.flush()
+        with self.db:
+            count, = self.db.execute('SELECT COUNT(*) FROM results').fetchone()
+            if count > self.max_entries:
+                self.db.execute(
+                    'DELETE FROM results WHERE key IN ('
+                    '    SELECT key FROM results ORDER BY used LIMIT ?'
+                    ')',
+                    (count - self.max_entries,),
+                )
+
+    def close(self) -> None:
+        self.flush()
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+class Cached:
+    """Wraps a per-file function of `util.map_files` with the results cache.
+
+    A cache which can't be used (a locked or corrupt database, say) just
+    means the file is checked as usual.
+    """
+
+    def __init__(
+            self,
+            func: Callable[[str], int],
+            args: argparse.Namespace,
+            cache: ResultCache,
+    ) -> None:
+        self.func = func
+        self.cache = cache
+        fn = _hook_fn(func)
+        self.prefix = '\0'.join((
+            f'{fn.__module__}.{fn.__qualname__}',
+            normalize_args(args),
+            hook_version(func),
+        ))
+
+    def _key(self, *parts: str) -> str:
+        return hashlib.sha256('\0'.join(parts).encode()).hexdigest()
+
+    def _get(self, *keys: str) -> tuple[int, bytes, bytes] | None:
+        try:
+            for key in keys:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    return cached
+        except (OSError, sqlite3.Error):
+            pass
+        return None
+
+    def _blob_id(self, filename: str) -> str:
+        # the contents (see `util.map_contents`) know it, without reading the
+        # file again for the call
+        func_blob_id = getattr(self.func, 'blob_id', None)
+        if func_blob_id is not None:
+            return func_blob_id(filename)
+        with open(filename, 'rb') as f:
+            return blob_id(f.read())
+
+    def __call__(self, filename: str) -> int:
+        blob = self._blob_id(filename)
+        passed_key = self._key(self.prefix, blob)
+        file_key = self._key(self.prefix, blob, filename)
+
+        cached = self._get(passed_key, file_key)
+        if cached is not None:
+            retv, out, err = cached
+        else:
+            with capture_output() as (out_io, err_io):
+                retv = self.func(filename)
+            out, err = out_io.getvalue(), err_io.getvalue()
+            key = passed_key if not (retv or out or err) else file_key
+            self.cache.put(key, retv, out, err)
+
+        write_output(sys.stdout, out)
+        write_output(sys.stderr, err)
+        return retv
+
+    def prepare(self, filenames: list[str]) -> None:
+        prepare_func(self.func, filenames)
+
+    def close(self) -> None:
+        """Done with the files, in this process (a pool worker's batch)"""
+        try:
+            self.cache.flush()
+        except (OSError, sqlite3.Error):
+            pass
+        close_func(self.func)
+
+    def prune(self) -> None:
+        """Done with the run"""
+        try:
+            self.cache.prune()
+            self.cache.close()
+        except (OSError, sqlite3.Error):
+            pass
+
+
+@contextlib.contextmanager
+def cached(
+        func: Callable[[str], int],
+        args: argparse.Namespace,
+) -> Generator[Callable[[str], int], None, None]:
+    path = cache_path()
+    if path is None:  # not in a git repository, nowhere to keep results
+        yield func
+    else:
+        cached_func = Cached(func, args, ResultCache(path))
+        yield cached_func
+        cached_func.prune()
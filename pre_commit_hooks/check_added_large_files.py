@@ -6,7 +6,9 @@ import os
 import subprocess
 from typing import Sequence
 
+from pre_commit_hooks.util import add_files_from_arguments
 from pre_commit_hooks.util import added_files
+from pre_commit_hooks.util import parse_args
 from pre_commit_hooks.util import zsplit
 
 
@@ -68,7 +70,8 @@ def main(argv: Sequence[str] | None = None) -> int:
         '--maxkb', type=int, default=500,
         help='Maximum allowable KB for added files',
     )
-    args = parser.parse_args(argv)
+    add_files_from_arguments(parser)
+    args = parse_args(parser, argv)
 
     return find_large_added_files(
         args.filenames,
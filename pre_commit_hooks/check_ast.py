@@ -1,31 +1,45 @@
 from __future__ import annotations
 
 import argparse
-import ast
-import platform
 import sys
-import traceback
 from typing import Sequence
 
+from pre_commit_hooks import python_source
+from pre_commit_hooks.util import add_cache_argument
+from pre_commit_hooks.util import add_execution_arguments
+from pre_commit_hooks.util import add_files_from_arguments
+from pre_commit_hooks.util import map_files
+from pre_commit_hooks.util import parse_args
+
+
+def _check_file(filename: str) -> int:
+    try:
+        python_source.get(filename).tree
+    except SyntaxError:
+        import platform
+        import traceback
+
+        impl = platform.python_implementation()
+        version = sys.version.split()[0]
+        print(f'{filename}: failed parsing with {impl} {version}:')
+        tb = '    ' + traceback.format_exc().replace('\n', '\n    ')
+        print(f'\n{tb}')
+        return 1
+    else:
+        return 0
+
 
 def main(argv: Sequence[str] | None = None) -> int:
     parser = argparse.ArgumentParser()
     parser.add_argument('filenames', nargs='*')
-    args = parser.parse_args(argv)
+    add_execution_arguments(parser)
+    add_cache_argument(parser)
+    add_files_from_arguments(parser, types=('python',))
+    args = parse_args(parser, argv)
 
     retval = 0
-    for filename in args.filenames:
-
-        try:
-            with open(filename, 'rb') as f:
-                ast.parse(f.read(), filename=filename)
-        except SyntaxError:
-            impl = platform.python_implementation()
-            version = sys.version.split()[0]
-            print(f'{filename}: failed parsing with {impl} {version}:')
-            tb = '    ' + traceback.format_exc().replace('\n', '\n    ')
-            print(f'\n{tb}')
-            retval = 1
+    for ret in map_files(_check_file, args.filenames, args):
+        retval |= ret
     return retval
 
 
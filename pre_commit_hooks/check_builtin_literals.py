@@ -2,9 +2,17 @@ from __future__ import annotations
 
 import argparse
 import ast
+import functools
 from typing import NamedTuple
 from typing import Sequence
 
+from pre_commit_hooks import python_source
+from pre_commit_hooks.util import add_cache_argument
+from pre_commit_hooks.util import add_execution_arguments
+from pre_commit_hooks.util import add_files_from_arguments
+from pre_commit_hooks.util import map_files
+from pre_commit_hooks.util import parse_args
+
 
 BUILTIN_TYPES = {
     'complex': '0j',
@@ -58,13 +66,30 @@ def check_file(
         ignore: Sequence[str] | None = None,
         allow_dict_kwargs: bool = True,
 ) -> list[Call]:
-    with open(filename, 'rb') as f:
-        tree = ast.parse(f.read(), filename=filename)
+    tree = python_source.get(filename).tree
     visitor = Visitor(ignore=ignore, allow_dict_kwargs=allow_dict_kwargs)
     visitor.visit(tree)
     return visitor.builtin_type_calls
 
 
+def _check_filename(
+        filename: str,
+        ignore: Sequence[str] | None = None,
+        allow_dict_kwargs: bool = True,
+) -> int:
+    calls = check_file(
+        filename,
+        ignore=ignore,
+        allow_dict_kwargs=allow_dict_kwargs,
+    )
+    for call in calls:
+        print(
+            f'{filename}:{call.line}:{call.column}: '
+            f'replace {call.name}() with {BUILTIN_TYPES[call.name]}',
+        )
+    return int(bool(calls))
+
+
 def parse_ignore(value: str) -> set[str]:
     return set(value.split(','))
 
@@ -82,22 +107,19 @@ def main(argv: Sequence[str] | None = None) -> int:
     )
     mutex.set_defaults(allow_dict_kwargs=True)
 
-    args = parser.parse_args(argv)
+    add_execution_arguments(parser)
+    add_cache_argument(parser)
+    add_files_from_arguments(parser, types=('python',))
+    args = parse_args(parser, argv)
 
+    check = functools.partial(
+        _check_filename,
+        ignore=args.ignore,
+        allow_dict_kwargs=args.allow_dict_kwargs,
+    )
     rc = 0
-    for filename in args.filenames:
-        calls = check_file(
-            filename,
-            ignore=args.ignore,
-            allow_dict_kwargs=args.allow_dict_kwargs,
-        )
-        if calls:
-            rc = rc or 1
-        for call in calls:
-            print(
-                f'{filename}:{call.line}:{call.column}: '
-                f'replace {call.name}() with {BUILTIN_TYPES[call.name]}',
-            )
+    for ret in map_files(check, args.filenames, args):
+        rc |= ret
     return rc
 
 
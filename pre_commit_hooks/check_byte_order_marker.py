@@ -3,19 +3,31 @@ from __future__ import annotations
 import argparse
 from typing import Sequence
 
+from pre_commit_hooks.util import add_execution_arguments
+from pre_commit_hooks.util import add_files_from_arguments
+from pre_commit_hooks.util import map_files
+from pre_commit_hooks.util import parse_args
+
+
+def _check_file(filename: str) -> int:
+    with open(filename, 'rb') as f:
+        if f.read(3) == b'\xef\xbb\xbf':
+            print(f'{filename}: Has a byte-order marker')
+            return 1
+    return 0
+
 
 def main(argv: Sequence[str] | None = None) -> int:
     parser = argparse.ArgumentParser()
     parser.add_argument('filenames', nargs='*', help='Filenames to check')
-    args = parser.parse_args(argv)
+    add_execution_arguments(parser)
+    add_files_from_arguments(parser, types=('text',))
+    args = parse_args(parser, argv)
 
     retv = 0
 
-    for filename in args.filenames:
-        with open(filename, 'rb') as f:
-            if f.read(3) == b'\xef\xbb\xbf':
-                retv = 1
-                print(f'{filename}: Has a byte-order marker')
+    for ret in map_files(_check_file, args.filenames, args):
+        retv |= ret
 
     return retv
 
@@ -5,8 +5,10 @@ from typing import Iterable
 from typing import Iterator
 from typing import Sequence
 
+from pre_commit_hooks.git_index import ls_paths
+from pre_commit_hooks.util import add_files_from_arguments
 from pre_commit_hooks.util import added_files
-from pre_commit_hooks.util import cmd_output
+from pre_commit_hooks.util import parse_args
 
 
 def lower_set(iterable: Iterable[str]) -> set[str]:
@@ -26,7 +28,7 @@ def directories_for(files: set[str]) -> set[str]:
 
 
 def find_conflicting_filenames(filenames: Sequence[str]) -> int:
-    repo_files = set(cmd_output('git', 'ls-files').splitlines())
+    repo_files = set(ls_paths())
     repo_files |= directories_for(repo_files)
     relevant_files = set(filenames) | added_files()
     relevant_files |= directories_for(relevant_files)
@@ -63,7 +65,8 @@ def main(argv: Sequence[str] | None = None) -> int:
         help='Filenames pre-commit believes are changed.',
     )
 
-    args = parser.parse_args(argv)
+    add_files_from_arguments(parser)
+    args = parse_args(parser, argv)
 
     return find_conflicting_filenames(args.filenames)
 
@@ -4,8 +4,16 @@ import argparse
 import io
 import tokenize
 from tokenize import tokenize as tokenize_tokenize
+from typing import Iterable
 from typing import Sequence
 
+from pre_commit_hooks import python_source
+from pre_commit_hooks.util import add_cache_argument
+from pre_commit_hooks.util import add_execution_arguments
+from pre_commit_hooks.util import add_files_from_arguments
+from pre_commit_hooks.util import map_files
+from pre_commit_hooks.util import parse_args
+
 NON_CODE_TOKENS = frozenset((
     tokenize.COMMENT, tokenize.ENDMARKER, tokenize.NEWLINE, tokenize.NL,
     tokenize.ENCODING,
@@ -19,11 +27,15 @@ def check_docstring_first(src: bytes, filename: str = '<unknown>') -> int:
     A string will be considered a docstring if it is a STRING token with a
     col offset of 0.
     """
+    tok_gen = tokenize_tokenize(io.BytesIO(src).readline)
+    return _check_tokens(tok_gen, filename)
+
+
+def _check_tokens(tokens: Iterable[tokenize.TokenInfo], filename: str) -> int:
     found_docstring_line = None
     found_code_line = None
 
-    tok_gen = tokenize_tokenize(io.BytesIO(src).readline)
-    for tok_type, _, (sline, scol), _, _ in tok_gen:
+    for tok_type, _, (sline, scol), _, _ in tokens:
         # Looks like a docstring!
         if tok_type == tokenize.STRING and scol == 0:
             if found_docstring_line is not None:
@@ -46,16 +58,28 @@ def check_docstring_first(src: bytes, filename: str = '<unknown>') -> int:
     return 0
 
 
+def _check_filename(filename: str) -> int:
+    source = python_source.get(filename)
+    try:
+        tokens = source.tokens
+    except (SyntaxError, tokenize.TokenError):
+        # tokenized as it's checked, the error may come after a finding
+        return check_docstring_first(source.data, filename=filename)
+    else:
+        return _check_tokens(tokens, filename)
+
+
 def main(argv: Sequence[str] | None = None) -> int:
     parser = argparse.ArgumentParser()
     parser.add_argument('filenames', nargs='*')
-    args = parser.parse_args(argv)
+    add_execution_arguments(parser)
+    add_cache_argument(parser)
+    add_files_from_arguments(parser, types=('python',))
+    args = parse_args(parser, argv)
 
     retv = 0
 
-    for filename in args.filenames:
-        with open(filename, 'rb') as f:
-            contents = f.read()
-        retv |= check_docstring_first(contents, filename=filename)
+    for ret in map_files(_check_filename, args.filenames, args):
+        retv |= ret
 
     return retv
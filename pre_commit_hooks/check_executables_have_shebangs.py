@@ -8,16 +8,16 @@ from typing import Generator
 from typing import NamedTuple
 from typing import Sequence
 
-from pre_commit_hooks.util import cmd_output
-from pre_commit_hooks.util import zsplit
+from pre_commit_hooks.git_index import ls_files
+from pre_commit_hooks.git_repo import config_value
+from pre_commit_hooks.util import add_files_from_arguments
+from pre_commit_hooks.util import parse_args
 
 EXECUTABLE_VALUES = frozenset(('1', '3', '5', '7'))
 
 
 def check_executables(paths: list[str]) -> int:
-    fs_tracks_executable_bit = cmd_output(
-        'git', 'config', 'core.fileMode', retcode=None,
-    ).strip()
+    fs_tracks_executable_bit = (config_value('core.fileMode') or '').strip()
     if fs_tracks_executable_bit == 'false':  # pragma: win32 cover
         return _check_git_filemode(paths)
     else:  # pragma: win32 no cover
@@ -36,11 +36,8 @@ class GitLsFile(NamedTuple):
 
 
 def git_ls_files(paths: Sequence[str]) -> Generator[GitLsFile, None, None]:
-    outs = cmd_output('git', 'ls-files', '-z', '--stage', '--', *paths)
-    for out in zsplit(outs):
-        metadata, filename = out.split('\t')
-        mode, _, _ = metadata.split()
-        yield GitLsFile(mode, filename)
+    for entry in ls_files(paths):
+        yield GitLsFile(f'{entry.mode:06o}', entry.path)
 
 
 def _check_git_filemode(paths: Sequence[str]) -> int:
@@ -76,7 +73,8 @@ def _message(path: str) -> None:
 def main(argv: Sequence[str] | None = None) -> int:
     parser = argparse.ArgumentParser(description=__doc__)
     parser.add_argument('filenames', nargs='*')
-    args = parser.parse_args(argv)
+    add_files_from_arguments(parser, types=('text', 'executable'))
+    args = parse_args(parser, argv)
 
     return check_executables(args.filenames)
 
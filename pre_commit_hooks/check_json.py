@@ -5,6 +5,14 @@ import json
 from typing import Any
 from typing import Sequence
 
+from pre_commit_hooks.util import add_cache_argument
+from pre_commit_hooks.util import add_execution_arguments
+from pre_commit_hooks.util import add_files_from_arguments
+from pre_commit_hooks.util import add_read_ahead_argument
+from pre_commit_hooks.util import add_staged_argument
+from pre_commit_hooks.util import map_contents
+from pre_commit_hooks.util import parse_args
+
 
 def raise_duplicate_keys(
         ordered_pairs: list[tuple[str, Any]],
@@ -18,19 +26,29 @@ def raise_duplicate_keys(
     return d
 
 
+def _check_contents(filename: str, contents: bytes) -> int:
+    try:
+        json.loads(contents, object_pairs_hook=raise_duplicate_keys)
+    except ValueError as exc:
+        print(f'{filename}: Failed to json decode ({exc})')
+        return 1
+    else:
+        return 0
+
+
 def main(argv: Sequence[str] | None = None) -> int:
     parser = argparse.ArgumentParser()
     parser.add_argument('filenames', nargs='*', help='Filenames to check.')
-    args = parser.parse_args(argv)
+    add_execution_arguments(parser)
+    add_cache_argument(parser)
+    add_staged_argument(parser)
+    add_read_ahead_argument(parser)
+    add_files_from_arguments(parser, types=('json',))
+    args = parse_args(parser, argv)
 
     retval = 0
-    for filename in args.filenames:
-        with open(filename, 'rb') as f:
-            try:
-                json.load(f, object_pairs_hook=raise_duplicate_keys)
-            except ValueError as exc:
-                print(f'{filename}: Failed to json decode ({exc})')
-                retval = 1
+    for ret in map_contents(_check_contents, args.filenames, args):
+        retval |= ret
     return retval
 
 
@@ -1,10 +1,19 @@
 from __future__ import annotations
 
 import argparse
-import os.path
+from typing import Iterable
 from typing import Sequence
 
-from pre_commit_hooks.util import cmd_output
+from pre_commit_hooks.git_repo import git_dir
+from pre_commit_hooks.git_repo import is_merging
+from pre_commit_hooks.util import add_changed_lines_argument
+from pre_commit_hooks.util import add_execution_arguments
+from pre_commit_hooks.util import add_files_from_arguments
+from pre_commit_hooks.util import add_staged_argument
+from pre_commit_hooks.util import map_lines
+from pre_commit_hooks.util import MultiPattern
+from pre_commit_hooks.util import NumberedLines
+from pre_commit_hooks.util import parse_args
 
 
 CONFLICT_PATTERNS = [
@@ -14,40 +23,46 @@ CONFLICT_PATTERNS = [
     b'=======\n',
     b'>>>>>>> ',
 ]
+_CONFLICT_PATTERNS = MultiPattern(CONFLICT_PATTERNS)
 
 
 def is_in_merge() -> bool:
-    git_dir = cmd_output('git', 'rev-parse', '--git-dir').rstrip()
-    return (
-        os.path.exists(os.path.join(git_dir, 'MERGE_MSG')) and
-        (
-            os.path.exists(os.path.join(git_dir, 'MERGE_HEAD')) or
-            os.path.exists(os.path.join(git_dir, 'rebase-apply')) or
-            os.path.exists(os.path.join(git_dir, 'rebase-merge'))
-        )
-    )
+    return is_merging(git_dir())
+
+
+def check_lines(filename: str, lines: Iterable[bytes]) -> int:
+    return check_numbered_lines(filename, enumerate(lines, start=1))
+
+
+def check_numbered_lines(filename: str, numbered: NumberedLines) -> int:
+    retcode = 0
+    for i, line in numbered:
+        pattern = _CONFLICT_PATTERNS.match(line)
+        if pattern is not None:
+            print(
+                f'{filename}:{i}: Merge conflict string '
+                f'{pattern.strip().decode()!r} found',
+            )
+            retcode = 1
+    return retcode
 
 
 def main(argv: Sequence[str] | None = None) -> int:
     parser = argparse.ArgumentParser()
     parser.add_argument('filenames', nargs='*')
     parser.add_argument('--assume-in-merge', action='store_true')
-    args = parser.parse_args(argv)
+    add_execution_arguments(parser)
+    add_staged_argument(parser)
+    add_changed_lines_argument(parser)
+    add_files_from_arguments(parser, types=('text',))
+    args = parse_args(parser, argv)
 
     if not is_in_merge() and not args.assume_in_merge:
         return 0
 
     retcode = 0
-    for filename in args.filenames:
-        with open(filename, 'rb') as inputfile:
-            for i, line in enumerate(inputfile, start=1):
-                for pattern in CONFLICT_PATTERNS:
-                    if line.startswith(pattern):
-                        print(
-                            f'{filename}:{i}: Merge conflict string '
-                            f'{pattern.strip().decode()!r} found',
-                        )
-                        retcode = 1
+    for ret in map_lines(check_numbered_lines, args.filenames, args):
+        retcode |= ret
 
     return retcode
 
@@ -9,6 +9,8 @@ from typing import Sequence
 from pre_commit_hooks.check_executables_have_shebangs import EXECUTABLE_VALUES
 from pre_commit_hooks.check_executables_have_shebangs import git_ls_files
 from pre_commit_hooks.check_executables_have_shebangs import has_shebang
+from pre_commit_hooks.util import add_files_from_arguments
+from pre_commit_hooks.util import parse_args
 
 
 def check_shebangs(paths: list[str]) -> int:
@@ -45,7 +47,8 @@ def _message(path: str) -> None:
 def main(argv: Sequence[str] | None = None) -> int:
     parser = argparse.ArgumentParser(description=__doc__)
     parser.add_argument('filenames', nargs='*')
-    args = parser.parse_args(argv)
+    add_files_from_arguments(parser, types=('text',))
+    args = parse_args(parser, argv)
 
     return check_shebangs(args.filenames)
 
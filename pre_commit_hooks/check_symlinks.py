@@ -4,11 +4,15 @@ import argparse
 import os.path
 from typing import Sequence
 
+from pre_commit_hooks.util import add_files_from_arguments
+from pre_commit_hooks.util import parse_args
+
 
 def main(argv: Sequence[str] | None = None) -> int:
     parser = argparse.ArgumentParser(description='Checks for broken symlinks.')
     parser.add_argument('filenames', nargs='*', help='Filenames to check')
-    args = parser.parse_args(argv)
+    add_files_from_arguments(parser, types=('symlink',))
+    args = parse_args(parser, argv)
 
     retv = 0
 
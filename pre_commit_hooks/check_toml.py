@@ -4,25 +4,42 @@ import argparse
 import sys
 from typing import Sequence
 
-if sys.version_info >= (3, 11):  # pragma: >=3.11 cover
-    import tomllib
-else:  # pragma: <3.11 cover
-    import tomli as tomllib
+from pre_commit_hooks.util import add_cache_argument
+from pre_commit_hooks.util import add_execution_arguments
+from pre_commit_hooks.util import add_files_from_arguments
+from pre_commit_hooks.util import add_read_ahead_argument
+from pre_commit_hooks.util import map_contents
+from pre_commit_hooks.util import parse_args
+
+
+def _check_contents(filename: str, contents: bytes) -> int:
+    if sys.version_info >= (3, 11):  # pragma: >=3.11 cover
+        import tomllib
+    else:  # pragma: <3.11 cover
+        import tomli as tomllib
+
+    try:
+        # like `tomllib.load`, which decodes the whole file as UTF-8
+        tomllib.loads(contents.decode())
+    except tomllib.TOMLDecodeError as exc:
+        print(f'{filename}: {exc}')
+        return 1
+    else:
+        return 0
 
 
 def main(argv: Sequence[str] | None = None) -> int:
     parser = argparse.ArgumentParser()
     parser.add_argument('filenames', nargs='*', help='Filenames to check.')
-    args = parser.parse_args(argv)
+    add_execution_arguments(parser)
+    add_cache_argument(parser)
+    add_read_ahead_argument(parser)
+    add_files_from_arguments(parser, types=('toml',))
+    args = parse_args(parser, argv)
 
     retval = 0
-    for filename in args.filenames:
-        try:
-            with open(filename, mode='rb') as fp:
-                tomllib.load(fp)
-        except tomllib.TOMLDecodeError as exc:
-            print(f'{filename}: {exc}')
-            retval = 1
+    for ret in map_contents(_check_contents, args.filenames, args):
+        retval |= ret
     return retval
 
 
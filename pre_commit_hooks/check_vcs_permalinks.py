@@ -1,11 +1,27 @@
 from __future__ import annotations
 
 import argparse
+import functools
 import re
 import sys
+from typing import Iterable
 from typing import Pattern
 from typing import Sequence
 
+from pre_commit_hooks.util import add_changed_lines_argument
+from pre_commit_hooks.util import add_execution_arguments
+from pre_commit_hooks.util import add_files_from_arguments
+from pre_commit_hooks.util import add_staged_argument
+from pre_commit_hooks.util import map_lines
+from pre_commit_hooks.util import NumberedLines
+from pre_commit_hooks.util import parse_args
+
+HINT = (
+    '\n'
+    'Non-permanent github link detected.\n'
+    'On any page on github press [y] to load a permalink.'
+)
+
 
 def _get_pattern(domain: str) -> Pattern[bytes]:
     regex = (
@@ -15,29 +31,48 @@ def _get_pattern(domain: str) -> Pattern[bytes]:
     return re.compile(regex.encode())
 
 
-def _check_filename(filename: str, patterns: list[Pattern[bytes]]) -> int:
+def _check_lines(
+        filename: str,
+        lines: Iterable[bytes],
+        patterns: list[Pattern[bytes]],
+) -> int:
+    return _check_numbered_lines(filename, enumerate(lines, 1), patterns)
+
+
+def _check_numbered_lines(
+        filename: str,
+        numbered: NumberedLines,
+        patterns: list[Pattern[bytes]],
+) -> int:
     retv = 0
-    with open(filename, 'rb') as f:
-        for i, line in enumerate(f, 1):
-            for pattern in patterns:
-                if pattern.search(line):
-                    sys.stdout.write(f'{filename}:{i}:')
-                    sys.stdout.flush()
-                    sys.stdout.buffer.write(line)
-                    retv = 1
+    for i, line in numbered:
+        for pattern in patterns:
+            if pattern.search(line):
+                sys.stdout.write(f'{filename}:{i}:')
+                sys.stdout.flush()
+                sys.stdout.buffer.write(line)
+                retv = 1
     return retv
 
 
-def main(argv: Sequence[str] | None = None) -> int:
-    parser = argparse.ArgumentParser()
-    parser.add_argument('filenames', nargs='*')
+def _add_domain_argument(parser: argparse.ArgumentParser) -> None:
     parser.add_argument(
         '--additional-github-domain',
         dest='additional_github_domains',
         action='append',
         default=['github.com'],
     )
-    args = parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('filenames', nargs='*')
+    _add_domain_argument(parser)
+    add_execution_arguments(parser)
+    add_staged_argument(parser)
+    add_changed_lines_argument(parser)
+    add_files_from_arguments(parser, types=('text',))
+    args = parse_args(parser, argv)
 
     patterns = [
         _get_pattern(domain)
@@ -46,13 +81,12 @@ def main(argv: Sequence[str] | None = None) -> int:
 
     retv = 0
 
-    for filename in args.filenames:
-        retv |= _check_filename(filename, patterns)
+    check = functools.partial(_check_numbered_lines, patterns=patterns)
+    for ret in map_lines(check, args.filenames, args):
+        retv |= ret
 
     if retv:
-        print()
-        print('Non-permanent github link detected.')
-        print('On any page on github press [y] to load a permalink.')
+        print(HINT)
     return retv
 
 
@@ -1,24 +1,48 @@
 from __future__ import annotations
 
 import argparse
-import xml.sax.handler
+import io
 from typing import Sequence
 
+from pre_commit_hooks.util import add_cache_argument
+from pre_commit_hooks.util import add_execution_arguments
+from pre_commit_hooks.util import add_files_from_arguments
+from pre_commit_hooks.util import add_read_ahead_argument
+from pre_commit_hooks.util import map_contents
+from pre_commit_hooks.util import parse_args
+
+
+def _check_contents(filename: str, contents: bytes) -> int:
+    import xml.sax.handler
+    import xml.sax.xmlreader
+
+    reader = xml.sax.make_parser()
+    reader.setContentHandler(xml.sax.handler.ContentHandler())
+    # with a system id, errors are reported at `filename:line:column`
+    source = xml.sax.xmlreader.InputSource()
+    source.setSystemId(filename)
+    source.setByteStream(io.BytesIO(contents))
+    try:
+        reader.parse(source)
+    except xml.sax.SAXException as exc:
+        print(f'{filename}: Failed to xml parse ({exc})')
+        return 1
+    else:
+        return 0
+
 
 def main(argv: Sequence[str] | None = None) -> int:
     parser = argparse.ArgumentParser()
     parser.add_argument('filenames', nargs='*', help='XML filenames to check.')
-    args = parser.parse_args(argv)
+    add_execution_arguments(parser)
+    add_cache_argument(parser)
+    add_read_ahead_argument(parser)
+    add_files_from_arguments(parser, types=('xml',))
+    args = parse_args(parser, argv)
 
     retval = 0
-    handler = xml.sax.handler.ContentHandler()
-    for filename in args.filenames:
-        try:
-            with open(filename, 'rb') as xml_file:
-                xml.sax.parse(xml_file, handler)
-        except xml.sax.SAXException as exc:
-            print(f'{filename}: Failed to xml parse ({exc})')
-            retval = 1
+    for ret in map_contents(_check_contents, args.filenames, args):
+        retval |= ret
     return retval
 
 
@@ -1,14 +1,37 @@
 from __future__ import annotations
 
 import argparse
+import functools
+import io
 from typing import Any
 from typing import Generator
 from typing import NamedTuple
 from typing import Sequence
+from typing import TYPE_CHECKING
 
-import ruamel.yaml
+from pre_commit_hooks.util import add_cache_argument
+from pre_commit_hooks.util import add_execution_arguments
+from pre_commit_hooks.util import add_files_from_arguments
+from pre_commit_hooks.util import add_read_ahead_argument
+from pre_commit_hooks.util import add_staged_argument
+from pre_commit_hooks.util import map_contents
+from pre_commit_hooks.util import parse_args
 
-yaml = ruamel.yaml.YAML(typ='safe')
+if TYPE_CHECKING:
+    import ruamel.yaml
+
+
+@functools.lru_cache(maxsize=None)
+def _yaml() -> ruamel.yaml.YAML:
+    # ruamel.yaml is by far the most expensive import of any hook
+    import ruamel.yaml
+    return ruamel.yaml.YAML(typ='safe')
+
+
+def __getattr__(name: str) -> Any:
+    if name == 'yaml':
+        return _yaml()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
 
 def _exhaust(gen: Generator[str, None, None]) -> None:
@@ -16,12 +39,16 @@ def _exhaust(gen: Generator[str, None, None]) -> None:
         pass
 
 
+def _load(*args: Any, **kwargs: Any) -> None:
+    _yaml().load(*args, **kwargs)
+
+
 def _parse_unsafe(*args: Any, **kwargs: Any) -> None:
-    _exhaust(yaml.parse(*args, **kwargs))
+    _exhaust(_yaml().parse(*args, **kwargs))
 
 
 def _load_all(*args: Any, **kwargs: Any) -> None:
-    _exhaust(yaml.load_all(*args, **kwargs))
+    _exhaust(_yaml().load_all(*args, **kwargs))
 
 
 class Key(NamedTuple):
@@ -30,13 +57,28 @@ class Key(NamedTuple):
 
 
 LOAD_FNS = {
-    Key(multi=False, unsafe=False): yaml.load,
+    Key(multi=False, unsafe=False): _load,
     Key(multi=False, unsafe=True): _parse_unsafe,
     Key(multi=True, unsafe=False): _load_all,
     Key(multi=True, unsafe=True): _parse_unsafe,
 }
 
 
+def _check_contents(filename: str, contents: bytes, key: Key) -> int:
+    import ruamel.yaml
+
+    stream = io.StringIO(contents.decode('UTF-8'))
+    # named, so the error marks say which file failed
+    stream.name = filename
+    try:
+        LOAD_FNS[key](stream)
+    except ruamel.yaml.YAMLError as exc:
+        print(exc)
+        return 1
+    else:
+        return 0
+
+
 def main(argv: Sequence[str] | None = None) -> int:
     parser = argparse.ArgumentParser()
     parser.add_argument(
@@ -53,18 +95,19 @@ def main(argv: Sequence[str] | None = None) -> int:
         ),
     )
     parser.add_argument('filenames', nargs='*', help='Filenames to check.')
-    args = parser.parse_args(argv)
+    add_execution_arguments(parser)
+    add_cache_argument(parser)
+    add_staged_argument(parser)
+    add_read_ahead_argument(parser)
+    add_files_from_arguments(parser, types=('yaml',))
+    args = parse_args(parser, argv)
 
-    load_fn = LOAD_FNS[Key(multi=args.multi, unsafe=args.unsafe)]
+    key = Key(multi=args.multi, unsafe=args.unsafe)
 
     retval = 0
-    for filename in args.filenames:
-        try:
-            with open(filename, encoding='UTF-8') as f:
-                load_fn(f)
-        except ruamel.yaml.YAMLError as exc:
-            print(exc)
-            retval = 1
+    check = functools.partial(_check_contents, key=key)
+    for ret in map_contents(check, args.filenames, args):
+        retval |= ret
     return retval
 
 
@@ -0,0 +1,217 @@
+"""Console script entry points which use a running `pre-commit-hooks-daemon`.
+
+When a daemon is serving the current repository the hook is run there (with
+its modules already imported) and only argv, cwd, the environment and the
+stdio file descriptors are sent over.  Otherwise the hook is imported and run
+in this process as usual.  Keep the imports here to a minimum, avoiding them
+is the whole point.
+"""
+from __future__ import annotations
+
+import importlib
+import os
+import sys
+import zlib
+
+# not `typing.TYPE_CHECKING`, `typing` costs more than everything else here
+# (mypy takes any `TYPE_CHECKING` to be true)
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Callable
+    from typing import Sequence
+
+_MSG_MAX = 16
+
+
+def repo_root(path: str) -> str | None:
+    path = os.path.abspath(path)
+    while True:
+        if os.path.exists(os.path.join(path, '.git')):
+            return path
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+
+def socket_dir() -> str:
+    # not `tempfile.gettempdir()`, that import alone costs more than this
+    base = (
+        os.environ.get('XDG_RUNTIME_DIR') or
+        os.environ.get('TMPDIR') or
+        '/tmp'
+    )
+    return os.path.join(base, f'pre-commit-hooks-{os.getuid()}')
+
+
+def socket_path(cwd: str) -> str | None:
+    root = repo_root(cwd)
+    if root is None:
+        return None
+    # not `hashlib`, which loads OpenSSL.  Two checksums for 64 bits, a
+    # collision needs both to collide
+    b = os.fsencode(root)
+    digest = f'{zlib.crc32(b):08x}{zlib.adler32(b):08x}'
+    return os.path.join(socket_dir(), f'{digest}.sock')
+
+
+def _socket_dir_is_private(path: str) -> bool:
+    try:
+        st = os.stat(os.path.dirname(path))
+    except OSError:
+        return False
+    return st.st_uid == os.getuid() and st.st_mode & 0o077 == 0
+
+
+def _forward(modname: str, argv: Sequence[str]) -> int | None:
+    """Run the hook in the daemon, `None` if there isn't one to run it"""
+    if not hasattr(os, 'fork'):  # pragma: win32 cover
+        return None
+    cwd = os.getcwd()
+    path = socket_path(cwd)
+    if path is None or not os.path.exists(path):
+        return None
+    elif not _socket_dir_is_private(path):
+        return None
+
+    # not `socket` (which imports `enum` and `selectors`) nor `array`, only
+    # the few calls below are needed
+    import _socket
+
+    sock = _socket.socket(_socket.AF_UNIX, _socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        return None
+
+    try:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        # stdin, stdout and stderr, as C ints
+        fds = b''.join(fd.to_bytes(4, sys.byteorder) for fd in (0, 1, 2))
+        sock.sendmsg(
+            [b'\0'], [(_socket.SOL_SOCKET, _socket.SCM_RIGHTS, fds)],
+        )
+        request = {
+            'command': 'run',
+            'module': modname,
+            'argv': list(argv),
+            'cwd': cwd,
+            'env': dict(os.environ),
+        }
+        # a literal for `ast.literal_eval`, `json` imports `re`
+        sock.sendall(repr(request).encode())
+        sock.shutdown(_socket.SHUT_WR)
+
+        response = b''
+        while True:
+            chunk = sock.recv(_MSG_MAX)
+            if not chunk:
+                break
+            response += chunk
+    finally:
+        sock.close()
+
+    try:
+        return int(response)
+    except ValueError:
+        # the hook may have already done part of its work, don't re-run it
+        print(
+            f'{modname}: pre-commit-hooks-daemon did not report a result',
+            file=sys.stderr,
+        )
+        return 1
+
+
+def run_hook(name: str, argv: Sequence[str] | None = None) -> int:
+    argv = argv if argv is not None else sys.argv[1:]
+    modname = f'pre_commit_hooks.{name}'
+    retv = _forward(modname, argv)
+    if retv is None:
+        retv = importlib.import_module(modname).main(argv)
+    return retv
+
+
+def _entry_point(name: str) -> Callable[[Sequence[str] | None], int]:
+    def main(argv: Sequence[str] | None = None) -> int:
+        return run_hook(name, argv)
+    return main
+
+
+# modules with a `main` which are installed as console scripts
+MODULES = (
+    'check_added_large_files',
+    'check_ast',
+    'check_builtin_literals',
+    'check_byte_order_marker',
+    'check_case_conflict',
+    'check_docstring_first',
+    'check_executables_have_shebangs',
+    'check_json',
+    'check_merge_conflict',
+    'check_shebang_scripts_are_executable',
+    'check_symlinks',
+    'check_toml',
+    'check_vcs_permalinks',
+    'check_xml',
+    'check_yaml',
+    'debug_statement_hook',
+    'destroyed_symlinks',
+    'detect_aws_credentials',
+    'detect_private_key',
+    'end_of_file_fixer',
+    'file_contents_sorter',
+    'fix_byte_order_marker',
+    'fix_encoding_pragma',
+    'forbid_new_submodules',
+    'mixed_line_ending',
+    'no_commit_to_branch',
+    'pretty_format_json',
+    'removed',
+    'requirements_txt_fixer',
+    'run',
+    'sort_simple_yaml',
+    'string_fixer',
+    'tests_should_end_in_test',
+    'trailing_whitespace_fixer',
+)
+
+check_added_large_files = _entry_point('check_added_large_files')
+check_ast = _entry_point('check_ast')
+check_builtin_literals = _entry_point('check_builtin_literals')
+check_byte_order_marker = _entry_point('check_byte_order_marker')
+check_case_conflict = _entry_point('check_case_conflict')
+check_docstring_first = _entry_point('check_docstring_first')
+check_executables_have_shebangs = _entry_point(
+    'check_executables_have_shebangs',
+)
+check_json = _entry_point('check_json')
+check_merge_conflict = _entry_point('check_merge_conflict')
+check_shebang_scripts_are_executable = _entry_point(
+    'check_shebang_scripts_are_executable',
+)
+check_symlinks = _entry_point('check_symlinks')
+check_toml = _entry_point('check_toml')
+check_vcs_permalinks = _entry_point('check_vcs_permalinks')
+check_xml = _entry_point('check_xml')
+check_yaml = _entry_point('check_yaml')
+debug_statement_hook = _entry_point('debug_statement_hook')
+destroyed_symlinks = _entry_point('destroyed_symlinks')
+detect_aws_credentials = _entry_point('detect_aws_credentials')
+detect_private_key = _entry_point('detect_private_key')
+end_of_file_fixer = _entry_point('end_of_file_fixer')
+file_contents_sorter = _entry_point('file_contents_sorter')
+fix_byte_order_marker = _entry_point('fix_byte_order_marker')
+fix_encoding_pragma = _entry_point('fix_encoding_pragma')
+forbid_new_submodules = _entry_point('forbid_new_submodules')
+mixed_line_ending = _entry_point('mixed_line_ending')
+no_commit_to_branch = _entry_point('no_commit_to_branch')
+pretty_format_json = _entry_point('pretty_format_json')
+removed = _entry_point('removed')
+requirements_txt_fixer = _entry_point('requirements_txt_fixer')
+run = _entry_point('run')
+sort_simple_yaml = _entry_point('sort_simple_yaml')
+string_fixer = _entry_point('string_fixer')
+tests_should_end_in_test = _entry_point('tests_should_end_in_test')
+trailing_whitespace_fixer = _entry_point('trailing_whitespace_fixer')
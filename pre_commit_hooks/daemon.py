@@ -0,0 +1,251 @@
+"""Serve hooks from a warm process so each invocation skips interpreter
+startup and imports.
+
+`pre-commit-hooks-daemon start` in a repository starts a server listening on
+a unix socket for that repository, the console scripts (see `client`) then
+hand their argv, cwd, environment and stdio over to it.  Each request runs in
+a forked copy of the server so hooks can't affect each other.
+"""
+from __future__ import annotations
+
+import argparse
+import array
+import ast
+import importlib
+import os
+import signal
+import socket
+import sys
+import time
+
+from pre_commit_hooks.client import MODULES
+from pre_commit_hooks.client import socket_path
+
+TYPE_CHECKING = False  # as in `client`
+if TYPE_CHECKING:
+    from typing import Any
+    from typing import Sequence
+
+_STDIO_FDS = 3
+
+# imported by the hooks only on the code paths which need them (see
+# `testing.importtime`), the server imports them once rather than each
+# forked request
+LAZY_IMPORTS = (
+    'concurrent.futures',
+    'configparser',
+    'difflib',
+    'platform',
+    'pre_commit_hooks.all_files',
+    'pre_commit_hooks.cache',
+    'pre_commit_hooks.git_repo',
+    'subprocess',
+    'tempfile',
+    'threading',
+    'traceback',
+    'xml.sax.expatreader',
+    'xml.sax.handler',
+    'xml.sax.xmlreader',
+)
+
+
+def _recv_request(conn: socket.socket) -> tuple[dict[str, Any], list[int]]:
+    fds = array.array('i')
+    ancbufsize = socket.CMSG_LEN(_STDIO_FDS * fds.itemsize)
+    _, ancdata, _, _ = conn.recvmsg(1, ancbufsize)
+    # only SCM_RIGHTS is ever sent
+    for _, _, data in ancdata:
+        fds.frombytes(data[:len(data) - len(data) % fds.itemsize])
+
+    body = b''
+    while True:
+        chunk = conn.recv(65536)
+        if not chunk:
+            break
+        body += chunk
+    # as `repr` of a dict, from `client`
+    request = ast.literal_eval(body.decode())
+    if not isinstance(request, dict):
+        raise ValueError(f'not a request: {request!r}')
+    return request, list(fds)
+
+
+def _exit_code(exc: SystemExit) -> int:
+    if exc.code is None:
+        return 0
+    elif isinstance(exc.code, int):
+        return exc.code
+    else:
+        print(exc.code, file=sys.stderr)
+        return 1
+
+
+def _run_request(
+        request: dict[str, Any],
+        fds: list[int],
+) -> int:  # pragma: no cover (forked child)
+    for target, fd in enumerate(fds):
+        os.dup2(fd, target)
+        os.close(fd)
+    os.chdir(request['cwd'])
+    os.environ.clear()
+    os.environ.update(request['env'])
+
+    name = request['module']
+    if name not in {f'pre_commit_hooks.{mod}' for mod in MODULES}:
+        print(f'pre-commit-hooks-daemon: unknown hook {name}', file=sys.stderr)
+        return 1
+
+    sys.argv = [name, *request['argv']]
+    try:
+        return importlib.import_module(name).main(request['argv'])
+    except SystemExit as e:
+        return _exit_code(e)
+    except BaseException:
+        import traceback
+
+        traceback.print_exc()
+        return 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+
+def _handle(listener: socket.socket, conn: socket.socket) -> bool:
+    """Handle one connection, returns whether the server should keep going"""
+    request, fds = _recv_request(conn)
+    command = request.get('command')
+    if command == 'stop':
+        conn.sendall(b'0')
+        return False
+    elif command == 'ping':
+        conn.sendall(b'0')
+        return True
+
+    pid = os.fork()
+    if pid == 0:  # pragma: no cover (forked child)
+        try:
+            listener.close()
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+            retv = _run_request(request, fds)
+            conn.sendall(str(retv).encode())
+        finally:
+            os._exit(0)
+    else:
+        for fd in fds:
+            os.close(fd)
+        return True
+
+
+def _ensure_private_dir(path: str) -> None:
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    st = os.stat(path)
+    if st.st_uid != os.getuid() or st.st_mode & 0o077:
+        raise SystemExit(f'{path}: must be private to the current user')
+
+
+def warm() -> None:
+    """Import the hooks and `LAZY_IMPORTS`, before any request is forked"""
+    for mod in MODULES:
+        importlib.import_module(f'pre_commit_hooks.{mod}')
+    for mod in LAZY_IMPORTS:
+        importlib.import_module(mod)
+    if sys.version_info >= (3, 11):  # pragma: >=3.11 cover
+        importlib.import_module('tomllib')
+    else:  # pragma: <3.11 cover
+        importlib.import_module('tomli')
+
+    from pre_commit_hooks import check_yaml
+
+    # its loader too, not only ruamel.yaml
+    check_yaml._yaml()
+
+
+def serve(path: str) -> int:  # pragma: no cover (background process)
+    import traceback
+
+    warm()
+    _ensure_private_dir(os.path.dirname(path))
+    if os.path.exists(path):
+        os.remove(path)  # a server which went away without cleaning up
+
+    # forked children are reaped automatically
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as listener:
+        listener.bind(path)
+        listener.listen(128)
+        try:
+            running = True
+            while running:
+                conn, _ = listener.accept()
+                with conn:
+                    try:
+                        running = _handle(listener, conn)
+                    except (OSError, SyntaxError, ValueError):
+                        traceback.print_exc()
+        finally:
+            os.remove(path)
+    return 0
+
+
+def _command(path: str, command: str) -> bool:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(path)
+        except OSError:
+            return False
+        sock.sendall(b'\0' + repr({'command': command}).encode())
+        sock.shutdown(socket.SHUT_WR)
+        return sock.recv(1) == b'0'
+
+
+def start(path: str, *, timeout: float = 10) -> int:
+    if _command(path, 'ping'):
+        print('pre-commit-hooks-daemon: already running')
+        return 0
+
+    import subprocess
+
+    subprocess.Popen(
+        (sys.executable, '-m', 'pre_commit_hooks.daemon', 'serve'),
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if _command(path, 'ping'):
+            return 0
+        time.sleep(.05)
+    print('pre-commit-hooks-daemon: failed to start', file=sys.stderr)
+    return 1
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        'command', choices=('start', 'stop', 'status', 'serve'),
+        help='`serve` runs the server in the foreground.',
+    )
+    args = parser.parse_args(argv)
+
+    path = socket_path(os.getcwd())
+    if path is None:
+        print('pre-commit-hooks-daemon: not in a git repository')
+        return 1
+
+    if args.command == 'serve':
+        return serve(path)
+    elif args.command == 'start':
+        return start(path)
+    elif args.command == 'stop':
+        return int(not _command(path, 'stop'))
+    else:
+        running = _command(path, 'ping')
+        print(f'pre-commit-hooks-daemon: {"" if running else "not "}running')
+        return int(not running)
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
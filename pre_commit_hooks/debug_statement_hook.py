@@ -2,10 +2,16 @@ from __future__ import annotations
 
 import argparse
 import ast
-import traceback
 from typing import NamedTuple
 from typing import Sequence
 
+from pre_commit_hooks import python_source
+from pre_commit_hooks.util import add_cache_argument
+from pre_commit_hooks.util import add_execution_arguments
+from pre_commit_hooks.util import add_files_from_arguments
+from pre_commit_hooks.util import map_files
+from pre_commit_hooks.util import parse_args
+
 
 DEBUG_STATEMENTS = {
     'ipdb',
@@ -52,9 +58,10 @@ class DebugStatementParser(ast.NodeVisitor):
 
 def check_file(filename: str) -> int:
     try:
-        with open(filename, 'rb') as f:
-            ast_obj = ast.parse(f.read(), filename=filename)
+        ast_obj = python_source.get(filename).tree
     except SyntaxError:
+        import traceback
+
         print(f'{filename} - Could not parse ast')
         print()
         print('\t' + traceback.format_exc().replace('\n', '\n\t'))
@@ -73,11 +80,14 @@ def check_file(filename: str) -> int:
 def main(argv: Sequence[str] | None = None) -> int:
     parser = argparse.ArgumentParser()
     parser.add_argument('filenames', nargs='*', help='Filenames to run')
-    args = parser.parse_args(argv)
+    add_execution_arguments(parser)
+    add_cache_argument(parser)
+    add_files_from_arguments(parser, types=('python',))
+    args = parse_args(parser, argv)
 
     retv = 0
-    for filename in args.filenames:
-        retv |= check_file(filename)
+    for ret in map_files(check_file, args.filenames, args):
+        retv |= ret
     return retv
 
 
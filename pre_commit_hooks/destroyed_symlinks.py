@@ -2,10 +2,12 @@ from __future__ import annotations
 
 import argparse
 import shlex
-import subprocess
 from typing import Sequence
 
+from pre_commit_hooks.util import add_files_from_arguments
 from pre_commit_hooks.util import cmd_output
+from pre_commit_hooks.util import GitCatFile
+from pre_commit_hooks.util import parse_args
 from pre_commit_hooks.util import zsplit
 
 ORDINARY_CHANGED_ENTRIES_MARKER = '1'
@@ -17,6 +19,8 @@ def find_destroyed_symlinks(files: Sequence[str]) -> list[str]:
     destroyed_links: list[str] = []
     if not files:
         return destroyed_links
+    # (path, hash_HEAD, hash_index) of symlinks which are now regular files
+    changed_links = []
     for line in zsplit(
         cmd_output('git', 'status', '--porcelain=v2', '-z', '--', *files),
     ):
@@ -38,38 +42,56 @@ def find_destroyed_symlinks(files: Sequence[str]) -> list[str]:
                     mode_index != PERMS_LINK and
                     mode_index != PERMS_NONEXIST
             ):
-                if hash_HEAD == hash_index:
-                    # if old and new hashes are equal, it's not needed to check
-                    # anything more, we've found a destroyed symlink for sure
-                    destroyed_links.append(path)
-                else:
-                    # if old and new hashes are *not* equal, it doesn't mean
-                    # that everything is OK - new file may be altered
-                    # by something like trailing-whitespace and/or
-                    # mixed-line-ending hooks so we need to go deeper
-                    SIZE_CMD = ('git', 'cat-file', '-s')
-                    size_index = int(cmd_output(*SIZE_CMD, hash_index).strip())
-                    size_HEAD = int(cmd_output(*SIZE_CMD, hash_HEAD).strip())
+                changed_links.append((path, hash_HEAD, hash_index))
 
-                    # in the worst case new file may have CRLF added
-                    # so check content only if new file is bigger
-                    # not more than 2 bytes compared to the old one
-                    if size_index <= size_HEAD + 2:
-                        head_content = subprocess.check_output(
-                            ('git', 'cat-file', '-p', hash_HEAD),
-                        ).rstrip()
-                        index_content = subprocess.check_output(
-                            ('git', 'cat-file', '-p', hash_index),
-                        ).rstrip()
-                        if head_content == index_content:
-                            destroyed_links.append(path)
+    # if old and new hashes are *not* equal, it doesn't mean that everything
+    # is OK - new file may be altered by something like trailing-whitespace
+    # and/or mixed-line-ending hooks so we need to go deeper
+    altered = [link for link in changed_links if link[1] != link[2]]
+    same_contents = set()
+    with GitCatFile() as cat_file:
+        hashes = [
+            h
+            for _, hash_HEAD, hash_index in altered
+            for h in (hash_HEAD, hash_index)
+        ]
+        infos = dict(zip(hashes, cat_file.info(hashes)))
+        # in the worst case new file may have CRLF added
+        # so check content only if new file is bigger
+        # not more than 2 bytes compared to the old one
+        to_compare = []
+        for path, hash_HEAD, hash_index in altered:
+            info_HEAD, info_index = infos[hash_HEAD], infos[hash_index]
+            assert info_HEAD is not None and info_index is not None
+            if info_index.size <= info_HEAD.size + 2:
+                to_compare.append((path, hash_HEAD, hash_index))
+
+        hashes = [
+            h
+            for _, hash_HEAD, hash_index in to_compare
+            for h in (hash_HEAD, hash_index)
+        ]
+        contents = dict(zip(hashes, cat_file.contents(hashes)))
+        for path, hash_HEAD, hash_index in to_compare:
+            head_content = contents[hash_HEAD]
+            index_content = contents[hash_index]
+            assert head_content is not None and index_content is not None
+            if head_content.rstrip() == index_content.rstrip():
+                same_contents.add(path)
+
+    for path, hash_HEAD, hash_index in changed_links:
+        # if old and new hashes are equal, it's not needed to check
+        # anything more, we've found a destroyed symlink for sure
+        if hash_HEAD == hash_index or path in same_contents:
+            destroyed_links.append(path)
     return destroyed_links
 
 
 def main(argv: Sequence[str] | None = None) -> int:
     parser = argparse.ArgumentParser()
     parser.add_argument('filenames', nargs='*', help='Filenames to check.')
-    args = parser.parse_args(argv)
+    add_files_from_arguments(parser, types=('file',))
+    args = parse_args(parser, argv)
     destroyed_links = find_destroyed_symlinks(files=args.filenames)
     if destroyed_links:
         print('Destroyed symlinks:')
@@ -1,11 +1,21 @@
 from __future__ import annotations
 
 import argparse
-import configparser
+import functools
 import os
 from typing import NamedTuple
 from typing import Sequence
 
+from pre_commit_hooks.util import add_changed_lines_argument
+from pre_commit_hooks.util import add_execution_arguments
+from pre_commit_hooks.util import add_files_from_arguments
+from pre_commit_hooks.util import Contents
+from pre_commit_hooks.util import map_files
+from pre_commit_hooks.util import map_lines
+from pre_commit_hooks.util import MultiPattern
+from pre_commit_hooks.util import NumberedLines
+from pre_commit_hooks.util import parse_args
+
 
 class BadFile(NamedTuple):
     filename: str
@@ -45,6 +55,8 @@ def get_aws_secrets_from_file(credentials_file: str) -> set[str]:
     if not os.path.exists(aws_credentials_file_path):
         return set()
 
+    import configparser
+
     parser = configparser.ConfigParser()
     try:
         parser.read(aws_credentials_file_path)
@@ -66,6 +78,33 @@ def get_aws_secrets_from_file(credentials_file: str) -> set[str]:
     return keys
 
 
+def _hidden_keys(
+        text_body: bytes | Contents,
+        patterns: MultiPattern,
+) -> list[str]:
+    data = text_body.data if isinstance(text_body, Contents) else text_body
+    # naively match the entire text, low chance of incorrect collision
+    found = {key for _, key in patterns.finditer(data)}
+    return [
+        key.decode()[:4].ljust(28, '*')
+        for key in patterns.patterns
+        if key in found
+    ]
+
+
+def _bad_files(
+        filenames: Sequence[str],
+        patterns: MultiPattern,
+) -> list[BadFile]:
+    bad_files = []
+
+    for filename in filenames:
+        with Contents.open(filename) as contents:
+            for key_hidden in _hidden_keys(contents, patterns):
+                bad_files.append(BadFile(filename, key_hidden))
+    return bad_files
+
+
 def check_file_for_aws_keys(
         filenames: Sequence[str],
         keys: set[bytes],
@@ -75,23 +114,34 @@ def check_file_for_aws_keys(
     Return a list of all files containing AWS secrets and keys found, with all
     but the first four characters obfuscated to ease debugging.
     """
-    bad_files = []
+    if not keys:
+        return []
+    return _bad_files(filenames, MultiPattern(keys))
+
+
+def _check_file(filename: str, patterns: MultiPattern) -> int:
+    bad_files = _bad_files((filename,), patterns)
+    for bad_file in bad_files:
+        print(f'AWS secret found in {bad_file.filename}: {bad_file.key}')
+    return int(bool(bad_files))
 
-    for filename in filenames:
-        with open(filename, 'rb') as content:
-            text_body = content.read()
-            for key in keys:
-                # naively match the entire file, low chance of incorrect
-                # collision
-                if key in text_body:
-                    key_hidden = key.decode()[:4].ljust(28, '*')
-                    bad_files.append(BadFile(filename, key_hidden))
-    return bad_files
+
+def _check_lines(
+        filename: str,
+        numbered: NumberedLines,
+        patterns: MultiPattern,
+) -> int:
+    retv = 0
+    for i, line in numbered:
+        for key_hidden in _hidden_keys(line, patterns):
+            print(f'AWS secret found in {filename}:{i}: {key_hidden}')
+            retv = 1
+    return retv
 
 
 def main(argv: Sequence[str] | None = None) -> int:
     parser = argparse.ArgumentParser()
-    parser.add_argument('filenames', nargs='+', help='Filenames to run')
+    parser.add_argument('filenames', nargs='*', help='Filenames to run')
     parser.add_argument(
         '--credentials-file',
         dest='credentials_file',
@@ -110,7 +160,10 @@ def main(argv: Sequence[str] | None = None) -> int:
         action='store_true',
         help='Allow hook to pass when no credentials are detected.',
     )
-    args = parser.parse_args(argv)
+    add_execution_arguments(parser)
+    add_changed_lines_argument(parser)
+    add_files_from_arguments(parser, types=('text',))
+    args = parse_args(parser, argv, require_filenames=True)
 
     credential_files = set(args.credentials_file)
 
@@ -137,14 +190,15 @@ def main(argv: Sequence[str] | None = None) -> int:
         )
         return 2
 
-    keys_b = {key.encode() for key in keys}
-    bad_filenames = check_file_for_aws_keys(args.filenames, keys_b)
-    if bad_filenames:
-        for bad_file in bad_filenames:
-            print(f'AWS secret found in {bad_file.filename}: {bad_file.key}')
-        return 1
+    # built once, every file (or line) is scanned with it
+    patterns = MultiPattern(key.encode() for key in keys)
+    if args.only_changed_lines:
+        check_lines = functools.partial(_check_lines, patterns=patterns)
+        retvs = map_lines(check_lines, args.filenames, args)
     else:
-        return 0
+        check = functools.partial(_check_file, patterns=patterns)
+        retvs = map_files(check, args.filenames, args)
+    return int(any(retvs))
 
 
 if __name__ == '__main__':
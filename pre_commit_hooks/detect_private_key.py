@@ -3,6 +3,18 @@ from __future__ import annotations
 import argparse
 from typing import Sequence
 
+from pre_commit_hooks.util import add_changed_lines_argument
+from pre_commit_hooks.util import add_execution_arguments
+from pre_commit_hooks.util import add_files_from_arguments
+from pre_commit_hooks.util import add_read_ahead_argument
+from pre_commit_hooks.util import add_staged_argument
+from pre_commit_hooks.util import Contents
+from pre_commit_hooks.util import map_buffers
+from pre_commit_hooks.util import map_lines
+from pre_commit_hooks.util import MultiPattern
+from pre_commit_hooks.util import NumberedLines
+from pre_commit_hooks.util import parse_args
+
 BLACKLIST = [
     b'BEGIN RSA PRIVATE KEY',
     b'BEGIN DSA PRIVATE KEY',
@@ -15,28 +27,46 @@ BLACKLIST = [
     b'BEGIN ENCRYPTED PRIVATE KEY',
     b'BEGIN OpenVPN Static key V1',
 ]
+_BLACKLIST = MultiPattern(BLACKLIST)
 
 
-def main(argv: Sequence[str] | None = None) -> int:
-    parser = argparse.ArgumentParser()
-    parser.add_argument('filenames', nargs='*', help='Filenames to check')
-    args = parser.parse_args(argv)
+def has_private_key(content: bytes | Contents) -> bool:
+    data = content.data if isinstance(content, Contents) else content
+    return _BLACKLIST.search(data) is not None
 
-    private_key_files = []
 
-    for filename in args.filenames:
-        with open(filename, 'rb') as f:
-            content = f.read()
-            if any(line in content for line in BLACKLIST):
-                private_key_files.append(filename)
-
-    if private_key_files:
-        for private_key_file in private_key_files:
-            print(f'Private key found: {private_key_file}')
+def _check_contents(filename: str, content: Contents) -> int:
+    if has_private_key(content):
+        print(f'Private key found: {filename}')
         return 1
     else:
         return 0
 
 
+def _check_lines(filename: str, numbered: NumberedLines) -> int:
+    for i, line in numbered:
+        if has_private_key(line):
+            print(f'Private key found: {filename}:{i}')
+            return 1
+    return 0
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('filenames', nargs='*', help='Filenames to check')
+    add_execution_arguments(parser)
+    add_staged_argument(parser)
+    add_changed_lines_argument(parser)
+    add_read_ahead_argument(parser)
+    add_files_from_arguments(parser, types=('text',))
+    args = parse_args(parser, argv)
+
+    if args.only_changed_lines:
+        retvs = map_lines(_check_lines, args.filenames, args)
+    else:
+        retvs = map_buffers(_check_contents, args.filenames, args)
+    return int(any(retvs))
+
+
 if __name__ == '__main__':
     raise SystemExit(main())
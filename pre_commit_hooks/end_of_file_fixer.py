@@ -5,6 +5,11 @@ import os
 from typing import IO
 from typing import Sequence
 
+from pre_commit_hooks.util import add_execution_arguments
+from pre_commit_hooks.util import add_files_from_arguments
+from pre_commit_hooks.util import map_files
+from pre_commit_hooks.util import parse_args
+
 
 def fix_file(file_obj: IO[bytes]) -> int:
     # Test for newline at end of file
@@ -49,20 +54,26 @@ def fix_file(file_obj: IO[bytes]) -> int:
     return 0
 
 
+def _fix_filename(filename: str) -> int:
+    # Read as binary so we can read byte-by-byte
+    with open(filename, 'rb+') as file_obj:
+        ret_for_file = fix_file(file_obj)
+        if ret_for_file:
+            print(f'Fixing {filename}')
+        return ret_for_file
+
+
 def main(argv: Sequence[str] | None = None) -> int:
     parser = argparse.ArgumentParser()
     parser.add_argument('filenames', nargs='*', help='Filenames to fix')
-    args = parser.parse_args(argv)
+    add_execution_arguments(parser)
+    add_files_from_arguments(parser, types=('text',))
+    args = parse_args(parser, argv)
 
     retv = 0
 
-    for filename in args.filenames:
-        # Read as binary so we can read byte-by-byte
-        with open(filename, 'rb+') as file_obj:
-            ret_for_file = fix_file(file_obj)
-            if ret_for_file:
-                print(f'Fixing {filename}')
-            retv |= ret_for_file
+    for ret_for_file in map_files(_fix_filename, args.filenames, args):
+        retv |= ret_for_file
 
     return retv
 
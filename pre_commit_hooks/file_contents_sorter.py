@@ -12,12 +12,18 @@ conflicts and keep the file nicely ordered.
 from __future__ import annotations
 
 import argparse
+import functools
 from typing import Any
 from typing import Callable
 from typing import IO
 from typing import Iterable
 from typing import Sequence
 
+from pre_commit_hooks.util import add_execution_arguments
+from pre_commit_hooks.util import add_files_from_arguments
+from pre_commit_hooks.util import map_files
+from pre_commit_hooks.util import parse_args
+
 PASS = 0
 FAIL = 1
 
@@ -28,29 +34,44 @@ def sort_file_contents(
     *,
     unique: bool = False,
 ) -> int:
-    before = list(f)
+    # only the sorted lines are held in memory, the file is compared with
+    # them a line at a time
     lines: Iterable[bytes] = (
-        line.rstrip(b'\n\r') for line in before if line.strip()
+        line.rstrip(b'\n\r') for line in f if line.strip()
     )
     if unique:
         lines = set(lines)
-    after = sorted(lines, key=key)
-
-    before_string = b''.join(before)
-    after_string = b'\n'.join(after) + b'\n'
+    # an empty file is sorted to a single newline
+    after = sorted(lines, key=key) or [b'']
 
-    if before_string == after_string:
+    f.seek(0)
+    if all(f.readline() == line + b'\n' for line in after) and not f.read(1):
         return PASS
     else:
         f.seek(0)
-        f.write(after_string)
+        f.writelines(line + b'\n' for line in after)
         f.truncate()
         return FAIL
 
 
+def _sort_filename(
+    filename: str,
+    key: Callable[[bytes], Any] | None,
+    *,
+    unique: bool = False,
+) -> int:
+    with open(filename, 'rb+') as file_obj:
+        ret_for_file = sort_file_contents(file_obj, key=key, unique=unique)
+
+    if ret_for_file:
+        print(f'Sorting {filename}')
+
+    return ret_for_file
+
+
 def main(argv: Sequence[str] | None = None) -> int:
     parser = argparse.ArgumentParser()
-    parser.add_argument('filenames', nargs='+', help='Files to sort')
+    parser.add_argument('filenames', nargs='*', help='Files to sort')
     parser.add_argument(
         '--ignore-case',
         action='store_const',
@@ -63,20 +84,17 @@ def main(argv: Sequence[str] | None = None) -> int:
         action='store_true',
         help='ensure each line is unique',
     )
-    args = parser.parse_args(argv)
+    add_execution_arguments(parser)
+    add_files_from_arguments(parser, files='^$')
+    args = parse_args(parser, argv, require_filenames=True)
 
     retv = PASS
 
-    for arg in args.filenames:
-        with open(arg, 'rb+') as file_obj:
-            ret_for_file = sort_file_contents(
-                file_obj, key=args.ignore_case, unique=args.unique,
-            )
-
-            if ret_for_file:
-                print(f'Sorting {arg}')
-
-            retv |= ret_for_file
+    sort = functools.partial(
+        _sort_filename, key=args.ignore_case, unique=args.unique,
+    )
+    for ret_for_file in map_files(sort, args.filenames, args):
+        retv |= ret_for_file
 
     return retv
 
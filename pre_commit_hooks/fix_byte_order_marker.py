@@ -3,26 +3,40 @@ from __future__ import annotations
 import argparse
 from typing import Sequence
 
+from pre_commit_hooks.util import add_execution_arguments
+from pre_commit_hooks.util import add_files_from_arguments
+from pre_commit_hooks.util import map_files
+from pre_commit_hooks.util import parse_args
+from pre_commit_hooks.util import write_changes
+
+
+def _fix_file(filename: str) -> int:
+    with open(filename, 'rb') as f_b:
+        bts = f_b.read(3)
+
+    if bts == b'\xef\xbb\xbf':
+        with open(filename, 'rb') as f_b:
+            contents = f_b.read()
+        # everything moves, so this is always a whole new file
+        write_changes(filename, contents, contents[3:], atomic=True)
+
+        print(f'{filename}: removed byte-order marker')
+        return 1
+    else:
+        return 0
+
 
 def main(argv: Sequence[str] | None = None) -> int:
     parser = argparse.ArgumentParser()
     parser.add_argument('filenames', nargs='*', help='Filenames to check')
-    args = parser.parse_args(argv)
+    add_execution_arguments(parser)
+    add_files_from_arguments(parser, types=('text',))
+    args = parse_args(parser, argv)
 
     retv = 0
 
-    for filename in args.filenames:
-        with open(filename, 'rb') as f_b:
-            bts = f_b.read(3)
-
-        if bts == b'\xef\xbb\xbf':
-            with open(filename, newline='', encoding='utf-8-sig') as f:
-                contents = f.read()
-            with open(filename, 'w', newline='', encoding='utf-8') as f:
-                f.write(contents)
-
-            print(f'{filename}: removed byte-order marker')
-            retv = 1
+    for ret in map_files(_fix_file, args.filenames, args):
+        retv |= ret
 
     return retv
 
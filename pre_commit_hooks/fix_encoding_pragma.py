@@ -1,10 +1,17 @@
 from __future__ import annotations
 
 import argparse
+import functools
 from typing import IO
 from typing import NamedTuple
 from typing import Sequence
 
+from pre_commit_hooks.util import add_execution_arguments
+from pre_commit_hooks.util import add_files_from_arguments
+from pre_commit_hooks.util import map_files
+from pre_commit_hooks.util import parse_args
+from pre_commit_hooks.util import rewrite
+
 DEFAULT_PRAGMA = b'# -*- coding: utf-8 -*-'
 
 
@@ -73,17 +80,17 @@ def fix_encoding_pragma(
         remove: bool = False,
         expected_pragma: bytes = DEFAULT_PRAGMA,
 ) -> int:
+    first_line, second_line, rest = f.readline(), f.readline(), f.read()
+    contents = first_line + second_line + rest
     expected = _get_expected_contents(
-        f.readline(), f.readline(), f.read(), expected_pragma,
+        first_line, second_line, rest, expected_pragma,
     )
 
     # Special cases for empty files
     if not expected.rest.strip():
         # If a file only has a shebang or a coding pragma, remove it
         if expected.has_any_pragma or expected.shebang:
-            f.seek(0)
-            f.truncate()
-            f.write(b'')
+            rewrite(f, contents, b'')
             return 1
         else:
             return 0
@@ -92,12 +99,8 @@ def fix_encoding_pragma(
         return 0
 
     # Otherwise, write out the new file
-    f.seek(0)
-    f.truncate()
-    f.write(expected.shebang)
-    if not remove:
-        f.write(expected_pragma + expected.ending)
-    f.write(expected.rest)
+    pragma = b'' if remove else expected_pragma + expected.ending
+    rewrite(f, contents, expected.shebang + pragma + expected.rest)
 
     return 1
 
@@ -106,6 +109,23 @@ def _normalize_pragma(pragma: str) -> bytes:
     return pragma.encode().rstrip()
 
 
+def _fix_filename(
+        filename: str,
+        remove: bool,
+        expected_pragma: bytes,
+) -> int:
+    with open(filename, 'r+b') as f:
+        file_ret = fix_encoding_pragma(
+            f, remove=remove, expected_pragma=expected_pragma,
+        )
+    if file_ret:
+        if remove:
+            print(f'Removed encoding pragma from {filename}')
+        else:
+            print(f'Added `{expected_pragma.decode()}` to {filename}')
+    return file_ret
+
+
 def main(argv: Sequence[str] | None = None) -> int:
     parser = argparse.ArgumentParser(
         'Fixes the encoding pragma of python files',
@@ -122,25 +142,17 @@ def main(argv: Sequence[str] | None = None) -> int:
         '--remove', action='store_true',
         help='Remove the encoding pragma (Useful in a python3-only codebase)',
     )
-    args = parser.parse_args(argv)
+    add_execution_arguments(parser)
+    add_files_from_arguments(parser, types=('python',))
+    args = parse_args(parser, argv)
 
     retv = 0
 
-    if args.remove:
-        fmt = 'Removed encoding pragma from {filename}'
-    else:
-        fmt = 'Added `{pragma}` to {filename}'
-
-    for filename in args.filenames:
-        with open(filename, 'r+b') as f:
-            file_ret = fix_encoding_pragma(
-                f, remove=args.remove, expected_pragma=args.pragma,
-            )
-            retv |= file_ret
-            if file_ret:
-                print(
-                    fmt.format(pragma=args.pragma.decode(), filename=filename),
-                )
+    fix = functools.partial(
+        _fix_filename, remove=args.remove, expected_pragma=args.pragma,
+    )
+    for file_ret in map_files(fix, args.filenames, args):
+        retv |= file_ret
 
     return retv
 
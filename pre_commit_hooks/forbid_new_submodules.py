@@ -4,13 +4,18 @@ import argparse
 import os
 from typing import Sequence
 
+from pre_commit_hooks.git_index import ls_files
+from pre_commit_hooks.git_index import MODE_GITLINK
+from pre_commit_hooks.util import add_files_from_arguments
 from pre_commit_hooks.util import cmd_output
+from pre_commit_hooks.util import parse_args
 
 
 def main(argv: Sequence[str] | None = None) -> int:
     parser = argparse.ArgumentParser()
     parser.add_argument('filenames', nargs='*')
-    args = parser.parse_args(argv)
+    add_files_from_arguments(parser, types=('directory',))
+    args = parse_args(parser, argv)
 
     if (
         'PRE_COMMIT_FROM_REF' in os.environ and
@@ -22,6 +27,12 @@ def main(argv: Sequence[str] | None = None) -> int:
         ))
     else:
         diff_arg = '--staged'
+        # only a submodule in the index can be a newly staged one
+        if not any(
+                entry.mode == MODE_GITLINK
+                for entry in ls_files(args.filenames)
+        ):
+            return 0
     added_diff = cmd_output(
         'git', 'diff', '--diff-filter=A', '--raw', diff_arg, '--',
         *args.filenames,
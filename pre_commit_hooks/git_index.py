@@ -0,0 +1,213 @@
+"""List the git index by reading `.git/index` directly.
+
+Versions 2, 3 and 4 (prefix compressed paths) of the index format are read
+from a memory-mapped file, extensions are skipped.  `ls_files` falls back to
+`git ls-files` for what this can't read: split and sparse indexes, or when
+not run from the top of the work tree.
+"""
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+from typing import Generator
+from typing import NamedTuple
+from typing import Sequence
+
+from pre_commit_hooks import git_repo
+from pre_commit_hooks.util import CalledProcessError
+from pre_commit_hooks.util import cmd_output
+from pre_commit_hooks.util import memoize_git
+from pre_commit_hooks.util import zsplit
+
+_HEADER = struct.Struct('>4sII')
+# skipping ctime, mtime (seconds, nanoseconds), dev and ino, then mode,
+# skipping uid and gid, then size.  The object id and flags follow.
+_STAT_FORMAT = '>24xI8xI'
+_FLAGS = struct.Struct('>H')
+_EXTENDED = 0x4000
+_STAGE_SHIFT = 12
+
+MODE_GITLINK = 0o160000
+_MODE_SPARSE_DIR = 0o040000
+
+_TRUE = frozenset(('', 'true', 'yes', 'on', '1'))
+
+
+class UnsupportedIndex(ValueError):
+    pass
+
+
+class IndexEntry(NamedTuple):
+    path: str
+    mode: int
+    # the work tree file's size when it was last refreshed, `None` when
+    # listed through `git ls-files`
+    size: int | None
+    oid: str
+    stage: int
+
+
+def _varint(data: mmap.mmap | bytes, pos: int) -> tuple[int, int]:
+    # git's "offset" varint, each continuation also adds one
+    c = data[pos]
+    pos += 1
+    value = c & 0x7f
+    while c & 0x80:
+        c = data[pos]
+        pos += 1
+        value = ((value + 1) << 7) | (c & 0x7f)
+    return value, pos
+
+
+def _entries(
+        data: mmap.mmap,
+        version: int,
+        count: int,
+        hash_size: int,
+) -> Generator[IndexEntry, None, None]:
+    # a single `unpack_from` per entry
+    entry_struct = struct.Struct(f'{_STAT_FORMAT}{hash_size}sH')
+    unpack_from = entry_struct.unpack_from
+    find = data.find
+    new_entry = tuple.__new__
+    pos = _HEADER.size
+    path = b''
+    # closed once all the entries have been read (or the reader is)
+    with data:
+        for _ in range(count):
+            start = pos
+            mode, size, oid, flags = unpack_from(data, start)
+            if mode == _MODE_SPARSE_DIR:
+                raise UnsupportedIndex('sparse index')
+            pos = start + entry_struct.size
+            if flags & _EXTENDED:
+                pos += _FLAGS.size
+
+            if version == 4:
+                strip, pos = _varint(data, pos)
+                end = find(b'\0', pos)
+                path = path[:len(path) - strip] + data[pos:end]
+                pos = end + 1
+            else:
+                end = find(b'\0', pos)
+                path = data[pos:end]
+                # padded with 1-8 NULs to a multiple of 8 bytes
+                pos = start + ((end - start + 8) & ~7)
+            if end == -1:
+                raise UnsupportedIndex('truncated index')
+
+            yield new_entry(IndexEntry, (
+                path.decode('UTF-8', 'surrogateescape'),
+                mode,
+                size,
+                oid.hex(),
+                (flags >> _STAGE_SHIFT) & 0x3,
+            ))
+
+
+def read_index(
+        filename: str,
+        *,
+        hash_size: int = 20,
+) -> Generator[IndexEntry, None, None]:
+    """The entries of the index file `filename`, in index (path) order.
+
+    The header is checked before this returns, raising `UnsupportedIndex`.
+    """
+    with open(filename, 'rb') as f:
+        if os.fstat(f.fileno()).st_size < _HEADER.size:
+            raise UnsupportedIndex(f'{filename}: truncated index')
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        signature, version, count = _HEADER.unpack_from(data)
+        if signature != b'DIRC' or version not in (2, 3, 4):
+            raise UnsupportedIndex(f'{filename}: unsupported index')
+    except BaseException:
+        data.close()
+        raise
+
+    return _entries(data, version, count, hash_size)
+
+
+def _native_index() -> tuple[str, int] | None:
+    """The index file and hash size, if the index can be read here"""
+    if 'GIT_DIR' in os.environ or 'GIT_WORK_TREE' in os.environ:
+        return None
+    # `git ls-files` paths are relative to the current directory
+    elif not os.path.lexists('.git'):
+        return None
+
+    try:
+        gitdir = git_repo.git_dir()
+    except CalledProcessError:
+        return None
+    config = git_repo.repo_config(gitdir)
+    if (
+            config is None or
+            config.get('index.sparse', 'false').lower() in _TRUE or
+            config.get('core.splitindex', 'false').lower() in _TRUE or
+            any(name.startswith('sharedindex.') for name in os.listdir(gitdir))
+    ):
+        return None
+
+    hash_size = 32 if config.get('extensions.objectformat') == 'sha256' else 20
+    index = os.environ.get('GIT_INDEX_FILE', os.path.join(gitdir, 'index'))
+    return index, hash_size
+
+
+def _git_ls_files(paths: Sequence[str]) -> Generator[IndexEntry, None, None]:
+    outs = cmd_output('git', 'ls-files', '-z', '--stage', '--', *paths)
+    for out in zsplit(outs):
+        metadata, path = out.split('\t', 1)
+        mode, oid, stage = metadata.split()
+        yield IndexEntry(path, int(mode, 8), None, oid, int(stage))
+
+
+def ls_files(paths: Sequence[str] = ()) -> tuple[IndexEntry, ...]:
+    """Like `git ls-files --stage -- paths`, but reading the index directly
+    where possible.
+
+    `paths` are matched as files or directories, not as glob patterns.  The
+    listing is reused until the index changes.
+    """
+    return _ls_files(tuple(paths))
+
+
+@memoize_git
+def _ls_files(paths: tuple[str, ...]) -> tuple[IndexEntry, ...]:
+    return tuple(iter_ls_files(paths))
+
+
+@memoize_git
+def ls_paths() -> frozenset[str]:
+    """The paths in the index, reused until the index changes.  Only the
+    paths are kept, not the whole listing."""
+    return frozenset(entry.path for entry in iter_ls_files())
+
+
+def iter_ls_files(
+        paths: Sequence[str] = (),
+) -> Generator[IndexEntry, None, None]:
+    """`ls_files`, but each entry as it is read and without keeping them"""
+    entries = None
+    native = _native_index()
+    if native is not None:
+        try:
+            entries = read_index(native[0], hash_size=native[1])
+        except (OSError, UnsupportedIndex):
+            entries = None
+    if entries is None:
+        yield from _git_ls_files(paths)
+        return
+
+    if not paths:
+        yield from entries
+        return
+
+    # index paths are relative to the top of the work tree and `/` separated
+    normalized = {os.path.relpath(p).replace(os.sep, '/') for p in paths}
+    dirs = tuple(f'{path}/' for path in normalized if os.path.isdir(path))
+    for entry in entries:
+        if entry.path in normalized or entry.path.startswith(dirs):
+            yield entry
@@ -0,0 +1,261 @@
+"""Read repository state straight from the git directory.
+
+Finding the git directory, reading HEAD, checking for an in-progress merge
+and looking up config values each used to cost a `git` subprocess.  These
+read the files directly instead and only run `git` for what they can't
+handle here: ceiling directories, crossing a filesystem boundary, config
+includes / overrides, values only set outside the repository's own config
+and non-file ref storage.
+"""
+from __future__ import annotations
+
+import os
+import re
+from typing import Iterator
+
+from pre_commit_hooks.util import CalledProcessError
+from pre_commit_hooks.util import cmd_output
+from pre_commit_hooks.util import memoize_git
+
+# environment which changes how git finds or configures the repository
+_DISCOVERY_ENV = ('GIT_CEILING_DIRECTORIES', 'GIT_DISCOVERY_ACROSS_FILESYSTEM')
+_CONFIG_ENV = ('GIT_CONFIG', 'GIT_CONFIG_COUNT', 'GIT_CONFIG_PARAMETERS')
+
+# the stub HEAD of a repository using the reftable backend
+_REFTABLE_HEAD = 'ref: refs/heads/.invalid'
+_OID_RE = re.compile('[0-9a-f]{40}|[0-9a-f]{64}')
+
+_SECTION_RE = re.compile(
+    r'\[\s*([A-Za-z0-9.-]+)(?:\s+"((?:[^"\\]|\\.)*)")?\s*\]',
+)
+_UNESCAPE_RE = re.compile(r'\\(.)')
+_NAME_RE = re.compile(r'([A-Za-z][A-Za-z0-9-]*)\s*(=?)\s*')
+_ESCAPES = {'n': '\n', 't': '\t', 'b': '\b', '"': '"', '\\': '\\'}
+
+# `(directories, GIT_DIR, discovery environment)` -> git directory
+_git_dirs: dict[tuple[str | None, ...], str] = {}
+
+
+def _rev_parse_git_dir() -> str:
+    return cmd_output('git', 'rev-parse', '--absolute-git-dir').rstrip('\n')
+
+
+def _gitdir_file(dot_git: str) -> str:
+    with open(dot_git, encoding='UTF-8') as f:
+        contents = f.read()
+    if not contents.startswith('gitdir: '):
+        raise ValueError(f'{dot_git}: not a gitdir file')
+    path = contents[len('gitdir: '):].rstrip('\r\n')
+    return os.path.normpath(os.path.join(os.path.dirname(dot_git), path))
+
+
+def _discover(cwd: str) -> str | None:
+    path = os.path.abspath(cwd)
+    dev = os.stat(path).st_dev
+    while True:
+        dot_git = os.path.join(path, '.git')
+        if os.path.isdir(dot_git):
+            return dot_git
+        elif os.path.isfile(dot_git):  # worktrees and submodules
+            return _gitdir_file(dot_git)
+        elif os.path.exists(os.path.join(path, 'HEAD')):
+            return None  # possibly inside a git directory itself
+        parent = os.path.dirname(path)
+        if parent == path or os.stat(parent).st_dev != dev:
+            return None
+        path = parent
+
+
+def git_dir(cwd: str = '.') -> str:
+    """The absolute path to the git directory, like `git rev-parse`.
+
+    Raises `CalledProcessError` outside of a repository.  The result is
+    reused for the rest of the process.
+    """
+    key = (
+        os.getcwd(),
+        cwd,
+        *(os.environ.get(var) for var in ('GIT_DIR', *_DISCOVERY_ENV)),
+    )
+    try:
+        return _git_dirs[key]
+    except KeyError:
+        ret = _git_dirs[key] = _find_git_dir(cwd)
+        return ret
+
+
+def _find_git_dir(cwd: str) -> str:
+    if 'GIT_DIR' in os.environ:
+        return os.path.abspath(os.environ['GIT_DIR'])
+    elif any(var in os.environ for var in _DISCOVERY_ENV):
+        return _rev_parse_git_dir()
+
+    try:
+        path = _discover(cwd)
+    except (OSError, ValueError):
+        path = None
+    return path if path is not None else _rev_parse_git_dir()
+
+
+def common_dir(gitdir: str) -> str:
+    """Where the config and shared refs are, differs from `gitdir` in a
+    linked worktree"""
+    if 'GIT_COMMON_DIR' in os.environ:
+        return os.path.abspath(os.environ['GIT_COMMON_DIR'])
+    try:
+        with open(os.path.join(gitdir, 'commondir'), encoding='UTF-8') as f:
+            path = f.read().rstrip('\r\n')
+    except OSError:
+        return gitdir
+    return os.path.normpath(os.path.join(gitdir, path))
+
+
+@memoize_git
+def head_ref(gitdir: str) -> str | None:
+    """The ref HEAD points at (`refs/heads/...`), `None` when detached"""
+    try:
+        with open(os.path.join(gitdir, 'HEAD'), encoding='UTF-8') as f:
+            head = f.read().strip()
+    except (OSError, ValueError):
+        head = ''
+
+    if head.startswith('ref: ') and head != _REFTABLE_HEAD:
+        return head[len('ref: '):]
+    elif _OID_RE.fullmatch(head):
+        return None
+
+    # reftable, or something else only git knows how to read
+    ref = cmd_output('git', 'symbolic-ref', '-q', 'HEAD', retcode=None)
+    return ref.strip() or None
+
+
+def is_merging(gitdir: str) -> bool:
+    """Whether a merge (or a rebase with conflicts) is in progress"""
+    return (
+        os.path.exists(os.path.join(gitdir, 'MERGE_MSG')) and
+        (
+            os.path.exists(os.path.join(gitdir, 'MERGE_HEAD')) or
+            os.path.exists(os.path.join(gitdir, 'rebase-apply')) or
+            os.path.exists(os.path.join(gitdir, 'rebase-merge'))
+        )
+    )
+
+
+def _value(s: str, lines: Iterator[str]) -> str:
+    chars: list[str] = []
+    # quoted / escaped characters aren't trimmed from the end
+    literal = 0
+    quoted = False
+    i = 0
+    while True:
+        if i == len(s):
+            if quoted:
+                raise ValueError('unterminated quote')
+            break
+        c = s[i]
+        if c == '\\':
+            if i + 1 == len(s):  # continued on the next line
+                s, i = next(lines, ''), 0
+                continue
+            chars.append(_ESCAPES[s[i + 1]])
+            literal = len(chars)
+            i += 2
+            continue
+        elif c == '"':
+            quoted = not quoted
+        elif quoted:
+            chars.append(c)
+            literal = len(chars)
+        elif c in '#;':
+            break
+        else:
+            chars.append(c)
+        i += 1
+    value = ''.join(chars)
+    return value[:literal] + value[literal:].rstrip()
+
+
+def parse_config(contents: str) -> dict[str, str]:
+    """The last value of each key of a config file, keyed as
+    `section[.subsection].name` with the section and name lowercased.
+
+    Raises `ValueError` (or `KeyError` for an unknown escape) for what this
+    doesn't understand.
+    """
+    ret: dict[str, str] = {}
+    section: str | None = None
+    lines = iter(contents.splitlines())
+    for line in lines:
+        line = line.strip()
+        if not line or line[0] in '#;':
+            continue
+        elif line.startswith('['):
+            match = _SECTION_RE.match(line)
+            rest = line[match.end():].strip() if match else None
+            if match is None or (rest and rest[0] not in '#;'):
+                raise ValueError(f'unsupported section: {line}')
+            name, sub = match.groups()
+            if sub is None:
+                section = name.lower()
+            else:
+                sub = _UNESCAPE_RE.sub(r'\1', sub)
+                section = f'{name.lower()}.{sub}'
+            continue
+
+        match = _NAME_RE.match(line)
+        if section is None or match is None:
+            raise ValueError(f'unsupported line: {line}')
+        key = f'{section}.{match[1].lower()}'
+        if match[2]:
+            ret[key] = _value(line[match.end():], lines)
+        elif line[match.end():][:1] in ('', '#', ';'):
+            ret[key] = ''  # a bare boolean, `git config` prints it as empty
+        else:
+            raise ValueError(f'unsupported line: {line}')
+    return ret
+
+
+def _normalize_key(key: str) -> str:
+    section, _, rest = key.partition('.')
+    sub, _, name = rest.rpartition('.')
+    if sub:
+        return f'{section.lower()}.{sub}.{name.lower()}'
+    else:
+        return f'{section.lower()}.{name.lower()}'
+
+
+def repo_config(gitdir: str) -> dict[str, str] | None:
+    """The repository's own config, `None` if it can't be relied on"""
+    if any(var in os.environ for var in _CONFIG_ENV):
+        return None
+    try:
+        path = os.path.join(common_dir(gitdir), 'config')
+        with open(path, encoding='UTF-8') as f:
+            config = parse_config(f.read())
+    except (OSError, KeyError, ValueError):
+        return None
+    if any(
+            key.startswith(('include.', 'includeif.')) or
+            key == 'extensions.worktreeconfig'
+            for key in config
+    ):
+        return None
+    return config
+
+
+@memoize_git
+def config_value(key: str, gitdir: str | None = None) -> str | None:
+    """The value of a config key, like `git config --get key`"""
+    try:
+        gitdir = gitdir if gitdir is not None else git_dir()
+    except CalledProcessError:
+        config = None
+    else:
+        config = repo_config(gitdir)
+
+    # the repository's config takes precedence over the global / system ones
+    if config is not None and _normalize_key(key) in config:
+        return config[_normalize_key(key)]
+
+    out = cmd_output('git', 'config', '--get', key, retcode=None)
+    return out[:-1] if out else None
@@ -2,8 +2,21 @@ from __future__ import annotations
 
 import argparse
 import collections
+import functools
+import os
+from typing import Counter
 from typing import Sequence
 
+from pre_commit_hooks import util
+from pre_commit_hooks.util import add_execution_arguments
+from pre_commit_hooks.util import add_files_from_arguments
+from pre_commit_hooks.util import line_chunks
+from pre_commit_hooks.util import map_files
+from pre_commit_hooks.util import map_ranges
+from pre_commit_hooks.util import parse_args
+from pre_commit_hooks.util import stream_fix
+from pre_commit_hooks.util import write_changes
+
 
 CRLF = b'\r\n'
 LF = b'\n'
@@ -13,31 +26,27 @@ ALL_ENDINGS = (CR, CRLF, LF)
 FIX_TO_LINE_ENDING = {'cr': CR, 'crlf': CRLF, 'lf': LF}
 
 
-def _fix(filename: str, contents: bytes, ending: bytes) -> None:
-    new_contents = b''.join(
+def _fix(contents: bytes, ending: bytes) -> bytes:
+    return b''.join(
         line.rstrip(b'\r\n') + ending for line in contents.splitlines(True)
     )
-    with open(filename, 'wb') as f:
-        f.write(new_contents)
-
 
-def fix_filename(filename: str, fix: str) -> int:
-    with open(filename, 'rb') as f:
-        contents = f.read()
 
-    counts: dict[bytes, int] = collections.defaultdict(int)
+def _count_endings(contents: bytes, counts: Counter[bytes]) -> None:
+    # `contents` is whole lines, so no `\r\n` is split between calls
+    crlf = contents.count(CRLF)
+    counts[CRLF] += crlf
+    counts[LF] += contents.count(LF) - crlf
+    counts[CR] += contents.count(CR) - crlf
 
-    for line in contents.splitlines(True):
-        for ending in ALL_ENDINGS:
-            if line.endswith(ending):
-                counts[ending] += 1
-                break
 
+def _target_ending(counts: Counter[bytes], fix: str) -> tuple[int, bytes]:
+    """The return value and the line ending to fix to (empty for none)"""
     # Some amount of mixed line endings
     mixed = sum(bool(x) for x in counts.values()) > 1
 
     if fix == 'no' or (fix == 'auto' and not mixed):
-        return mixed
+        return mixed, b''
 
     if fix == 'auto':
         max_ending = LF
@@ -49,38 +58,118 @@ def fix_filename(filename: str, fix: str) -> int:
                 max_ending = ending_type
                 max_lines = counts[ending_type]
 
-        _fix(filename, contents, max_ending)
-        return 1
+        return 1, max_ending
     else:
         target_ending = FIX_TO_LINE_ENDING[fix]
         # find if there are lines with *other* endings
         # It's possible there's no line endings of the target type
         counts.pop(target_ending, None)
         other_endings = bool(sum(counts.values()))
-        if other_endings:
-            _fix(filename, contents, target_ending)
-        return other_endings
+        return other_endings, target_ending if other_endings else b''
 
 
-def main(argv: Sequence[str] | None = None) -> int:
-    parser = argparse.ArgumentParser()
+def _count_range(
+        filename: str,
+        start: int,
+        end: int | None,
+) -> Counter[bytes]:
+    counts: Counter[bytes] = collections.Counter()
+    with open(filename, 'rb') as f:
+        f.seek(start)
+        for chunk in line_chunks(f, cr=True, end=end):
+            _count_endings(chunk, counts)
+    return counts
+
+
+def _is_large(filename: str) -> bool:
+    # as `map_ranges` splits them
+    return os.path.getsize(filename) > util.SPLIT_SIZE
+
+
+def fix_contents(contents: bytes, fix: str) -> tuple[int, bytes]:
+    counts: Counter[bytes] = collections.Counter()
+    _count_endings(contents, counts)
+
+    retv, ending = _target_ending(counts, fix)
+    if ending:
+        return retv, _fix(contents, ending)
+    else:
+        return retv, contents
+
+
+def fix_filename(
+        filename: str,
+        fix: str,
+        counts: Counter[bytes] | None = None,
+) -> int:
+    """Fix the line endings of `filename` as `--fix` says, returning nonzero
+    if they weren't all the same (or all the `fix` one).
+
+    A small file is read once, counted and fixed in memory.  A large one is
+    counted (unless its `counts` are given, see `main`) then fixed a chunk at
+    a time.
+    """
+    if counts is None:
+        if not _is_large(filename):
+            with open(filename, 'rb') as f:
+                contents = f.read()
+            retv, new_contents = fix_contents(contents, fix)
+            if new_contents != contents:
+                write_changes(filename, contents, new_contents)
+            return retv
+        counts = _count_range(filename, 0, None)
+
+    retv, ending = _target_ending(counts, fix)
+    if ending:
+        stream_fix(filename, functools.partial(_fix, ending=ending), cr=True)
+    return retv
+
+
+def _fix_and_report(
+        filename: str,
+        fix: str,
+        counts: dict[str, Counter[bytes]],
+) -> int:
+    if fix_filename(filename, fix, counts.get(filename)):
+        if fix == 'no':
+            print(f'{filename}: mixed line endings')
+        else:
+            print(f'{filename}: fixed mixed line endings')
+        return 1
+    else:
+        return 0
+
+
+def _add_fix_argument(parser: argparse.ArgumentParser) -> None:
     parser.add_argument(
         '-f', '--fix',
         choices=('auto', 'no') + tuple(FIX_TO_LINE_ENDING),
         default='auto',
         help='Replace line ending with the specified. Default is "auto"',
     )
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser()
+    _add_fix_argument(parser)
     parser.add_argument('filenames', nargs='*', help='Filenames to fix')
-    args = parser.parse_args(argv)
+    add_execution_arguments(parser)
+    add_files_from_arguments(parser, types=('text',))
+    args = parse_args(parser, argv)
+
+    # large files are counted a range at a time, split over the jobs
+    large = [filename for filename in args.filenames if _is_large(filename)]
+    counts = {
+        filename: sum(file_counts, collections.Counter())
+        for filename, file_counts in zip(
+            large, map_ranges(_count_range, large, args),
+        )
+    }
 
     retv = 0
-    for filename in args.filenames:
-        if fix_filename(filename, args.fix):
-            if args.fix == 'no':
-                print(f'{filename}: mixed line endings')
-            else:
-                print(f'{filename}: fixed mixed line endings')
-            retv = 1
+    fix = functools.partial(_fix_and_report, fix=args.fix, counts=counts)
+    for ret in map_files(fix, args.filenames, args):
+        retv |= ret
     return retv
 
 
@@ -5,8 +5,9 @@ import re
 from typing import AbstractSet
 from typing import Sequence
 
+from pre_commit_hooks.git_repo import git_dir
+from pre_commit_hooks.git_repo import head_ref
 from pre_commit_hooks.util import CalledProcessError
-from pre_commit_hooks.util import cmd_output
 
 
 def is_on_branch(
@@ -14,10 +15,12 @@ def is_on_branch(
         patterns: AbstractSet[str] = frozenset(),
 ) -> bool:
     try:
-        ref_name = cmd_output('git', 'symbolic-ref', 'HEAD')
+        ref_name = head_ref(git_dir())
     except CalledProcessError:
         return False
-    chunks = ref_name.strip().split('/')
+    if ref_name is None:  # detached
+        return False
+    chunks = ref_name.split('/')
     branch_name = '/'.join(chunks[2:])
     return branch_name in protected or any(
         re.match(p, branch_name) for p in patterns
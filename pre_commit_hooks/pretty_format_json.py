@@ -1,12 +1,17 @@
 from __future__ import annotations
 
 import argparse
+import functools
 import json
 import sys
-from difflib import unified_diff
 from typing import Mapping
 from typing import Sequence
 
+from pre_commit_hooks.util import add_execution_arguments
+from pre_commit_hooks.util import add_files_from_arguments
+from pre_commit_hooks.util import map_files
+from pre_commit_hooks.util import parse_args
+
 
 def _get_pretty_format(
         contents: str,
@@ -49,12 +54,49 @@ def parse_topkeys(s: str) -> list[str]:
 
 
 def get_diff(source: str, target: str, file: str) -> str:
+    from difflib import unified_diff
+
     source_lines = source.splitlines(True)
     target_lines = target.splitlines(True)
     diff = unified_diff(source_lines, target_lines, fromfile=file, tofile=file)
     return ''.join(diff)
 
 
+def _format_file(
+        json_file: str,
+        indent: str,
+        ensure_ascii: bool,
+        sort_keys: bool,
+        top_keys: Sequence[str],
+        autofix: bool,
+) -> int:
+    with open(json_file, encoding='UTF-8') as f:
+        contents = f.read()
+
+    try:
+        pretty_contents = _get_pretty_format(
+            contents, indent, ensure_ascii=ensure_ascii,
+            sort_keys=sort_keys, top_keys=top_keys,
+        )
+    except ValueError:
+        print(
+            f'Input File {json_file} is not a valid JSON, consider using '
+            f'check-json',
+        )
+        return 1
+
+    if contents != pretty_contents:
+        if autofix:
+            _autofix(json_file, pretty_contents)
+        else:
+            diff_output = get_diff(contents, pretty_contents, json_file)
+            sys.stdout.buffer.write(diff_output.encode())
+
+        return 1
+    else:
+        return 0
+
+
 def main(argv: Sequence[str] | None = None) -> int:
     parser = argparse.ArgumentParser()
     parser.add_argument(
@@ -97,34 +139,22 @@ def main(argv: Sequence[str] | None = None) -> int:
         help='Ordered list of keys to keep at the top of JSON hashes',
     )
     parser.add_argument('filenames', nargs='*', help='Filenames to fix')
-    args = parser.parse_args(argv)
+    add_execution_arguments(parser)
+    add_files_from_arguments(parser, types=('json',))
+    args = parse_args(parser, argv)
 
     status = 0
 
-    for json_file in args.filenames:
-        with open(json_file, encoding='UTF-8') as f:
-            contents = f.read()
-
-        try:
-            pretty_contents = _get_pretty_format(
-                contents, args.indent, ensure_ascii=not args.no_ensure_ascii,
-                sort_keys=not args.no_sort_keys, top_keys=args.top_keys,
-            )
-        except ValueError:
-            print(
-                f'Input File {json_file} is not a valid JSON, consider using '
-                f'check-json',
-            )
-            return 1
-
-        if contents != pretty_contents:
-            if args.autofix:
-                _autofix(json_file, pretty_contents)
-            else:
-                diff_output = get_diff(contents, pretty_contents, json_file)
-                sys.stdout.buffer.write(diff_output.encode())
-
-            status = 1
+    format_file = functools.partial(
+        _format_file,
+        indent=args.indent,
+        ensure_ascii=not args.no_ensure_ascii,
+        sort_keys=not args.no_sort_keys,
+        top_keys=args.top_keys,
+        autofix=args.autofix,
+    )
+    for ret in map_files(format_file, args.filenames, args):
+        status |= ret
 
     return status
 
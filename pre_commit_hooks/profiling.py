@@ -0,0 +1,323 @@
+"""Opt-in per-file / per-command profiling of the hooks.
+
+With `PRE_COMMIT_HOOKS_PROFILE=/path/to/profile.jsonl` set, each file checked
+through `util.map_files` and each command run through `util.cmd_output` is
+appended to that file as a json line with its wall time, cpu time (including
+waited-for subprocesses), bytes read / written by the process (where
+/proc/self/io is available) and the number of subprocesses run.
+
+Each entry also has the process's peak RSS so far (`maxrss`).  That is a
+high-water mark of the whole process, it never goes down, so it can't say what
+one file used.  For that set `PRE_COMMIT_HOOKS_PROFILE_MEMORY=1` as well: each
+file's peak allocation (`peak`) is then traced with `tracemalloc` (which slows
+the hooks down).
+
+`pre-commit-hooks-profile profile.jsonl` summarizes the slowest hooks, files
+and commands, with `--memory-report` the files with the largest traced peak
+and the hooks with the largest process peak RSS.  `--max-file-memory` checks
+the traced peaks of a finished profile, it doesn't limit the hooks while they
+run.
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import os
+import sys
+import time
+from typing import Any
+from typing import Callable
+from typing import Generator
+from typing import Sequence
+
+PROFILE_ENV = 'PRE_COMMIT_HOOKS_PROFILE'
+MEMORY_ENV = 'PRE_COMMIT_HOOKS_PROFILE_MEMORY'
+
+_current_file: str | None = None
+_subprocesses = 0
+
+
+def enabled() -> bool:
+    return bool(os.environ.get(PROFILE_ENV))
+
+
+def hook_name() -> str:
+    # a console script, `python -m pre_commit_hooks.x` or the daemon's argv
+    name = os.path.basename(sys.argv[0])
+    if name.endswith('.py'):
+        name = name[:-len('.py')]
+    return name.rpartition('.')[2]
+
+
+def _io() -> tuple[int | None, int | None]:
+    try:
+        with open('/proc/self/io', 'rb') as f:
+            contents = f.read()
+    except OSError:  # pragma: no cover (not linux)
+        return None, None
+    fields = dict(line.split(b': ') for line in contents.splitlines())
+    return int(fields[b'rchar']), int(fields[b'wchar'])
+
+
+def _maxrss() -> int | None:
+    try:
+        import resource
+    except ImportError:  # pragma: no cover (windows)
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macos, kilobytes elsewhere
+    return maxrss if sys.platform == 'darwin' else maxrss * 1024
+
+
+def _cpu() -> float:
+    times = os.times()
+    return sum((
+        times.user, times.system, times.children_user, times.children_system,
+    ))
+
+
+def _delta(before: int | None, after: int | None) -> int | None:
+    if before is None or after is None:  # pragma: no cover (not linux)
+        return None
+    return after - before
+
+
+def _write(entry: dict[str, Any]) -> None:
+    import json
+
+    # single appended lines, so parallel hooks can share a profile
+    with open(os.environ[PROFILE_ENV], 'a', encoding='UTF-8') as f:
+        f.write(f'{json.dumps(entry)}\n')
+
+
+@contextlib.contextmanager
+def record(
+        kind: str,
+        name: str,
+        *,
+        hook: str | None = None,
+) -> Generator[None, None, None]:
+    """Profile the block as a `'file'` or a `'cmd'` named `name`"""
+    global _current_file, _subprocesses
+
+    if not enabled():
+        yield
+        return
+
+    parent = _current_file
+    subprocesses = _subprocesses
+    read, written = _io()
+    cpu = _cpu()
+    wall = time.perf_counter()
+    if kind == 'file':
+        _current_file = name
+    else:
+        _subprocesses += 1
+    tracing = kind == 'file' and bool(os.environ.get(MEMORY_ENV))
+    if tracing:
+        import tracemalloc
+
+        tracemalloc.start()
+    try:
+        yield
+    finally:
+        wall = time.perf_counter() - wall
+        cpu = _cpu() - cpu
+        read_after, written_after = _io()
+        peak = None
+        if tracing:
+            # only what was allocated since `start`, the file's own peak
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        _current_file = parent
+        _write({
+            'hook': hook or hook_name(),
+            'kind': kind,
+            'name': name,
+            'file': parent,
+            'wall': wall,
+            'cpu': cpu,
+            'read': _delta(read, read_after),
+            'written': _delta(written, written_after),
+            'subprocesses': _subprocesses - subprocesses,
+            'peak': peak,
+            'maxrss': _maxrss(),
+        })
+
+
+class Profiled:
+    """Wraps a per-file function of `util.map_files` with `record`"""
+
+    def __init__(self, func: Callable[[str], int]) -> None:
+        self.func = func
+        # named up front, workers may not share our `sys.argv`
+        self.hook = hook_name()
+
+    def __call__(self, filename: str) -> int:
+        with record('file', filename, hook=self.hook):
+            return self.func(filename)
+
+    def prepare(self, filenames: list[str]) -> None:
+        prepare = getattr(self.func, 'prepare', None)
+        if prepare is not None:
+            prepare(filenames)
+
+    def close(self) -> None:
+        close = getattr(self.func, 'close', None)
+        if close is not None:
+            close()
+
+
+def load(filename: str) -> list[dict[str, Any]]:
+    import json
+
+    with open(filename, encoding='UTF-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _size(n: int | None) -> str:
+    if n is None:
+        return '-'
+    for unit in ('B', 'KiB', 'MiB'):
+        if n < 1024:
+            return f'{n}{unit}'
+        n //= 1024
+    return f'{n}GiB'
+
+
+def summarize(entries: list[dict[str, Any]], top: int) -> list[str]:
+    hooks: dict[str, dict[str, Any]] = {}
+    for entry in entries:
+        totals = hooks.setdefault(
+            entry['hook'], {'wall': 0., 'cpu': 0., 'file': 0, 'cmd': 0},
+        )
+        totals[entry['kind']] += 1
+        # commands run while checking a file are already part of its time
+        if entry['file'] is None:
+            totals['wall'] += entry['wall']
+            totals['cpu'] += entry['cpu']
+
+    def _slowest(kind: str) -> list[dict[str, Any]]:
+        matching = [entry for entry in entries if entry['kind'] == kind]
+        return sorted(matching, key=lambda entry: -entry['wall'])[:top]
+
+    slowest_hooks = sorted(hooks.items(), key=lambda kv: -kv[1]['wall'])
+    lines = ['slowest hooks:']
+    for hook, totals in slowest_hooks[:top]:
+        lines.append(
+            f'  {totals["wall"]:8.3f}s wall {totals["cpu"]:8.3f}s cpu  '
+            f'{hook} ({totals["file"]} files, {totals["cmd"]} commands)',
+        )
+    for kind, title in (('file', 'files'), ('cmd', 'commands')):
+        lines.append(f'slowest {title}:')
+        for entry in _slowest(kind):
+            lines.append(
+                f'  {entry["wall"]:8.3f}s wall {entry["cpu"]:8.3f}s cpu  '
+                f'{_size(entry["read"]):>8} read {_size(entry["written"]):>8} '
+                f'written  {entry["hook"]}: {entry["name"]}',
+            )
+    return lines
+
+
+def _traced(entries: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """The file entries with a traced peak allocation, largest first"""
+    return sorted(
+        (
+            entry for entry in entries
+            if entry['kind'] == 'file' and entry.get('peak') is not None
+        ),
+        key=lambda entry: -entry['peak'],
+    )
+
+
+def summarize_memory(entries: list[dict[str, Any]], top: int) -> list[str]:
+    lines = ['largest memory files:']
+    traced = _traced(entries)
+    for entry in traced[:top]:
+        lines.append(
+            f'  {_size(entry["peak"]):>8} peak  '
+            f'{entry["hook"]}: {entry["name"]}',
+        )
+    if not traced:
+        lines.append(f'  (not traced, set ${MEMORY_ENV}=1)')
+
+    # a process-wide high-water mark, so only meaningful per hook
+    maxrss: dict[str, int | None] = {}
+    for entry in entries:
+        n = maxrss.setdefault(entry['hook'], None)
+        if entry.get('maxrss') is not None:
+            maxrss[entry['hook']] = max(entry['maxrss'], n or 0)
+    lines.append('largest process peak rss hooks:')
+    for hook, n in sorted(maxrss.items(), key=lambda kv: -(kv[1] or 0))[:top]:
+        lines.append(f'  {_size(n):>8} rss  {hook}')
+    return lines
+
+
+def _parse_size(s: str) -> int:
+    units = {'': 1, 'k': 1 << 10, 'm': 1 << 20, 'g': 1 << 30}
+    number, unit = s[:len(s.rstrip('kKmMgG'))], s[len(s.rstrip('kKmMgG')):]
+    try:
+        return int(number) * units[unit.lower()]
+    except (KeyError, ValueError):
+        raise argparse.ArgumentTypeError(f'invalid size: {s!r}')
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=f'Summarize a ${PROFILE_ENV} profile.',
+    )
+    parser.add_argument('filename')
+    parser.add_argument(
+        '-n', '--top', type=int, default=10,
+        help=(
+            'Number of hooks / files / commands to list.  '
+            'default: %(default)s'
+        ),
+    )
+    parser.add_argument(
+        '--memory-report', action='store_true',
+        help='Also list the hooks and files using the most memory.',
+    )
+    parser.add_argument(
+        '--max-file-memory', type=_parse_size, metavar='SIZE',
+        help=(
+            'Fail if checking a file allocated more than SIZE (with a K, M or '
+            'G suffix) at its peak.  Needs a profile traced with '
+            f'${MEMORY_ENV}=1, the limit is checked here, not during the run.'
+        ),
+    )
+    args = parser.parse_args(argv)
+
+    entries = load(args.filename)
+    traced = _traced(entries)
+    if (
+            args.max_file_memory is not None and
+            not traced and
+            any(entry['kind'] == 'file' for entry in entries)
+    ):
+        parser.error(
+            f'--max-file-memory: no traced files, record the profile with '
+            f'${MEMORY_ENV}=1',
+        )
+
+    lines = summarize(entries, args.top)
+    if args.memory_report:
+        lines.extend(summarize_memory(entries, args.top))
+    for line in lines:
+        print(line)
+
+    retv = 0
+    if args.max_file_memory is not None:
+        for entry in traced:
+            if entry['peak'] > args.max_file_memory:
+                print(
+                    f'{entry["hook"]}: {entry["name"]} used '
+                    f'{_size(entry["peak"])} '
+                    f'(limit {_size(args.max_file_memory)})',
+                )
+                retv = 1
+    return retv
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,89 @@
+"""Python files read once for the hooks which parse or tokenize them.
+
+`check-ast`, `check-builtin-literals` and `debug-statements` each need the
+AST of a file, `check-docstring-first` and `double-quote-string-fixer` its
+tokens.  Run in one process (as by `pre-commit-hooks-watch`), they take the
+file from here and it's read, parsed and tokenized once between them.
+
+A file is read again once its inode, mtime or size change (so after a fixer
+rewrote it).  The most recently used `MAX_SOURCES` files are kept.
+"""
+from __future__ import annotations
+
+import ast
+import collections
+import io
+import os
+import tokenize
+from typing import NamedTuple
+
+MAX_SOURCES = 32
+
+
+class Source:
+    """A Python file's contents, and what's derived from them on first use"""
+
+    def __init__(self, filename: str, data: bytes) -> None:
+        self.filename = filename
+        self.data = data
+        self._encoding: str | None = None
+        self._text: str | None = None
+        self._tree: ast.Module | None = None
+        self._tokens: list[tokenize.TokenInfo] | None = None
+
+    @property
+    def encoding(self) -> str:
+        """From the BOM or coding cookie (PEP 263), `utf-8` otherwise.
+        `SyntaxError` for an unknown one."""
+        if self._encoding is None:
+            readline = io.BytesIO(self.data).readline
+            self._encoding, _ = tokenize.detect_encoding(readline)
+        return self._encoding
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = self.data.decode(self.encoding)
+        return self._text
+
+    @property
+    def tree(self) -> ast.Module:
+        # a `SyntaxError` isn't kept, each caller gets its own traceback
+        if self._tree is None:
+            self._tree = ast.parse(self.data, filename=self.filename)
+        return self._tree
+
+    @property
+    def tokens(self) -> list[tokenize.TokenInfo]:
+        """As from `tokenize.tokenize`, starting with the `ENCODING` token"""
+        if self._tokens is None:
+            readline = io.BytesIO(self.data).readline
+            self._tokens = list(tokenize.tokenize(readline))
+        return self._tokens
+
+
+class _Entry(NamedTuple):
+    stamp: tuple[int, int, int]
+    source: Source
+
+
+_sources: collections.OrderedDict[str, _Entry] = collections.OrderedDict()
+
+
+def get(filename: str) -> Source:
+    """The `Source` of `filename`, read unless it's unchanged since"""
+    st = os.stat(filename)
+    # before reading, a write in between is seen next time
+    stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+    entry = _sources.get(filename)
+    if entry is not None and entry.stamp == stamp:
+        _sources.move_to_end(filename)
+        return entry.source
+
+    with open(filename, 'rb') as f:
+        source = Source(filename, f.read())
+    _sources[filename] = _Entry(stamp, source)
+    _sources.move_to_end(filename)
+    while len(_sources) > MAX_SOURCES:
+        _sources.popitem(last=False)
+    return source
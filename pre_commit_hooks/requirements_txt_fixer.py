@@ -5,6 +5,11 @@ import re
 from typing import IO
 from typing import Sequence
 
+from pre_commit_hooks.util import add_execution_arguments
+from pre_commit_hooks.util import add_files_from_arguments
+from pre_commit_hooks.util import map_files
+from pre_commit_hooks.util import parse_args
+
 
 PASS = 0
 FAIL = 1
@@ -130,21 +135,29 @@ def fix_requirements(f: IO[bytes]) -> int:
         return FAIL
 
 
+def _fix_filename(filename: str) -> int:
+    with open(filename, 'rb+') as file_obj:
+        ret_for_file = fix_requirements(file_obj)
+
+    if ret_for_file:
+        print(f'Sorting {filename}')
+
+    return ret_for_file
+
+
 def main(argv: Sequence[str] | None = None) -> int:
     parser = argparse.ArgumentParser()
     parser.add_argument('filenames', nargs='*', help='Filenames to fix')
-    args = parser.parse_args(argv)
+    add_execution_arguments(parser)
+    add_files_from_arguments(
+        parser, files=r'(requirements|constraints).*\.txt$',
+    )
+    args = parse_args(parser, argv)
 
     retv = PASS
 
-    for arg in args.filenames:
-        with open(arg, 'rb+') as file_obj:
-            ret_for_file = fix_requirements(file_obj)
-
-            if ret_for_file:
-                print(f'Sorting {arg}')
-
-            retv |= ret_for_file
+    for ret_for_file in map_files(_fix_filename, args.filenames, args):
+        retv |= ret_for_file
 
     return retv
 
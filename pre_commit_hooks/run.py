@@ -0,0 +1,282 @@
+"""Run several content hooks in one process, reading each file only once.
+
+Every selected hook sees the buffer as left by the hooks before it (the same
+as running them one after another) and the result is written back at most
+once per file.  Findings are reported per hook.
+
+Each hook takes the options which change what it does to a file, given as
+`--hook-args HOOK=ARGS` (e.g. `--hook-args mixed-line-ending=--fix=lf`):
+
+  trailing-whitespace   --markdown-linebreak-ext, --chars
+  mixed-line-ending     --fix
+  check-merge-conflict  --assume-in-merge
+  check-vcs-permalinks  --additional-github-domain
+
+Without them each hook uses its defaults.
+"""
+from __future__ import annotations
+
+import argparse
+import functools
+import io
+import sys
+from typing import Callable
+from typing import Mapping
+from typing import NamedTuple
+from typing import Pattern
+from typing import Sequence
+
+from pre_commit_hooks import check_merge_conflict
+from pre_commit_hooks import check_vcs_permalinks
+from pre_commit_hooks import detect_private_key
+from pre_commit_hooks import end_of_file_fixer
+from pre_commit_hooks import mixed_line_ending
+from pre_commit_hooks import trailing_whitespace_fixer
+from pre_commit_hooks.util import add_files_from_arguments
+from pre_commit_hooks.util import add_hook_args_argument
+from pre_commit_hooks.util import capture_output
+from pre_commit_hooks.util import parse_args
+from pre_commit_hooks.util import parse_hook_args
+from pre_commit_hooks.util import parse_hook_ids
+from pre_commit_hooks.util import write_output
+
+# (filename, contents) -> (retv, new contents)
+HookFn = Callable[[str, bytes], 'tuple[int, bytes]']
+
+
+def _hook_parser(hook_id: str) -> argparse.ArgumentParser:
+    return argparse.ArgumentParser(prog=f'{hook_id} (--hook-args)')
+
+
+def _fix_trailing_whitespace(
+        filename: str,
+        contents: bytes,
+        *,
+        all_markdown: bool,
+        md_exts: list[str],
+        chars: bytes | None,
+) -> tuple[int, bytes]:
+    new_contents = trailing_whitespace_fixer._fix_contents(
+        contents,
+        is_markdown=trailing_whitespace_fixer._is_markdown(
+            filename, all_markdown, md_exts,
+        ),
+        chars=chars,
+    )
+    if new_contents != contents:
+        print(f'Fixing {filename}')
+        return 1, new_contents
+    else:
+        return 0, contents
+
+
+def _trailing_whitespace(argv: Sequence[str]) -> HookFn:
+    parser = _hook_parser('trailing-whitespace')
+    trailing_whitespace_fixer._add_fix_arguments(parser)
+    args = parser.parse_args(argv)
+    all_markdown, md_exts = trailing_whitespace_fixer._markdown_exts(
+        parser, args.markdown_linebreak_ext,
+    )
+    return functools.partial(
+        _fix_trailing_whitespace,
+        all_markdown=all_markdown,
+        md_exts=md_exts,
+        chars=None if args.chars is None else args.chars.encode(),
+    )
+
+
+def _fix_end_of_file(filename: str, contents: bytes) -> tuple[int, bytes]:
+    file_obj = io.BytesIO(contents)
+    retv = end_of_file_fixer.fix_file(file_obj)
+    if retv:
+        print(f'Fixing {filename}')
+    return retv, file_obj.getvalue()
+
+
+def _end_of_file(argv: Sequence[str]) -> HookFn:
+    _hook_parser('end-of-file-fixer').parse_args(argv)
+    return _fix_end_of_file
+
+
+def _fix_mixed_line_ending(
+        filename: str,
+        contents: bytes,
+        *,
+        fix: str,
+) -> tuple[int, bytes]:
+    retv, new_contents = mixed_line_ending.fix_contents(contents, fix)
+    if retv:
+        if fix == 'no':
+            print(f'{filename}: mixed line endings')
+        else:
+            print(f'{filename}: fixed mixed line endings')
+    return retv, new_contents
+
+
+def _mixed_line_ending(argv: Sequence[str]) -> HookFn:
+    parser = _hook_parser('mixed-line-ending')
+    mixed_line_ending._add_fix_argument(parser)
+    args = parser.parse_args(argv)
+    return functools.partial(_fix_mixed_line_ending, fix=args.fix)
+
+
+def _noop(filename: str, contents: bytes) -> tuple[int, bytes]:
+    return 0, contents
+
+
+def _check_merge_conflict(
+        filename: str,
+        contents: bytes,
+) -> tuple[int, bytes]:
+    lines = io.BytesIO(contents)
+    return check_merge_conflict.check_lines(filename, lines), contents
+
+
+def _merge_conflict(argv: Sequence[str]) -> HookFn:
+    parser = _hook_parser('check-merge-conflict')
+    parser.add_argument('--assume-in-merge', action='store_true')
+    args = parser.parse_args(argv)
+    if args.assume_in_merge or check_merge_conflict.is_in_merge():
+        return _check_merge_conflict
+    else:
+        return _noop
+
+
+def _check_private_key(filename: str, contents: bytes) -> tuple[int, bytes]:
+    if detect_private_key.has_private_key(contents):
+        print(f'Private key found: {filename}')
+        return 1, contents
+    else:
+        return 0, contents
+
+
+def _private_key(argv: Sequence[str]) -> HookFn:
+    _hook_parser('detect-private-key').parse_args(argv)
+    return _check_private_key
+
+
+def _check_vcs_permalinks(
+        filename: str,
+        contents: bytes,
+        *,
+        patterns: list[Pattern[bytes]],
+) -> tuple[int, bytes]:
+    lines = io.BytesIO(contents)
+    retv = check_vcs_permalinks._check_lines(filename, lines, patterns)
+    return retv, contents
+
+
+def _vcs_permalinks(argv: Sequence[str]) -> HookFn:
+    parser = _hook_parser('check-vcs-permalinks')
+    check_vcs_permalinks._add_domain_argument(parser)
+    args = parser.parse_args(argv)
+    patterns = [
+        check_vcs_permalinks._get_pattern(domain)
+        for domain in args.additional_github_domains
+    ]
+    return functools.partial(_check_vcs_permalinks, patterns=patterns)
+
+
+class Hook(NamedTuple):
+    # the hook's arguments -> what it does to each file
+    make: Callable[[Sequence[str]], HookFn]
+    # printed after the hook's findings when it fails
+    hint: str | None = None
+
+
+HOOKS: dict[str, Hook] = {
+    'trailing-whitespace': Hook(_trailing_whitespace),
+    'end-of-file-fixer': Hook(_end_of_file),
+    'mixed-line-ending': Hook(_mixed_line_ending),
+    'check-merge-conflict': Hook(_merge_conflict),
+    'detect-private-key': Hook(_private_key),
+    'check-vcs-permalinks': Hook(_vcs_permalinks, check_vcs_permalinks.HINT),
+}
+
+
+class HookResult(NamedTuple):
+    retv: int
+    output: bytes
+
+
+def run_hooks(
+        hook_ids: Sequence[str],
+        filenames: Sequence[str],
+        *,
+        assume_in_merge: bool = False,
+        hook_argvs: Mapping[str, Sequence[str]] | None = None,
+) -> dict[str, HookResult]:
+    """Run `hook_ids` over each of `filenames`, each hook with its arguments
+    from `hook_argvs` (as given to it at commit time, default none)"""
+    hook_argvs = hook_argvs or {}
+    hook_fns: dict[str, HookFn] = {}
+    for hook_id in hook_ids:
+        argv = list(hook_argvs.get(hook_id, ()))
+        if hook_id == 'check-merge-conflict' and assume_in_merge:
+            argv.append('--assume-in-merge')
+        hook_fns[hook_id] = HOOKS[hook_id].make(argv)
+
+    retvs = dict.fromkeys(hook_fns, 0)
+    outputs = {hook_id: io.BytesIO() for hook_id in hook_fns}
+    for filename in filenames:
+        with open(filename, 'rb') as f:
+            contents = f.read()
+
+        new_contents = contents
+        for hook_id, hook_fn in hook_fns.items():
+            with capture_output() as (out, _):
+                retv, new_contents = hook_fn(filename, new_contents)
+            retvs[hook_id] |= retv
+            outputs[hook_id].write(out.getvalue())
+
+        if new_contents != contents:
+            with open(filename, 'wb') as f:
+                f.write(new_contents)
+
+    for hook_id in hook_fns:
+        hint = HOOKS[hook_id].hint
+        if retvs[hook_id] and hint is not None:
+            outputs[hook_id].write(f'{hint}\n'.encode())
+
+    return {
+        hook_id: HookResult(retvs[hook_id], outputs[hook_id].getvalue())
+        for hook_id in hook_fns
+    }
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        '--hooks', required=True,
+        type=functools.partial(parse_hook_ids, hook_ids=HOOKS),
+        metavar='HOOK[,HOOK,...]',
+        help=f'Hooks to run, in order.  Choose from: {", ".join(HOOKS)}',
+    )
+    add_hook_args_argument(parser)
+    parser.add_argument(
+        '--assume-in-merge', action='store_true',
+        help='Run check-merge-conflict even if no merge is in progress.',
+    )
+    parser.add_argument('filenames', nargs='*', help='Filenames to run')
+    add_files_from_arguments(parser, types=('text',))
+    args = parse_args(parser, argv)
+
+    results = run_hooks(
+        args.hooks, args.filenames,
+        assume_in_merge=args.assume_in_merge,
+        hook_argvs=parse_hook_args(parser, args.hooks, args.hook_args),
+    )
+
+    retv = 0
+    for hook_id, result in results.items():
+        print(f'{hook_id}: {"Failed" if result.retv else "Passed"}')
+        write_output(sys.stdout, result.output)
+        retv |= result.retv
+    return retv
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
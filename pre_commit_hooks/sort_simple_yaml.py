@@ -22,6 +22,11 @@ from __future__ import annotations
 import argparse
 from typing import Sequence
 
+from pre_commit_hooks.util import add_execution_arguments
+from pre_commit_hooks.util import add_files_from_arguments
+from pre_commit_hooks.util import map_files
+from pre_commit_hooks.util import parse_args
+
 
 QUOTES = ["'", '"']
 
@@ -99,24 +104,32 @@ def first_key(lines: list[str]) -> str:
         return ''  # not actually reached in reality
 
 
+def _fix_file(filename: str) -> int:
+    with open(filename, 'r+') as f:
+        lines = [line.rstrip() for line in f.readlines()]
+        new_lines = sort(lines)
+
+        if lines != new_lines:
+            print(f'Fixing file `{filename}`')
+            f.seek(0)
+            f.write('\n'.join(new_lines) + '\n')
+            f.truncate()
+            return 1
+        else:
+            return 0
+
+
 def main(argv: Sequence[str] | None = None) -> int:
     parser = argparse.ArgumentParser()
     parser.add_argument('filenames', nargs='*', help='Filenames to fix')
-    args = parser.parse_args(argv)
+    add_execution_arguments(parser)
+    add_files_from_arguments(parser, files='^$')
+    args = parse_args(parser, argv)
 
     retval = 0
 
-    for filename in args.filenames:
-        with open(filename, 'r+') as f:
-            lines = [line.rstrip() for line in f.readlines()]
-            new_lines = sort(lines)
-
-            if lines != new_lines:
-                print(f'Fixing file `{filename}`')
-                f.seek(0)
-                f.write('\n'.join(new_lines) + '\n')
-                f.truncate()
-                retval = 1
+    for ret in map_files(_fix_file, args.filenames, args):
+        retval |= ret
 
     return retval
 
@@ -6,6 +6,13 @@ import re
 import tokenize
 from typing import Sequence
 
+from pre_commit_hooks import python_source
+from pre_commit_hooks.util import add_execution_arguments
+from pre_commit_hooks.util import add_files_from_arguments
+from pre_commit_hooks.util import map_files
+from pre_commit_hooks.util import parse_args
+from pre_commit_hooks.util import write_changes
+
 START_QUOTE_RE = re.compile('^[a-zA-Z]*"')
 
 
@@ -32,16 +39,31 @@ def get_line_offsets_by_line_no(src: str) -> list[int]:
     return offsets
 
 
+def _contents_and_tokens(
+        source: python_source.Source,
+) -> tuple[str, list[tokenize.TokenInfo]]:
+    try:
+        shared = source.encoding == 'utf-8'
+    except SyntaxError:  # an unknown coding cookie
+        shared = False
+    # otherwise the shared tokens aren't of the UTF-8 decoded contents
+    if shared:
+        return source.text, source.tokens
+    else:
+        contents = source.data.decode('UTF-8')
+        readline = io.StringIO(contents).readline
+        return contents, list(tokenize.generate_tokens(readline))
+
+
 def fix_strings(filename: str) -> int:
-    with open(filename, encoding='UTF-8', newline='') as f:
-        contents = f.read()
+    source = python_source.get(filename)
+    contents, tokens_l = _contents_and_tokens(source)
     line_offsets = get_line_offsets_by_line_no(contents)
 
     # Basically a mutable string
     splitcontents = list(contents)
 
     # Iterate in reverse so the offsets are always correct
-    tokens_l = list(tokenize.generate_tokens(io.StringIO(contents).readline))
     tokens = reversed(tokens_l)
     for token_type, token_text, (srow, scol), (erow, ecol), _ in tokens:
         if token_type == tokenize.STRING:
@@ -53,24 +75,29 @@ def fix_strings(filename: str) -> int:
 
     new_contents = ''.join(splitcontents)
     if contents != new_contents:
-        with open(filename, 'w', encoding='UTF-8', newline='') as f:
-            f.write(new_contents)
+        write_changes(filename, source.data, new_contents.encode('UTF-8'))
         return 1
     else:
         return 0
 
 
+def _fix_and_report(filename: str) -> int:
+    return_value = fix_strings(filename)
+    if return_value != 0:
+        print(f'Fixing strings in {filename}')
+    return return_value
+
+
 def main(argv: Sequence[str] | None = None) -> int:
     parser = argparse.ArgumentParser()
     parser.add_argument('filenames', nargs='*', help='Filenames to fix')
-    args = parser.parse_args(argv)
+    add_execution_arguments(parser)
+    add_files_from_arguments(parser, types=('python',))
+    args = parse_args(parser, argv)
 
     retv = 0
 
-    for filename in args.filenames:
-        return_value = fix_strings(filename)
-        if return_value != 0:
-            print(f'Fixing strings in {filename}')
+    for return_value in map_files(_fix_and_report, args.filenames, args):
         retv |= return_value
 
     return retv
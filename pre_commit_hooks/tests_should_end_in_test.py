@@ -5,6 +5,9 @@ import os.path
 import re
 from typing import Sequence
 
+from pre_commit_hooks.util import add_files_from_arguments
+from pre_commit_hooks.util import parse_args
+
 
 def main(argv: Sequence[str] | None = None) -> int:
     parser = argparse.ArgumentParser()
@@ -32,7 +35,8 @@ def main(argv: Sequence[str] | None = None) -> int:
         const=r'test.*\.py',
         help='ensure tests match %(const)s',
     )
-    args = parser.parse_args(argv)
+    add_files_from_arguments(parser, files=r'(^|/)tests/.+\.py$')
+    args = parse_args(parser, argv)
 
     retcode = 0
     reg = re.compile(args.pattern)
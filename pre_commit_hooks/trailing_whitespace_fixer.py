@@ -1,25 +1,38 @@
 from __future__ import annotations
 
 import argparse
+import functools
+import io
 import os
 from typing import Sequence
 
+from pre_commit_hooks.util import add_execution_arguments
+from pre_commit_hooks.util import add_files_from_arguments
+from pre_commit_hooks.util import map_files
+from pre_commit_hooks.util import parse_args
+from pre_commit_hooks.util import stream_fix
+
 
 def _fix_file(
         filename: str,
         is_markdown: bool,
         chars: bytes | None,
 ) -> bool:
-    with open(filename, mode='rb') as file_processed:
-        lines = file_processed.readlines()
-    newlines = [_process_line(line, is_markdown, chars) for line in lines]
-    if newlines != lines:
-        with open(filename, mode='wb') as file_processed:
-            for line in newlines:
-                file_processed.write(line)
-        return True
-    else:
-        return False
+    fix = functools.partial(
+        _fix_contents, is_markdown=is_markdown, chars=chars,
+    )
+    return stream_fix(filename, fix)
+
+
+def _fix_contents(
+        contents: bytes,
+        is_markdown: bool,
+        chars: bytes | None,
+) -> bytes:
+    return b''.join(
+        _process_line(line, is_markdown, chars)
+        for line in io.BytesIO(contents)
+    )
 
 
 def _process_line(
@@ -41,8 +54,30 @@ def _process_line(
     return line.rstrip(chars) + eol
 
 
-def main(argv: Sequence[str] | None = None) -> int:
-    parser = argparse.ArgumentParser()
+def _is_markdown(
+        filename: str,
+        all_markdown: bool,
+        md_exts: list[str],
+) -> bool:
+    _, extension = os.path.splitext(filename.lower())
+    return all_markdown or extension in md_exts
+
+
+def _fix_and_report(
+        filename: str,
+        all_markdown: bool,
+        md_exts: list[str],
+        chars: bytes | None,
+) -> int:
+    md = _is_markdown(filename, all_markdown, md_exts)
+    if _fix_file(filename, md, chars):
+        print(f'Fixing {filename}')
+        return 1
+    else:
+        return 0
+
+
+def _add_fix_arguments(parser: argparse.ArgumentParser) -> None:
     parser.add_argument(
         '--no-markdown-linebreak-ext',
         action='store_true',
@@ -65,13 +100,14 @@ def main(argv: Sequence[str] | None = None) -> int:
             'Defaults to all whitespace characters.'
         ),
     )
-    parser.add_argument('filenames', nargs='*', help='Filenames to fix')
-    args = parser.parse_args(argv)
 
-    if args.no_markdown_linebreak_ext:
-        print('--no-markdown-linebreak-ext now does nothing!')
 
-    md_args = args.markdown_linebreak_ext
+def _markdown_exts(
+        parser: argparse.ArgumentParser,
+        md_args: list[str],
+) -> tuple[bool, list[str]]:
+    """Whether all files are markdown, and the markdown extensions, from
+    `--markdown-linebreak-ext`"""
     if '' in md_args:
         parser.error('--markdown-linebreak-ext requires a non-empty argument')
     all_markdown = '*' in md_args
@@ -88,14 +124,29 @@ def main(argv: Sequence[str] | None = None) -> int:
                 f'{ext!r} (has . / \\ :)\n'
                 f"  (probably filename; use '--markdown-linebreak-ext=EXT')",
             )
+    return all_markdown, md_exts
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser()
+    _add_fix_arguments(parser)
+    parser.add_argument('filenames', nargs='*', help='Filenames to fix')
+    add_execution_arguments(parser)
+    add_files_from_arguments(parser, types=('text',))
+    args = parse_args(parser, argv)
+
+    if args.no_markdown_linebreak_ext:
+        print('--no-markdown-linebreak-ext now does nothing!')
+
+    all_markdown, md_exts = _markdown_exts(parser, args.markdown_linebreak_ext)
     chars = None if args.chars is None else args.chars.encode()
     return_code = 0
-    for filename in args.filenames:
-        _, extension = os.path.splitext(filename.lower())
-        md = all_markdown or extension in md_exts
-        if _fix_file(filename, md, chars):
-            print(f'Fixing {filename}')
-            return_code = 1
+    fix = functools.partial(
+        _fix_and_report,
+        all_markdown=all_markdown, md_exts=md_exts, chars=chars,
+    )
+    for ret in map_files(fix, args.filenames, args):
+        return_code |= ret
     return return_code
 
 
@@ -1,32 +1,1343 @@
 from __future__ import annotations
 
-import subprocess
+import argparse
+import codecs
+import collections
+import contextlib
+import functools
+import heapq
+import io
+import itertools
+import mmap
+import os
+import re
+import sys
 from typing import Any
+from typing import Callable
+from typing import Collection
+from typing import Generator
+from typing import IO
+from typing import Iterable
+from typing import Iterator
+from typing import NamedTuple
+from typing import Sequence
+from typing import Tuple
+from typing import TYPE_CHECKING
+from typing import TypeVar
+
+from pre_commit_hooks import profiling
+
+if TYPE_CHECKING:
+    import subprocess
 
 
 class CalledProcessError(RuntimeError):
     pass
 
 
-def added_files() -> set[str]:
+T = TypeVar('T')
+
+# `(function, arguments)` -> `(repository state, result)`
+_git_memo: dict[tuple[Any, ...], tuple[tuple[Any, ...], Any]] = {}
+
+
+def _stamp(path: str) -> tuple[int, int, int] | None:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    # git replaces these files by renaming a lock file, changing the inode
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def _git_state() -> tuple[Any, ...] | None:
+    """What git-derived facts depend on, `None` outside of a repository"""
+    from pre_commit_hooks import git_repo
+
+    try:
+        gitdir = git_repo.git_dir()
+    except CalledProcessError:
+        return None
+    index = os.environ.get('GIT_INDEX_FILE', os.path.join(gitdir, 'index'))
+    return (
+        os.getcwd(),
+        tuple(sorted(
+            (k, v) for k, v in os.environ.items() if k.startswith('GIT_')
+        )),
+        _stamp(index),
+        _stamp(os.path.join(gitdir, 'HEAD')),
+        # appended to whenever the commit HEAD points at moves
+        _stamp(os.path.join(gitdir, 'logs', 'HEAD')),
+        _stamp(os.path.join(git_repo.common_dir(gitdir), 'config')),
+    )
+
+
+def memoize_git(func: Callable[..., T]) -> Callable[..., T]:
+    """Reuse `func`'s result for the rest of the process, until the index,
+    HEAD (or its reflog) or the repository's config change, going by their
+    inode, mtime and size.
+
+    Changing directory or any `GIT_*` environment variable also invalidates
+    it.  Results outside of a repository aren't memoized.
+    """
+    @functools.wraps(func)
+    def memoized(*args: Any, **kwargs: Any) -> T:
+        state = _git_state()
+        if state is None:
+            return func(*args, **kwargs)
+        key = (func, args, tuple(sorted(kwargs.items())))
+        try:
+            memo_state, ret = _git_memo[key]
+        except KeyError:
+            pass
+        else:
+            if memo_state == state:
+                return ret
+        ret = func(*args, **kwargs)
+        _git_memo[key] = (state, ret)
+        return ret
+    return memoized
+
+
+@memoize_git
+def added_files() -> frozenset[str]:
     cmd = ('git', 'diff', '--staged', '--name-only', '--diff-filter=A')
-    return set(cmd_output(*cmd).splitlines())
+    return frozenset(cmd_output(*cmd).splitlines())
 
 
-def cmd_output(*cmd: str, retcode: int | None = 0, **kwargs: Any) -> str:
+def cmd_output_b(
+        *cmd: str,
+        retcode: int | None = 0,
+        **kwargs: Any,
+) -> bytes:
+    # most hooks never run a command, don't pay for the import up front
+    import subprocess
+
     kwargs.setdefault('stdout', subprocess.PIPE)
     kwargs.setdefault('stderr', subprocess.PIPE)
-    proc = subprocess.Popen(cmd, **kwargs)
-    stdout, stderr = proc.communicate()
-    stdout = stdout.decode()
+    with profiling.record('cmd', ' '.join(cmd)):
+        proc = subprocess.Popen(cmd, **kwargs)
+        stdout, stderr = proc.communicate()
     if retcode is not None and proc.returncode != retcode:
         raise CalledProcessError(cmd, retcode, proc.returncode, stdout, stderr)
     return stdout
 
 
+def cmd_output(*cmd: str, retcode: int | None = 0, **kwargs: Any) -> str:
+    return cmd_output_b(*cmd, retcode=retcode, **kwargs).decode()
+
+
+class ObjectInfo(NamedTuple):
+    oid: str
+    type: str
+    size: int
+
+
+class GitCatFile:
+    """Long running `git cat-file --batch-check` / `--batch` processes.
+
+    Each call sends all of its object names at once (from a thread, so
+    neither side can block on a full pipe) and reads the answers in order,
+    objects which don't exist are `None`.  Use as a context manager or
+    `close()` it.
+    """
+
+    def __init__(self, *, cwd: str | None = None) -> None:
+        self.cwd = cwd
+        self._procs: dict[str, subprocess.Popen[bytes]] = {}
+
+    def __enter__(self) -> GitCatFile:
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for proc in self._procs.values():
+            proc.communicate()
+        self._procs.clear()
+
+    def _proc(self, option: str) -> subprocess.Popen[bytes]:
+        import subprocess
+
+        if option not in self._procs:
+            self._procs[option] = subprocess.Popen(
+                ('git', 'cat-file', option),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                cwd=self.cwd,
+            )
+        return self._procs[option]
+
+    def _request(
+            self,
+            option: str,
+            objects: Iterable[str],
+    ) -> Generator[tuple[ObjectInfo, IO[bytes]] | None, None, None]:
+        import threading
+
+        request = b''.join(f'{obj}\n'.encode() for obj in objects)
+        if not request:
+            return
+
+        proc = self._proc(option)
+        assert proc.stdin is not None and proc.stdout is not None
+        stdin, stdout = proc.stdin, proc.stdout
+
+        def _write() -> None:
+            try:
+                stdin.write(request)
+                stdin.flush()
+            except BrokenPipeError:  # pragma: no cover (reported by reader)
+                pass
+
+        writer = threading.Thread(target=_write)
+        writer.start()
+        try:
+            for _ in range(request.count(b'\n')):
+                header = stdout.readline()
+                if not header:
+                    del self._procs[option]
+                    assert proc.stderr is not None
+                    cmd = ('git', 'cat-file', option)
+                    raise CalledProcessError(
+                        cmd, 0, proc.wait(), b'', proc.stderr.read(),
+                    )
+                parts = header.split()
+                if len(parts) != 3:  # `<name> missing` / `<name> ambiguous`
+                    yield None
+                else:
+                    oid, tp, size = (part.decode() for part in parts)
+                    yield ObjectInfo(oid, tp, int(size)), stdout
+        finally:
+            writer.join()
+
+    def info(self, objects: Iterable[str]) -> list[ObjectInfo | None]:
+        return [
+            None if found is None else found[0]
+            for found in self._request('--batch-check', objects)
+        ]
+
+    def contents(self, objects: Iterable[str]) -> list[bytes | None]:
+        ret: list[bytes | None] = []
+        for found in self._request('--batch', objects):
+            if found is None:
+                ret.append(None)
+            else:
+                info, stdout = found
+                ret.append(stdout.read(info.size))
+                stdout.read(1)  # the newline after the contents
+        return ret
+
+
 def zsplit(s: str) -> list[str]:
     s = s.strip('\0')
     if s:
         return s.split('\0')
     else:
         return []
+
+
+# smaller files are cheaper to read than to map
+MMAP_MIN_SIZE = 1024 * 1024
+# as git does, a NUL byte in the first block makes a file binary
+BINARY_SNIFF_SIZE = 8000
+
+
+class Contents:
+    """A file's contents, memory-mapped rather than copied in when large.
+
+    `data` is either `bytes` or a read-only `mmap`, which both support
+    `find`, slicing and `re`.  Use `sub in contents` rather than
+    `sub in contents.data`, `mmap` only supports the latter for single bytes.
+    """
+
+    def __init__(self, data: bytes | mmap.mmap) -> None:
+        self.data = data
+        self._is_binary: bool | None = None
+
+    @classmethod
+    def open(cls, filename: str) -> Contents:
+        with open(filename, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < MMAP_MIN_SIZE:
+                return cls(f.read())
+            else:
+                return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    @property
+    def is_binary(self) -> bool:
+        if self._is_binary is None:
+            self._is_binary = b'\0' in self.data[:BINARY_SNIFF_SIZE]
+        return self._is_binary
+
+    def __contains__(self, sub: bytes) -> bool:
+        return self.data.find(sub) != -1
+
+    def lines(self) -> Iterator[bytes]:
+        """The lines, with their endings, without copying the whole file"""
+        if isinstance(self.data, bytes):
+            return iter(io.BytesIO(self.data))
+        else:
+            self.data.seek(0)
+            return iter(self.data.readline, b'')
+
+    def close(self) -> None:
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+
+    def __enter__(self) -> Contents:
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+
+_PREFIX_CHUNK = 64 * 1024
+
+
+def _common_prefix(a: bytes, b: bytes) -> int:
+    end = min(len(a), len(b))
+    # compare a chunk at a time, then bisect the first chunk which differs
+    lo = 0
+    while lo < end and a[lo:lo + _PREFIX_CHUNK] == b[lo:lo + _PREFIX_CHUNK]:
+        lo += _PREFIX_CHUNK
+    lo = min(lo, end)
+    hi = min(lo + _PREFIX_CHUNK, end)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if a[lo:mid + 1] == b[lo:mid + 1]:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+# patterns sharing a prefix at least this long are searched for together
+MIN_ANCHOR_SIZE = 4
+
+
+class MultiPattern:
+    """Find any of several byte strings in one scan, with their offsets.
+
+    Patterns sharing a prefix are grouped, only the prefix (the "anchor") is
+    searched for (with `find`, in C) and the rest of each pattern is compared
+    where it is found.  A scan then costs a pass per distinct anchor rather
+    than a pass per pattern.  Works on `bytes` and `mmap`, or chunks of a
+    stream with `finditer_chunks`.
+    """
+
+    def __init__(self, patterns: Iterable[bytes]) -> None:
+        self.patterns = tuple(sorted(set(patterns)))
+        if not self.patterns or not all(self.patterns):
+            raise ValueError('patterns must be non-empty')
+        self.max_size = max(len(pattern) for pattern in self.patterns)
+
+        groups: list[tuple[bytes, list[bytes]]] = []
+        for pattern in self.patterns:
+            if groups:
+                anchor, members = groups[-1]
+                size = _common_prefix(anchor, pattern)
+                if size >= MIN_ANCHOR_SIZE:
+                    groups[-1] = (anchor[:size], [*members, pattern])
+                    continue
+            groups.append((pattern, [pattern]))
+        self._groups = groups
+        # longest first, so `match` finds the longest
+        self._by_first_byte: dict[int, list[bytes]] = {}
+        for pattern in sorted(self.patterns, key=len, reverse=True):
+            self._by_first_byte.setdefault(pattern[0], []).append(pattern)
+
+    @staticmethod
+    def _group_matches(
+            data: bytes | mmap.mmap,
+            anchor: bytes,
+            members: list[bytes],
+    ) -> Generator[tuple[int, bytes], None, None]:
+        pos = data.find(anchor)
+        while pos != -1:
+            for member in members:
+                if data[pos:pos + len(member)] == member:
+                    yield pos, member
+            pos = data.find(anchor, pos + 1)
+
+    def finditer(
+            self,
+            data: bytes | mmap.mmap,
+    ) -> Iterator[tuple[int, bytes]]:
+        """Every `(offset, pattern)` found (overlapping too), by offset"""
+        return heapq.merge(*(
+            self._group_matches(data, anchor, members)
+            for anchor, members in self._groups
+        ))
+
+    def search(self, data: bytes | mmap.mmap) -> tuple[int, bytes] | None:
+        """The first `(offset, pattern)` found, if any"""
+        return next(self.finditer(data), None)
+
+    def match(self, data: bytes | mmap.mmap, pos: int = 0) -> bytes | None:
+        """The longest pattern found at `pos`, if any"""
+        if pos >= len(data):
+            return None
+        for pattern in self._by_first_byte.get(data[pos], ()):
+            if data[pos:pos + len(pattern)] == pattern:
+                return pattern
+        return None
+
+    def finditer_chunks(
+            self,
+            chunks: Iterable[bytes],
+    ) -> Generator[tuple[int, bytes], None, None]:
+        """`finditer` over a stream, offsets are from the stream's start.
+
+        Matches spanning chunks are found, each only once.
+        """
+        tail = b''
+        offset = 0  # of `tail` in the stream
+        for chunk in chunks:
+            data = tail + chunk
+            for pos, pattern in self.finditer(data):
+                # otherwise it was found with the previous chunk
+                if pos + len(pattern) > len(tail):
+                    yield offset + pos, pattern
+            cut = max(len(data) - (self.max_size - 1), 0)
+            offset += cut
+            tail = data[cut:]
+
+
+def rewrite(f: IO[bytes], old: bytes, new: bytes) -> None:
+    """Change the contents of `f` from `old` to `new`.
+
+    Only what follows the first byte which differs is written, a small fix
+    near the end of a large file doesn't rewrite all of it.
+    """
+    start = _common_prefix(old, new)
+    f.seek(start)
+    f.write(new[start:])
+    f.truncate()
+
+
+def write_changes(
+        filename: str,
+        old: bytes,
+        new: bytes,
+        *,
+        atomic: bool = False,
+) -> None:
+    """Change the contents of `filename` from `old` to `new` (see `rewrite`).
+
+    With `atomic` the new contents are instead written to a temporary file
+    which is renamed over the original, for when the whole file changes
+    anyway.  Readers then see either the old or the new file, never a partly
+    written one.
+    """
+    if not atomic:
+        with open(filename, 'r+b') as f:
+            rewrite(f, old, new)
+    else:
+        with _replacing(filename) as f:
+            f.write(new)
+
+
+@contextlib.contextmanager
+def _replacing(filename: str) -> Generator[IO[bytes], None, None]:
+    """A temporary file which is renamed over `filename` once written"""
+    import tempfile
+
+    # rename over the file itself, not over a symlink to it
+    path = os.path.realpath(filename)
+    fd, tmp = tempfile.mkstemp(
+        dir=os.path.dirname(path), prefix=f'.{os.path.basename(path)}.',
+    )
+    try:
+        with open(fd, 'wb') as f:
+            yield f
+        os.chmod(tmp, os.stat(path).st_mode & 0o7777)
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+LINE_CHUNK_SIZE = 64 * 1024
+
+
+def line_chunks(
+        f: IO[bytes],
+        *,
+        cr: bool = False,
+        size: int = LINE_CHUNK_SIZE,
+        end: int | None = None,
+) -> Generator[bytes, None, None]:
+    """The contents of `f` (up to offset `end`) in chunks of whole lines, of
+    about `size` bytes.
+
+    Lines end with `\\n`, with `cr` a lone `\\r` also ends a line (like
+    `bytes.splitlines`).  A line longer than `size` is kept whole.
+    """
+    parts: list[bytes] = []
+    while True:
+        data = f.read(size if end is None else min(size, end - f.tell()))
+        if not data:
+            break
+        cut = data.rfind(b'\n') + 1
+        if cr:
+            # a `\r` only ends a line if the next byte isn't a `\n`
+            cut = max(cut, data.rfind(b'\r', 0, len(data) - 1) + 1)
+        if cut:
+            parts.append(data[:cut])
+            yield b''.join(parts)
+            parts = [data[cut:]]
+        else:
+            parts.append(data)
+    rest = b''.join(parts)
+    if rest:
+        yield rest
+
+
+SPLIT_SIZE = 16 * 1024 * 1024
+
+
+def split_lines(filename: str, size: int) -> list[tuple[int, int]]:
+    """`(start, end)` byte ranges of whole lines covering `filename`, of
+    about `size` bytes each.  Ranges are cut after a `\\n`.
+    """
+    total = os.path.getsize(filename)
+    bounds = [0]
+    with open(filename, 'rb') as f:
+        for pos in range(size, total, size):
+            if pos <= bounds[-1]:  # a long line took us past this one
+                continue
+            # the start of the next line
+            f.seek(pos)
+            while True:
+                data = f.read(LINE_CHUNK_SIZE)
+                i = data.find(b'\n')
+                if i != -1:
+                    pos += i + 1
+                    break
+                elif not data:
+                    break
+                pos += len(data)
+            if pos < total:
+                bounds.append(pos)
+    bounds.append(total)
+    return list(zip(bounds, bounds[1:]))
+
+
+def stream_fix(
+        filename: str,
+        func: Callable[[bytes], bytes],
+        *,
+        cr: bool = False,
+        size: int = LINE_CHUNK_SIZE,
+        atomic: bool = False,
+) -> bool:
+    """Fix `filename` by applying `func` to each of its `line_chunks`.
+
+    Only a chunk at a time is held in memory (and, when `func` lengthens
+    lines, what's fixed but not read yet).  Nothing is written unless `func`
+    changes a chunk.  Like `write_changes`, the file is then written in place
+    from that chunk on, or with `atomic` the fixed contents go to a temporary
+    file which replaces `filename`.  Returns whether the file changed.
+    """
+    with open(filename, 'rb') as f:
+        chunks = line_chunks(f, cr=cr, size=size)
+        unchanged = 0
+        for chunk in chunks:
+            new = func(chunk)
+            if new != chunk:
+                break
+            unchanged += len(chunk)
+        else:
+            return False
+
+        if atomic:
+            with _replacing(filename) as out, open(filename, 'rb') as src:
+                # `read(0)` (or a file which shrank) ends the copy
+                for data in iter(lambda: src.read(min(size, unchanged)), b''):
+                    out.write(data)
+                    unchanged -= len(data)
+                out.write(new)
+                for chunk in chunks:
+                    out.write(func(chunk))
+        else:
+            with open(filename, 'r+b') as out:
+                out.seek(unchanged)
+                pending = bytearray(new)
+                for chunk in chunks:
+                    # only what has been read can be overwritten
+                    writable = f.tell() - out.tell()
+                    out.write(pending[:writable])
+                    del pending[:writable]
+                    pending += func(chunk)
+                out.write(pending)
+                out.truncate()
+    return True
+
+
+# pathspecs per `git ls-files` call, to stay well below the argument limit
+_PATHSPECS_PER_CALL = 4096
+_FILE_MODES = frozenset(('100644', '100755'))
+
+
+def _spellings(filenames: Sequence[str]) -> dict[str, list[str]]:
+    """The filenames spelling each path as git prints it (`a` and `./a`)"""
+    ret: dict[str, list[str]] = {}
+    for filename in filenames:
+        ret.setdefault(os.path.normpath(filename), []).append(filename)
+    return ret
+
+
+def staged_blob_ids(filenames: Sequence[str]) -> dict[str, str]:
+    """Blob ids of the staged (regular, unconflicted) files of `filenames`"""
+    by_path = _spellings(filenames)
+    ret = {}
+    for i in range(0, len(filenames), _PATHSPECS_PER_CALL):
+        out = cmd_output(
+            'git', '--literal-pathspecs', 'ls-files', '--stage', '-z', '--',
+            *filenames[i:i + _PATHSPECS_PER_CALL],
+        )
+        for entry in zsplit(out):
+            info, _, path = entry.partition('\t')
+            mode, oid, stage = info.split()
+            if mode in _FILE_MODES and stage == '0':
+                for filename in by_path.get(path, ()):
+                    ret[filename] = oid
+    return ret
+
+
+_HUNK_RE = re.compile(rb'^@@ -\d+(?:,\d+)? \+(\d+)(?:,\d+)? @@')
+
+
+def _unquote_path(path: bytes) -> str:
+    # git quotes paths with unusual characters C-style
+    if path.startswith(b'"') and path.endswith(b'"'):
+        path = codecs.escape_decode(path[1:-1])[0]
+    return os.fsdecode(path)
+
+
+def changed_lines(
+        filenames: Sequence[str],
+) -> dict[str, list[tuple[int, bytes]]]:
+    """The (line number, line) pairs added to each file in the index.
+
+    Taken from `git diff --staged -U0`, so neither the working tree nor the
+    rest of the staged file is read.  Unchanged files have no lines.
+    """
+    by_path = _spellings(filenames)
+    path_lines: dict[str, list[tuple[int, bytes]]] = {
+        path: [] for path in by_path
+    }
+    for i in range(0, len(filenames), _PATHSPECS_PER_CALL):
+        out = cmd_output_b(
+            'git', '--literal-pathspecs', 'diff', '--staged', '-U0',
+            '--no-color', '--no-ext-diff', '--no-renames', '--relative',
+            '--src-prefix=a/', '--dst-prefix=b/',
+            '--', *filenames[i:i + _PATHSPECS_PER_CALL],
+        )
+        lines: list[tuple[int, bytes]] | None = None
+        in_header = added = False
+        lineno = 0
+        for line in io.BytesIO(out):
+            if line.startswith(b'\\'):
+                # `\ No newline at end of file`, about the line before
+                if added and lines:
+                    lines[-1] = (lines[-1][0], lines[-1][1].rstrip(b'\n'))
+                continue
+            added = False
+            if line.startswith(b'diff --git '):
+                lines, in_header = None, True
+            elif in_header and line.startswith(b'+++ '):
+                # git adds a tab after paths containing a space
+                path = _unquote_path(line[len(b'+++ '):].rstrip(b'\t\n'))
+                if path.startswith('b/'):
+                    lines = path_lines.get(path[len('b/'):])
+            elif line.startswith(b'@@ '):
+                in_header = False
+                match = _HUNK_RE.match(line)
+                assert match is not None, line
+                lineno = int(match[1])
+            elif in_header or lines is None:
+                continue
+            elif line.startswith(b'+'):
+                lines.append((lineno, line[1:]))
+                lineno += 1
+                added = True
+    return {
+        filename: path_lines[path]
+        for path, spellings in by_path.items()
+        for filename in spellings
+    }
+
+
+def _jobs(s: str) -> int:
+    jobs = int(s)
+    if jobs < 0:
+        raise argparse.ArgumentTypeError('must be >= 0')
+    return jobs or os.cpu_count() or 1
+
+
+def add_execution_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        '-j', '--jobs', type=_jobs, default=1,
+        help=(
+            'Number of processes to check files with, 0 for one per cpu.  '
+            'default: %(default)s'
+        ),
+    )
+
+
+def add_files_from_arguments(
+        parser: argparse.ArgumentParser,
+        *,
+        types: Sequence[str] = (),
+        files: str = '',
+) -> None:
+    """`--files-from` and `--all-files`, the latter selecting the tracked
+    files with all of `types` (as in the hook's manifest entry) whose paths
+    match `files`"""
+    parser.add_argument(
+        '--files-from', metavar='PATH',
+        help=(
+            'Also read filenames from PATH (`-` for stdin), one per line.  '
+            'For checking more files in one process than fit on a command '
+            'line.'
+        ),
+    )
+    parser.add_argument(
+        '-z', '--null', action='store_true',
+        help='`--files-from` filenames are separated by NUL, not newlines.',
+    )
+    parser.add_argument(
+        '--all-files', action='store_true',
+        help=(
+            'Also check every file tracked by git which the hook applies to, '
+            'listed from the index rather than passed as arguments.'
+        ),
+    )
+    parser.add_argument(
+        '--files', metavar='REGEX', default=files,
+        help=(
+            'With `--all-files`, only paths matching REGEX.  '
+            'default: %(default)r'
+        ),
+    )
+    parser.add_argument(
+        '--exclude', metavar='REGEX', default='^$',
+        help='With `--all-files`, skip paths matching REGEX.',
+    )
+    parser.set_defaults(file_types=tuple(types))
+
+
+def _read_files_from(path: str, *, null: bool) -> list[str]:
+    if path == '-':
+        contents = sys.stdin.buffer.read()
+    else:
+        with open(path, 'rb') as f:
+            contents = f.read()
+    sep = b'\0' if null else b'\n'
+    return [os.fsdecode(name) for name in contents.split(sep) if name]
+
+
+def parse_args(
+        parser: argparse.ArgumentParser,
+        argv: Sequence[str] | None,
+        *,
+        require_filenames: bool = False,
+) -> argparse.Namespace:
+    """`parser.parse_args`, adding the `--files-from` and `--all-files`
+    filenames"""
+    args = parser.parse_args(argv)
+    if args.files_from is not None:
+        args.filenames = [
+            *args.filenames,
+            *_read_files_from(args.files_from, null=args.null),
+        ]
+    if args.all_files:
+        from pre_commit_hooks.all_files import all_files
+
+        args.filenames = [
+            *args.filenames,
+            *all_files(args.file_types, args.files, args.exclude),
+        ]
+    if require_filenames and not args.filenames:
+        parser.error('the following arguments are required: filenames')
+    return args
+
+
+def parse_hook_ids(s: str, hook_ids: Collection[str]) -> list[str]:
+    """The comma separated ids of `--hooks`, each one of `hook_ids` (else an
+    `argparse.ArgumentTypeError`)"""
+    ret = [hook_id.strip() for hook_id in s.split(',') if hook_id.strip()]
+    for hook_id in ret:
+        if hook_id not in hook_ids:
+            raise argparse.ArgumentTypeError(
+                f'unknown hook {hook_id!r} '
+                f'(choose from {", ".join(hook_ids)})',
+            )
+    return ret
+
+
+def add_hook_args_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        '--hook-args', action='append', default=[], metavar='HOOK=ARGS',
+        help=(
+            "A hook's arguments (shell quoted), as they are given to it at "
+            'commit time.  Can be given multiple times.'
+        ),
+    )
+
+
+def parse_hook_args(
+        parser: argparse.ArgumentParser,
+        hook_ids: Sequence[str],
+        hook_args: Sequence[str],
+) -> dict[str, list[str]]:
+    """The arguments of each of `hook_ids` from `--hook-args` (none if not
+    given), in the order of `hook_ids`"""
+    import shlex  # only for the watcher and runner
+
+    hook_argvs: dict[str, list[str]] = {hook_id: [] for hook_id in hook_ids}
+    for arg in hook_args:
+        hook_id, _, s = arg.partition('=')
+        if hook_id not in hook_argvs:
+            parser.error(f'--hook-args: {hook_id!r} is not one of --hooks')
+        hook_argvs[hook_id] = shlex.split(s)
+    return hook_argvs
+
+
+def add_cache_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        '--cache', action='store_true',
+        help=(
+            'Reuse the result for files whose contents were already checked '
+            'with the same arguments.  Results are kept in $GIT_DIR.'
+        ),
+    )
+
+
+def add_staged_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        '--staged', action='store_true',
+        help=(
+            'Check the contents staged in the git index rather than the '
+            'working tree.  Files which are not staged are read from the '
+            'working tree.'
+        ),
+    )
+
+
+def add_changed_lines_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        '--only-changed-lines', action='store_true',
+        help=(
+            'Only check the lines added in `git diff --staged`, taken from '
+            'the diff itself.  Files without staged changes are skipped.'
+        ),
+    )
+
+
+def _reads(s: str) -> int:
+    reads = int(s)
+    if reads < 0:
+        raise argparse.ArgumentTypeError('must be >= 0')
+    return reads
+
+
+def add_read_ahead_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        '--read-ahead', metavar='N', type=_reads, default=0,
+        help=(
+            'Keep up to N file reads in flight (on threads) while checking, '
+            'hiding the latency of slow / network filesystems.  Only used '
+            'with a single job.  default: %(default)s'
+        ),
+    )
+
+
+@contextlib.contextmanager
+def capture_output() -> Generator[tuple[io.BytesIO, io.BytesIO], None, None]:
+    """Redirect `sys.stdout` / `sys.stderr` (including `.buffer` writes)"""
+    out, err = io.BytesIO(), io.BytesIO()
+    stdout = io.TextIOWrapper(out, encoding='UTF-8', write_through=True)
+    stderr = io.TextIOWrapper(err, encoding='UTF-8', write_through=True)
+    try:
+        with contextlib.redirect_stdout(stdout):
+            with contextlib.redirect_stderr(stderr):
+                yield out, err
+    finally:
+        # don't let the wrappers close the buffers when they are collected
+        stdout.detach()
+        stderr.detach()
+
+
+def write_output(stream: IO[str], data: bytes) -> None:
+    if data:
+        stream.flush()
+        stream.buffer.write(data)  # type: ignore[attr-defined]
+        stream.buffer.flush()  # type: ignore[attr-defined]
+
+
+def _call_captured(
+        func: Callable[[str], int],
+        filename: str,
+) -> tuple[int, bytes, bytes]:
+    with capture_output() as (out, err):
+        ret = func(filename)
+    return ret, out.getvalue(), err.getvalue()
+
+
+def prepare_func(func: Callable[[str], int], filenames: list[str]) -> None:
+    """Call `func.prepare(filenames)`, if it has one, before the files"""
+    prepare = getattr(func, 'prepare', None)
+    if prepare is not None:
+        prepare(filenames)
+
+
+def close_func(func: Callable[[str], int]) -> None:
+    """Call `func.close()`, if it has one, when done with the files"""
+    close = getattr(func, 'close', None)
+    if close is not None:
+        close()
+
+
+def map_files(
+        func: Callable[[str], int],
+        filenames: Iterable[str],
+        args: argparse.Namespace,
+) -> list[int]:
+    """Call `func(filename)` for each filename, returning the results in order.
+
+    With `--jobs` greater than one the files are spread over a process pool.
+    Output of each call is buffered in the worker and replayed in input order
+    so it is the same as for a serial run.  `func` must be picklable
+    (a module-level function or a `functools.partial` of one).
+
+    With `--cache` (see `add_cache_argument`) results are looked up in /
+    stored to the persistent results cache.
+
+    With `$PRE_COMMIT_HOOKS_PROFILE` set each call is profiled (see
+    `profiling`).
+
+    If `func` has a `prepare(filenames)` (see `prepare_func`) it's called
+    with the files before they are, and a `close()` (see `close_func`) when
+    done with them.  In a pool each worker does so for each batch it takes,
+    so `func` can read what its files need in bulk there, rather than for
+    all the files up front (and pickled to each worker).
+    """
+    filenames = list(filenames)
+    with contextlib.ExitStack() as ctx:
+        if getattr(args, 'cache', False):
+            from pre_commit_hooks.cache import cached
+
+            func = ctx.enter_context(cached(func, args))
+        if profiling.enabled():
+            func = profiling.Profiled(func)
+        ctx.callback(close_func, func)
+        return _map_files(func, filenames, getattr(args, 'jobs', 1))
+
+
+class _FileContents:
+    def __init__(self, func: Callable[[str, bytes], int]) -> None:
+        self.__wrapped__ = func
+        # read by `blob_id` (for the results cache), for the call which follows
+        self.kept: tuple[str, bytes] | None = None
+
+    def blob_id(self, filename: str) -> str:
+        from pre_commit_hooks.cache import blob_id
+
+        self.kept = (filename, _read_file(filename))
+        return blob_id(self.kept[1])
+
+    def __call__(self, filename: str) -> int:
+        kept, self.kept = self.kept, None
+        if kept is not None and kept[0] == filename:
+            return self.__wrapped__(filename, kept[1])
+        else:
+            return self.__wrapped__(filename, _read_file(filename))
+
+
+class _StagedContents:
+    def __init__(
+            self,
+            func: Callable[[str, bytes], int],
+            filenames: Sequence[str],
+    ) -> None:
+        self.__wrapped__ = func
+        self.blob_ids = staged_blob_ids(filenames)
+        # of the files being checked, see `prepare`
+        self.contents: dict[str, bytes | None] = {}
+        # those which aren't staged are read from the working tree
+        self.unstaged = _FileContents(func)
+
+    def blob_id(self, filename: str) -> str:
+        oid = self.blob_ids.get(filename)
+        return oid if oid is not None else self.unstaged.blob_id(filename)
+
+    def prepare(self, filenames: list[str]) -> None:
+        oids = [self.blob_ids[f] for f in filenames if f in self.blob_ids]
+        with GitCatFile() as cat_file:
+            self.contents = dict(zip(oids, cat_file.contents(oids)))
+
+    def close(self) -> None:
+        self.contents = {}
+
+    def __call__(self, filename: str) -> int:
+        oid = self.blob_ids.get(filename)
+        if oid is not None and oid not in self.contents:
+            self.prepare([filename])
+        contents = self.contents.get(oid) if oid is not None else None
+        if contents is None:  # not staged
+            return self.unstaged(filename)
+        else:
+            return self.__wrapped__(filename, contents)
+
+
+class _Buffers:
+    def __init__(self, func: Callable[[str, Contents], int]) -> None:
+        self.__wrapped__ = func
+
+    def __call__(self, filename: str, contents: bytes) -> int:
+        return self.__wrapped__(filename, Contents(contents))
+
+
+class _FileBuffers:
+    def __init__(self, func: Callable[[str, Contents], int]) -> None:
+        self.__wrapped__ = func
+        # opened by `blob_id` (for the results cache), for the call which
+        # follows
+        self.kept: tuple[str, Contents] | None = None
+
+    def blob_id(self, filename: str) -> str:
+        from pre_commit_hooks.cache import blob_id
+
+        self.close()
+        self.kept = (filename, Contents.open(filename))
+        return blob_id(self.kept[1].data)
+
+    def close(self) -> None:
+        if self.kept is not None:
+            self.kept[1].close()
+            self.kept = None
+
+    def __call__(self, filename: str) -> int:
+        kept, self.kept = self.kept, None
+        if kept is not None and kept[0] == filename:
+            contents = kept[1]
+        else:
+            if kept is not None:
+                kept[1].close()
+            contents = Contents.open(filename)
+        with contents:
+            return self.__wrapped__(filename, contents)
+
+
+def _read_file(filename: str) -> bytes:
+    with open(filename, 'rb') as f:
+        return f.read()
+
+
+def read_ahead(
+        filenames: Iterable[str],
+        reads: int,
+) -> Generator[tuple[str, bytes], None, None]:
+    """`(filename, contents)` of each file in order, reading up to `reads`
+    files ahead on a thread pool while the caller works on the current one.
+
+    A read's error is raised when its file is reached.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    it = iter(filenames)
+    with ThreadPoolExecutor(max_workers=reads) as executor:
+        pending = collections.deque(
+            (filename, executor.submit(_read_file, filename))
+            for filename in itertools.islice(it, reads)
+        )
+        try:
+            while pending:
+                filename, future = pending.popleft()
+                for next_filename in itertools.islice(it, 1):
+                    future_next = executor.submit(_read_file, next_filename)
+                    pending.append((next_filename, future_next))
+                yield filename, future.result()
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+
+class _ReadAhead:
+    def __init__(
+            self,
+            func: Callable[[str, bytes], int],
+            filenames: Sequence[str],
+            reads: int,
+    ) -> None:
+        self.__wrapped__ = func
+        self.files = read_ahead(filenames, reads)
+        self.current: tuple[str, bytes] | None = None
+
+    def _contents(self, filename: str) -> bytes:
+        # files are used in order, those skipped (cached results) are dropped
+        while self.current is None or self.current[0] != filename:
+            self.current = next(self.files, None)
+            if self.current is None:  # not in order after all
+                return _read_file(filename)
+        return self.current[1]
+
+    def blob_id(self, filename: str) -> str:
+        from pre_commit_hooks.cache import blob_id
+
+        return blob_id(self._contents(filename))
+
+    def __call__(self, filename: str) -> int:
+        return self.__wrapped__(filename, self._contents(filename))
+
+
+def _read_ahead(filenames: Sequence[str], args: argparse.Namespace) -> int:
+    """How many files to read ahead, 0 when not reading ahead"""
+    if getattr(args, 'staged', False):
+        return 0
+    elif min(getattr(args, 'jobs', 1), len(filenames)) > 1:
+        return 0  # each process reads its own files
+    else:
+        return getattr(args, 'read_ahead', 0)
+
+
+def map_buffers(
+        func: Callable[[str, Contents], int],
+        filenames: Iterable[str],
+        args: argparse.Namespace,
+) -> list[int]:
+    """`map_contents` for a `func(filename, contents: Contents)`.
+
+    Large working tree files are memory-mapped instead of read, so they are
+    never copied into memory as a whole (unless reading ahead, see
+    `map_contents`).
+    """
+    filenames = list(filenames)
+    per_file: Callable[[str], int]
+    reads = _read_ahead(filenames, args)
+    if reads:
+        per_file = _ReadAhead(_Buffers(func), filenames, reads)
+    elif getattr(args, 'staged', False):
+        per_file = _StagedContents(_Buffers(func), filenames)
+    else:
+        per_file = _FileBuffers(func)
+    return map_files(per_file, filenames, args)
+
+
+def map_contents(
+        func: Callable[[str, bytes], int],
+        filenames: Iterable[str],
+        args: argparse.Namespace,
+) -> list[int]:
+    """`map_files` for a `func(filename, contents)`.
+
+    With `--staged` (see `add_staged_argument`) the contents are the ones in
+    the index, read in bulk (for each batch, with `--jobs`) rather than the
+    working tree's.  With `--read-ahead` (see `add_read_ahead_argument`) the
+    next files are read on threads while `func` checks the current one.
+    """
+    filenames = list(filenames)
+    per_file: Callable[[str], int]
+    reads = _read_ahead(filenames, args)
+    if reads:
+        per_file = _ReadAhead(func, filenames, reads)
+    elif getattr(args, 'staged', False):
+        per_file = _StagedContents(func, filenames)
+    else:
+        per_file = _FileContents(func)
+    return map_files(per_file, filenames, args)
+
+
+NumberedLines = Iterable[Tuple[int, bytes]]
+
+
+class _NumberedLines:
+    def __init__(self, func: Callable[[str, NumberedLines], int]) -> None:
+        self.__wrapped__ = func
+
+    def __call__(self, filename: str, contents: Contents) -> int:
+        return self.__wrapped__(filename, enumerate(contents.lines(), 1))
+
+
+class _ChangedLines:
+    def __init__(self, func: Callable[[str, NumberedLines], int]) -> None:
+        self.__wrapped__ = func
+        # of the files being checked, see `prepare`
+        self.lines: dict[str, list[tuple[int, bytes]]] = {}
+
+    def prepare(self, filenames: list[str]) -> None:
+        self.lines = changed_lines(filenames)
+
+    def close(self) -> None:
+        self.lines = {}
+
+    def __call__(self, filename: str) -> int:
+        if filename not in self.lines:
+            self.prepare([filename])
+        return self.__wrapped__(filename, self.lines[filename])
+
+
+def map_lines(
+        func: Callable[[str, NumberedLines], int],
+        filenames: Iterable[str],
+        args: argparse.Namespace,
+) -> list[int]:
+    """`map_buffers` for a `func(filename, numbered_lines)`.
+
+    The lines are `(line number, line)` pairs, numbered from 1 and keeping
+    their line endings.  With `--only-changed-lines` (see
+    `add_changed_lines_argument`) they are only the lines added in the staged
+    diff, from a single `git diff` for all the files (for each batch, with
+    `--jobs`).  As in `git diff`, binary files have none then.
+    """
+    filenames = list(filenames)
+    if getattr(args, 'only_changed_lines', False):
+        return map_files(_ChangedLines(func), filenames, args)
+    else:
+        return map_buffers(_NumberedLines(func), filenames, args)
+
+
+def _size(filename: str) -> int:
+    try:
+        return os.stat(filename).st_size
+    except OSError:
+        return 0
+
+
+def _lpt_batches(sizes: Sequence[int], jobs: int) -> list[list[int]]:
+    """Indices of `sizes` in batches for a pool of `jobs` workers.
+
+    Batches are ordered largest first and each worker takes the next batch
+    when it is done with one, the longest-processing-time heuristic: a large
+    file is started early rather than holding up the end of the run.  Small
+    files are batched together, up to a quarter of a worker's share.
+    """
+    order = sorted(range(len(sizes)), key=sizes.__getitem__, reverse=True)
+    max_size = max(1, sum(sizes) // (jobs * 4))
+    max_count = max(1, len(sizes) // (jobs * 4))
+    batches = []
+    batch: list[int] = []
+    batch_size = 0
+    for i in order:
+        batch.append(i)
+        batch_size += sizes[i]
+        if batch_size >= max_size or len(batch) >= max_count:
+            batches.append(batch)
+            batch = []
+            batch_size = 0
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+# a pool worker's copy of the `func` of `_map_files`
+_worker_func: Callable[[str], int] | None = None
+
+
+def _init_worker(
+        func: Callable[[str], int],
+) -> None:  # pragma: no cover (pool worker)
+    global _worker_func
+    _worker_func = func
+
+
+def _call_batch(
+        filenames: list[str],
+) -> list[tuple[int, bytes, bytes]]:  # pragma: no cover (pool worker)
+    func = _worker_func
+    assert func is not None
+    prepare_func(func, filenames)
+    try:
+        return [_call_captured(func, filename) for filename in filenames]
+    finally:
+        close_func(func)
+
+
+def _map_files(
+        func: Callable[[str], int],
+        filenames: list[str],
+        jobs: int,
+) -> list[int]:
+    jobs = min(jobs, len(filenames))
+    if jobs <= 1:
+        prepare_func(func, filenames)
+        return [func(filename) for filename in filenames]
+
+    from concurrent.futures import as_completed
+    from concurrent.futures import ProcessPoolExecutor
+
+    batches = _lpt_batches([_size(filename) for filename in filenames], jobs)
+    done: dict[int, tuple[int, bytes, bytes]] = {}
+    retvs: list[int] = []
+    # `func` is pickled once per worker rather than with each batch
+    with ProcessPoolExecutor(
+            max_workers=jobs, initializer=_init_worker, initargs=(func,),
+    ) as executor:
+        futures = {
+            executor.submit(_call_batch, [filenames[i] for i in batch]): batch
+            for batch in batches
+        }
+        for future in as_completed(futures):
+            done.update(zip(futures[future], future.result()))
+            # replay the output in input order as far as it is complete
+            while len(retvs) in done:
+                ret, out, err = done.pop(len(retvs))
+                write_output(sys.stdout, out)
+                write_output(sys.stderr, err)
+                retvs.append(ret)
+    return retvs
+
+
+def _call_ranges(
+        func: Callable[[str, int, int], T],
+        ranges: list[tuple[str, int, int]],
+) -> list[T]:  # pragma: no cover (pool worker)
+    return [func(*file_range) for file_range in ranges]
+
+
+def map_ranges(
+        func: Callable[[str, int, int], T],
+        filenames: Sequence[str],
+        args: argparse.Namespace,
+) -> list[list[T]]:
+    """Call `func(filename, start, end)` for the `split_lines` byte ranges
+    (of `SPLIT_SIZE`) of each file, returning each file's results in range
+    order.
+
+    For hooks which can work on part of a file: with `--jobs` the ranges of
+    a large file are spread over the process pool (largest first, like
+    `map_files`).  `func` must not print.
+    """
+    ranges = []
+    owners = []
+    for n, filename in enumerate(filenames):
+        for start, end in split_lines(filename, SPLIT_SIZE):
+            ranges.append((filename, start, end))
+            owners.append(n)
+
+    jobs = min(getattr(args, 'jobs', 1), len(ranges))
+    if jobs <= 1:
+        results = [func(*file_range) for file_range in ranges]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        sizes = [end - start for _, start, end in ranges]
+        batches = _lpt_batches(sizes, jobs)
+        by_index: dict[int, T] = {}
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            batch_results = executor.map(
+                functools.partial(_call_ranges, func),
+                [[ranges[i] for i in batch] for batch in batches],
+            )
+            for batch, batch_result in zip(batches, batch_results):
+                by_index.update(zip(batch, batch_result))
+        results = [by_index[i] for i in range(len(ranges))]
+
+    ret: list[list[T]] = [[] for _ in filenames]
+    for n, result in zip(owners, results):
+        ret[n].append(result)
+    return ret
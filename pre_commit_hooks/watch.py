@@ -0,0 +1,293 @@
+"""Re-run hooks on the files which change, as they are saved.
+
+`pre-commit-hooks-watch --hooks check-yaml,check-json,trailing-whitespace`
+watches the work tree with inotify (Linux only, through ctypes) and runs each
+hook on the tracked files of its types as they are written, with the hooks
+imported once.  Checkers which take `--cache` store their results in the
+results cache (see `cache`), a commit-time run with `--cache` then finds them
+there rather than checking again.  Fixers fix the files as they are saved.
+Which files fail is kept between runs and summarized after each.
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import ctypes
+import functools
+import importlib
+import os
+import select
+import struct
+import sys
+from typing import Callable
+from typing import Generator
+from typing import Iterable
+from typing import NamedTuple
+from typing import Sequence
+from typing import TYPE_CHECKING
+
+from pre_commit_hooks.all_files import tags
+from pre_commit_hooks.git_index import ls_paths
+from pre_commit_hooks.util import add_hook_args_argument
+from pre_commit_hooks.util import CalledProcessError
+from pre_commit_hooks.util import parse_hook_args
+from pre_commit_hooks.util import parse_hook_ids
+
+if TYPE_CHECKING:
+    from typing import Protocol
+
+    class Watcher(Protocol):
+        """What `changes` uses of an `Inotify`"""
+
+        def add_watch(self, path: str) -> None: ...
+
+        def read(
+                self,
+                timeout: float | None = None,
+        ) -> list[tuple[str, int]]: ...
+
+# from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+# wd, mask, cookie, length of the name which follows
+_EVENT = struct.Struct('iIII')
+_READ_SIZE = 64 * 1024
+
+
+class Hook(NamedTuple):
+    module: str
+    types: tuple[str, ...]
+    # whether the hook takes `--cache`
+    cache: bool = False
+
+
+HOOKS = {
+    'check-ast': Hook('check_ast', ('python',), cache=True),
+    'check-builtin-literals': Hook(
+        'check_builtin_literals', ('python',), cache=True,
+    ),
+    'check-byte-order-marker': Hook('check_byte_order_marker', ('text',)),
+    'check-docstring-first': Hook(
+        'check_docstring_first', ('python',), cache=True,
+    ),
+    'check-json': Hook('check_json', ('json',), cache=True),
+    'check-toml': Hook('check_toml', ('toml',), cache=True),
+    'check-vcs-permalinks': Hook('check_vcs_permalinks', ('text',)),
+    'check-xml': Hook('check_xml', ('xml',), cache=True),
+    'check-yaml': Hook('check_yaml', ('yaml',), cache=True),
+    'debug-statements': Hook('debug_statement_hook', ('python',), cache=True),
+    'detect-private-key': Hook('detect_private_key', ('text',)),
+    'double-quote-string-fixer': Hook('string_fixer', ('python',)),
+    'end-of-file-fixer': Hook('end_of_file_fixer', ('text',)),
+    'fix-byte-order-marker': Hook('fix_byte_order_marker', ('text',)),
+    'mixed-line-ending': Hook('mixed_line_ending', ('text',)),
+    'pretty-format-json': Hook('pretty_format_json', ('json',)),
+    'trailing-whitespace': Hook('trailing_whitespace_fixer', ('text',)),
+}
+
+
+def _check_call(ret: int, *args: str) -> int:
+    if ret == -1:
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno), *args)
+    return ret
+
+
+class Inotify:
+    """An inotify instance watching directories for written files"""
+
+    def __init__(self) -> None:
+        libc = ctypes.CDLL(None, use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError('inotify is not available on this platform')
+        self._libc = libc
+        self.fd = _check_call(libc.inotify_init1(os.O_CLOEXEC))
+        # watch descriptor -> directory
+        self.dirs: dict[int, str] = {}
+
+    def add_watch(self, path: str) -> None:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), _MASK)
+        self.dirs[_check_call(wd, path)] = path
+
+    def read(self, timeout: float | None = None) -> list[tuple[str, int]]:
+        """`(path, mask)` of the events within `timeout` seconds (forever if
+        `None`).  An overflowed queue is reported with an empty path."""
+        readable, _, _ = select.select((self.fd,), (), (), timeout)
+        if not readable:
+            return []
+
+        data = os.read(self.fd, _READ_SIZE)
+        ret = []
+        pos = 0
+        while pos < len(data):
+            wd, mask, _, size = _EVENT.unpack_from(data, pos)
+            pos += _EVENT.size
+            name = os.fsdecode(data[pos:pos + size].rstrip(b'\0'))
+            pos += size
+            if mask & IN_Q_OVERFLOW:
+                ret.append(('', mask))
+            elif wd in self.dirs:
+                path = os.path.normpath(os.path.join(self.dirs[wd], name))
+                ret.append((path, mask))
+        return ret
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+    def __enter__(self) -> Inotify:
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+
+def tracked_dirs(paths: Iterable[str]) -> set[str]:
+    """The directories containing `paths`, and their parents"""
+    ret = {'.'}
+    for path in paths:
+        path = os.path.dirname(path)
+        while path and path not in ret:
+            ret.add(path)
+            path = os.path.dirname(path)
+    return ret
+
+
+def _watch_new_dir(inotify: Watcher, path: str) -> list[str]:
+    """Watch a new directory, returning the files already written to it"""
+    files: list[str] = []
+    for root, _, filenames in os.walk(path):
+        try:
+            inotify.add_watch(root)
+        except OSError:  # already removed again
+            continue
+        files.extend(os.path.join(root, filename) for filename in filenames)
+    return files
+
+
+def changes(
+        inotify: Watcher,
+        delay: float,
+) -> Generator[set[str] | None, None, None]:
+    """The files written, each time there are some.  `None` when events were
+    lost, any file might have changed."""
+    while True:
+        events = inotify.read()
+        # editors write files in several steps, wait for them to settle
+        while True:
+            more = inotify.read(delay)
+            if not more:
+                break
+            events.extend(more)
+
+        changed: set[str] = set()
+        overflowed = False
+        for path, mask in events:
+            if mask & IN_Q_OVERFLOW:
+                overflowed = True
+            elif mask & IN_ISDIR:
+                changed.update(_watch_new_dir(inotify, path))
+            else:
+                changed.add(path)
+        yield None if overflowed else changed
+
+
+def _exit_code(main: Callable[[Sequence[str]], int], argv: list[str]) -> int:
+    try:
+        return main(argv)
+    except SystemExit as e:  # an argument error
+        return 1 if e.code else 0
+
+
+def check(
+        hook_argvs: dict[str, list[str]],
+        filenames: Iterable[str],
+        failing: set[tuple[str, str]],
+) -> None:
+    """Run the hooks over the tracked ones of `filenames`, updating the
+    `(hook id, filename)` pairs which are `failing`"""
+    for filename in sorted(ls_paths().intersection(filenames)):
+        failing -= {(hook_id, filename) for hook_id in hook_argvs}
+        try:
+            file_tags = tags(filename)
+        except OSError:  # since deleted
+            continue
+
+        for hook_id, hook_argv in hook_argvs.items():
+            hook = HOOKS[hook_id]
+            if not file_tags.issuperset(hook.types):
+                continue
+            module = importlib.import_module(f'pre_commit_hooks.{hook.module}')
+            argv = [*hook_argv, *(('--cache',) if hook.cache else ())]
+            if _exit_code(module.main, [*argv, '--', filename]):
+                failing.add((hook_id, filename))
+
+
+def _summarize(failing: set[tuple[str, str]]) -> None:
+    if failing:
+        print(f'{len(failing)} failing:')
+        for hook_id, filename in sorted(failing):
+            print(f'    {hook_id}: {filename}')
+    else:
+        print('all passing')
+    sys.stdout.flush()
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--hooks', required=True,
+        type=functools.partial(parse_hook_ids, hook_ids=HOOKS),
+        metavar='HOOK[,HOOK,...]',
+        help=f'Hooks to run.  Choose from: {", ".join(HOOKS)}',
+    )
+    add_hook_args_argument(parser)
+    parser.add_argument(
+        '--initial', action='store_true',
+        help='Also check every tracked file once at startup.',
+    )
+    parser.add_argument(
+        '--delay', type=float, default=.1,
+        help=(
+            'Seconds to wait for further writes before checking.  '
+            'default: %(default)s'
+        ),
+    )
+    args = parser.parse_args(argv)
+
+    hook_argvs = parse_hook_args(parser, args.hooks, args.hook_args)
+    # imported once, up front
+    for hook_id in hook_argvs:
+        importlib.import_module(f'pre_commit_hooks.{HOOKS[hook_id].module}')
+
+    failing: set[tuple[str, str]] = set()
+    with contextlib.ExitStack() as stack:
+        try:
+            inotify = stack.enter_context(Inotify())
+            paths = ls_paths()
+            for path in sorted(tracked_dirs(paths)):
+                inotify.add_watch(path)
+        except (CalledProcessError, OSError) as e:
+            print(f'pre-commit-hooks-watch: {e}', file=sys.stderr)
+            return 1
+        print(f'watching {len(inotify.dirs)} directories')
+
+        try:
+            if args.initial:
+                check(hook_argvs, paths, failing)
+                _summarize(failing)
+            for changed in changes(inotify, args.delay):
+                if changed is None:
+                    changed = set(ls_paths())
+                check(hook_argvs, changed, failing)
+                _summarize(failing)
+        except KeyboardInterrupt:
+            pass
+    return int(bool(failing))
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,146 @@
+"""Measure the startup import cost of each console script.
+
+    python -m testing.importtime [--repeat N] [script ...]
+
+Each script's hook is imported in a fresh interpreter with `-X importtime` and
+the best of `--repeat` runs is compared against its budget.  Scripts which
+import one of `HEAVY_MODULES` up front fail regardless of time taken, those
+should only be imported by the code path which needs them.
+"""
+from __future__ import annotations
+
+import argparse
+import configparser
+import os.path
+import subprocess
+import sys
+from typing import NamedTuple
+from typing import Sequence
+
+from testing.util import TESTING_DIR
+
+SETUP_CFG = os.path.join(os.path.dirname(TESTING_DIR), 'setup.cfg')
+
+# what a console script imports to hand its hook to a running daemon (see
+# `pre_commit_hooks.client`), measured as `daemon-client`
+DAEMON_CLIENT = 'pre_commit_hooks.client, _socket'
+# which the daemon client never imports, whatever they cost on the day
+DAEMON_CLIENT_AVOIDS = frozenset((
+    'enum', 'hashlib', 'json', 're', 'socket', 'typing',
+))
+
+DEFAULT_BUDGET_MS = 40
+BUDGETS_MS = {
+    # imports each of the hooks it combines
+    'pre-commit-hooks-run': 60,
+    # the whole point of the daemon is not importing much
+    'daemon-client': 10,
+}
+
+HEAVY_MODULES = frozenset((
+    'concurrent.futures',
+    'configparser',
+    'difflib',
+    'ruamel.yaml',
+    'sqlite3',
+    'subprocess',
+    'tomli',
+    'tomllib',
+    'xml.sax',
+))
+# scripts which do need one of `HEAVY_MODULES` for every run
+ALLOWED_MODULES = {
+    'check-added-large-files': frozenset(('subprocess',)),
+}
+
+
+class ImportCost(NamedTuple):
+    us: int
+    modules: frozenset[str]
+
+
+def console_scripts(setup_cfg: str = SETUP_CFG) -> dict[str, str]:
+    """Map each console script to the module its hook lives in"""
+    cfg = configparser.ConfigParser()
+    cfg.read(setup_cfg)
+    ret = {}
+    for line in cfg['options.entry_points']['console_scripts'].splitlines():
+        if not line.strip():
+            continue
+        name, _, target = (part.strip() for part in line.partition('='))
+        module, _, attr = target.partition(':')
+        # the client entry points import the hook when there's no daemon
+        if module == 'pre_commit_hooks.client':
+            module = f'pre_commit_hooks.{attr}'
+        ret[name] = module
+    return ret
+
+
+def parse_importtime(output: str) -> list[tuple[str, int, bool]]:
+    """(module, cumulative us, whether it is a top-level import) per line"""
+    ret = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        ret.append((name.strip(), int(cumulative), not name.startswith('  ')))
+    return ret
+
+
+def _importtime(code: str) -> list[tuple[str, int, bool]]:
+    cmd = (sys.executable, '-X', 'importtime', '-c', code)
+    proc = subprocess.run(cmd, capture_output=True, check=True, text=True)
+    return parse_importtime(proc.stderr)
+
+
+def _import_cost(module: str, startup: set[str]) -> ImportCost:
+    imports = [
+        (name, us, top) for name, us, top in _importtime(f'import {module}')
+        if name not in startup
+    ]
+    us = sum(us for _, us, top in imports if top)
+    return ImportCost(us, frozenset(name for name, _, _ in imports))
+
+
+def import_cost(module: str, *, repeat: int = 1) -> ImportCost:
+    # imports done by interpreter startup itself aren't the hook's cost
+    startup = {name for name, _, _ in _importtime('pass')}
+    costs = [_import_cost(module, startup) for _ in range(repeat)]
+    return min(costs, key=lambda cost: cost.us)
+
+
+def heavy_imports(script: str, modules: frozenset[str]) -> list[str]:
+    allowed = ALLOWED_MODULES.get(script, frozenset())
+    return sorted((HEAVY_MODULES & modules) - allowed)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('scripts', nargs='*', help='default: all of them')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument(
+        '--budget-scale', type=float, default=1,
+        help='Multiply every budget, for slower machines.',
+    )
+    args = parser.parse_args(argv)
+
+    scripts = {**console_scripts(), 'daemon-client': DAEMON_CLIENT}
+    retv = 0
+    for script in args.scripts or sorted(scripts):
+        cost = import_cost(scripts[script], repeat=args.repeat)
+        budget = BUDGETS_MS.get(script, DEFAULT_BUDGET_MS) * args.budget_scale
+        ms = cost.us / 1000
+        status = 'ok'
+        if ms > budget:
+            status = 'over budget'
+            retv = 1
+        heavy = heavy_imports(script, cost.modules)
+        if heavy:
+            status = f'imports {", ".join(heavy)}'
+            retv = 1
+        print(f'{script}: {ms:.1f}ms / {budget:g}ms: {status}')
+    return retv
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
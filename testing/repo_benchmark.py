@@ -0,0 +1,216 @@
+"""Time the git-backed hooks against large synthetic repositories.
+
+    python -m testing.repo_benchmark [--sizes 10000,100000,1000000]
+                                     [--output results.json]
+                                     [--compare baseline.json]
+
+For each size a repository is generated (and kept in --workdir for later
+runs) with that many committed paths in a deep directory tree, some of them
+symlinks and executables, plus --staged new files.  The committed paths only
+exist in the index and HEAD, which is all these hooks look at for them.  Each
+hook is then run end to end (as `python -m`) on the staged files and the best
+of --repeat runs is recorded.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os.path
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any
+from typing import Sequence
+
+from testing.util import git_commit
+from testing.util import TESTING_DIR
+
+HOOKS = (
+    'check_added_large_files',
+    'check_case_conflict',
+    'check_executables_have_shebangs',
+    'destroyed_symlinks',
+)
+DEFAULT_SIZES = (10000, 100000, 1000000)
+
+FANOUT = 16
+SYMLINK_EVERY = 100
+EXECUTABLE_EVERY = 50
+
+_CONTENTS = {
+    '100644': b'hello world\n',
+    '100755': b'#!/usr/bin/env bash\necho hi\n',
+    '120000': b'../target',
+}
+
+
+def _path(i: int, depth: int) -> str:
+    dirs = [f'd{(i // FANOUT ** k) % FANOUT}' for k in reversed(range(depth))]
+    return '/'.join((*dirs, f'f{i}'))
+
+
+def _mode(i: int) -> str:
+    if i % SYMLINK_EVERY == 0:
+        return '120000'
+    elif i % EXECUTABLE_EVERY == 0:
+        return '100755'
+    else:
+        return '100644'
+
+
+def _git(repo: str, *cmd: str, **kwargs: Any) -> bytes:
+    return subprocess.run(
+        ('git', '-C', repo, *cmd), check=True, capture_output=True, **kwargs,
+    ).stdout
+
+
+def make_repo(path: str, paths: int, *, depth: int, staged: int) -> list[str]:
+    """Create the benchmark repository, returns the staged files"""
+    subprocess.check_call(('git', 'init', '--quiet', path))
+    blobs = {
+        mode: _git(path, 'hash-object', '-w', '--stdin', input=contents)
+        .decode().strip()
+        for mode, contents in _CONTENTS.items()
+    }
+    index_info = ''.join(
+        f'{_mode(i)} {blobs[_mode(i)]}\t{_path(i, depth)}\n'
+        for i in range(paths)
+    )
+    _git(path, 'update-index', '--index-info', input=index_info.encode())
+    git_commit('--quiet', '-m', 'benchmark', cwd=path)
+
+    files = []
+    # a symlink replaced by the file it pointed to looks destroyed
+    for i in range(0, min(paths, staged * SYMLINK_EVERY), SYMLINK_EVERY):
+        files.append((_path(i, depth), '100644', _CONTENTS['120000']))
+    for i in range(staged - len(files)):
+        mode = '100755' if i % 2 else '100644'
+        files.append((f'staged/{_path(i, depth)}', mode, _CONTENTS[mode]))
+    for filename, mode, contents in files:
+        filename = os.path.join(path, filename)
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        with open(filename, 'wb') as f:
+            f.write(contents)
+        os.chmod(filename, int(mode[-3:], 8))
+    filenames = [filename for filename, _, _ in files]
+    _git(path, 'add', '--', *filenames)
+    return filenames
+
+
+def _repo(
+        workdir: str,
+        paths: int,
+        *,
+        depth: int,
+        staged: int,
+) -> tuple[str, list[str]]:
+    path = os.path.join(workdir, f'repo-{paths}-{depth}-{staged}')
+    manifest = os.path.join(workdir, f'repo-{paths}-{depth}-{staged}.json')
+    if os.path.exists(manifest):
+        with open(manifest) as f:
+            return path, json.load(f)
+    filenames = make_repo(path, paths, depth=depth, staged=staged)
+    with open(manifest, 'w') as f:
+        json.dump(filenames, f)
+    return path, filenames
+
+
+def time_hook(
+        hook: str,
+        repo: str,
+        filenames: Sequence[str],
+        *,
+        repeat: int,
+) -> dict[str, Any]:
+    env = {
+        **os.environ,
+        'PYTHONPATH': os.pathsep.join(
+            (os.path.dirname(TESTING_DIR), os.environ.get('PYTHONPATH', '')),
+        ),
+    }
+    cmd = (sys.executable, '-m', f'pre_commit_hooks.{hook}', *filenames)
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        proc = subprocess.run(cmd, cwd=repo, env=env, capture_output=True)
+        runs.append(time.perf_counter() - start)
+    return {'seconds': min(runs), 'runs': runs, 'returncode': proc.returncode}
+
+
+def compare(old: dict[str, Any], new: dict[str, Any]) -> list[str]:
+    def _by_key(results: dict[str, Any]) -> dict[tuple[str, int], float]:
+        return {
+            (result['hook'], result['paths']): result['seconds']
+            for result in results['results']
+        }
+
+    old_times, new_times = _by_key(old), _by_key(new)
+    ret = []
+    for key in sorted(old_times.keys() & new_times.keys()):
+        hook, paths = key
+        before, after = old_times[key], new_times[key]
+        ret.append(
+            f'{hook} ({paths} paths): {before:.3f}s -> {after:.3f}s '
+            f'(x{after / before:.2f})',
+        )
+    return ret
+
+
+def _sizes(s: str) -> list[int]:
+    return [int(size) for size in s.split(',')]
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--sizes', type=_sizes, default=DEFAULT_SIZES,
+        help='Comma separated numbers of committed paths.',
+    )
+    parser.add_argument('--depth', type=int, default=6)
+    parser.add_argument('--staged', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--hooks', nargs='*', default=HOOKS, choices=HOOKS)
+    parser.add_argument(
+        '--workdir', default=os.path.join(tempfile.gettempdir(), 'pch-bench'),
+        help='Where generated repositories are kept.  default: %(default)s',
+    )
+    parser.add_argument('--output', help='Write the results as json.')
+    parser.add_argument('--compare', help='Results json to compare against.')
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.workdir, exist_ok=True)
+    results = []
+    for paths in args.sizes:
+        repo, filenames = _repo(
+            args.workdir, paths, depth=args.depth, staged=args.staged,
+        )
+        for hook in args.hooks:
+            result = time_hook(hook, repo, filenames, repeat=args.repeat)
+            print(f'{hook} ({paths} paths): {result["seconds"]:.3f}s')
+            results.append({'hook': hook, 'paths': paths, **result})
+
+    output = {
+        'python': sys.version,
+        'platform': platform.platform(),
+        'git': subprocess.check_output(('git', '--version')).decode().strip(),
+        'depth': args.depth,
+        'staged': args.staged,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(output, f, indent=2)
+            f.write('\n')
+    if args.compare:
+        with open(args.compare) as f:
+            old = json.load(f)
+        print('compared to', args.compare)
+        for line in compare(old, output):
+            print(line)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
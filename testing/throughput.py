@@ -0,0 +1,230 @@
+"""Measure the throughput of the hooks' per-file functions against fixed
+corpora, failing on a regression from the stored baseline.
+
+    python -m testing.throughput [--scale N] [--repeat N] [--tolerance F]
+                                 [--update] [benchmark ...]
+
+Each benchmark's corpus is generated (the same every time) and rewritten
+before each run, so fixers always have something to fix.  The best of
+--repeat runs is compared against `BASELINE`: a benchmark fails when its
+MB/s or files/s fall more than --tolerance below it.  --update records the
+results as the new baseline instead.
+
+`tests/throughput_test.py` runs each benchmark only when selected with
+`pytest -m benchmark`, timings are too noisy for every run.
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import os.path
+import platform
+import sys
+import tempfile
+import time
+from typing import Any
+from typing import Callable
+from typing import Mapping
+from typing import NamedTuple
+from typing import Sequence
+
+from pre_commit_hooks import check_docstring_first
+from pre_commit_hooks import mixed_line_ending
+from pre_commit_hooks import requirements_txt_fixer
+from pre_commit_hooks import string_fixer
+from pre_commit_hooks import trailing_whitespace_fixer
+from testing.util import TESTING_DIR
+
+BASELINE = os.path.join(TESTING_DIR, 'throughput_baseline.json')
+FILES = 10
+
+
+class Benchmark(NamedTuple):
+    # `scale` -> file contents, one per file
+    corpus: Callable[[int], list[bytes]]
+    run: Callable[[Sequence[str]], object]
+
+
+def _text(scale: int) -> list[bytes]:
+    lines = [
+        f'{i},some,comma separated,words{" " * (i % 3)}'.encode()
+        for i in range(20000 * scale)
+    ]
+    return [
+        b''.join(
+            line + (b'\r\n' if i % 7 == n % 7 else b'\n')
+            for i, line in enumerate(lines)
+        )
+        for n in range(FILES)
+    ]
+
+
+def _python(scale: int) -> list[bytes]:
+    func = (
+        'def f{i}(x, y="default"):\n'
+        '    """docstring {i}"""\n'
+        '    # a comment\n'
+        '    d = {{"key": x, "other": [y, "{i}", \'single\']}}\n'
+        '    return d["key"] + f"{{x}}"\n'
+        '\n\n'
+    )
+    src = '"""module docstring"""\n\n\n' + ''.join(
+        func.format(i=i) for i in range(100 * scale)
+    )
+    return [src.encode()] * FILES
+
+
+def _requirements(scale: int) -> list[bytes]:
+    n = 500 * scale
+    # shuffled, the same way every time
+    order = sorted(range(n), key=lambda i: (i * 7919) % n)
+    lines = [
+        f'# pinned {i}\npackage-{i}[extra]=={i}.0.{i % 10}\n'.encode()
+        for i in order
+    ]
+    return [b''.join(lines)] * FILES
+
+
+def _trailing_whitespace(filenames: Sequence[str]) -> None:
+    for filename in filenames:
+        trailing_whitespace_fixer._fix_file(filename, False, None)
+
+
+def _mixed_line_ending(filenames: Sequence[str]) -> None:
+    for filename in filenames:
+        mixed_line_ending.fix_filename(filename, 'auto')
+
+
+def _string_fixer(filenames: Sequence[str]) -> None:
+    for filename in filenames:
+        string_fixer.fix_strings(filename)
+
+
+def _docstring_first(filenames: Sequence[str]) -> None:
+    for filename in filenames:
+        with open(filename, 'rb') as f:
+            check_docstring_first.check_docstring_first(f.read(), filename)
+
+
+def _requirements_txt(filenames: Sequence[str]) -> None:
+    with contextlib.redirect_stdout(io.StringIO()):
+        for filename in filenames:
+            with open(filename, 'rb+') as f:
+                requirements_txt_fixer.fix_requirements(f)
+
+
+BENCHMARKS = {
+    'trailing_whitespace_fixer': Benchmark(_text, _trailing_whitespace),
+    'mixed_line_ending': Benchmark(_text, _mixed_line_ending),
+    'string_fixer': Benchmark(_python, _string_fixer),
+    'check_docstring_first': Benchmark(_python, _docstring_first),
+    'requirements_txt_fixer': Benchmark(_requirements, _requirements_txt),
+}
+
+
+def measure(
+        benchmark: Benchmark,
+        workdir: str,
+        *,
+        scale: int = 1,
+        repeat: int = 1,
+) -> dict[str, float]:
+    corpus = benchmark.corpus(scale)
+    filenames = [os.path.join(workdir, f'f{i}') for i in range(len(corpus))]
+    seconds = []
+    for _ in range(repeat):
+        for filename, contents in zip(filenames, corpus):
+            with open(filename, 'wb') as f:
+                f.write(contents)
+        start = time.perf_counter()
+        benchmark.run(filenames)
+        seconds.append(time.perf_counter() - start)
+    best = min(seconds)
+    size = sum(len(contents) for contents in corpus)
+    return {'mb_per_s': size / 1e6 / best, 'files_per_s': len(corpus) / best}
+
+
+def compare(
+        baseline: Mapping[str, float],
+        result: Mapping[str, float],
+        tolerance: float,
+) -> list[str]:
+    """The measures which regressed by more than `tolerance` (a fraction)"""
+    return [
+        key for key in ('mb_per_s', 'files_per_s')
+        if result[key] < baseline[key] * (1 - tolerance)
+    ]
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        'benchmarks', nargs='*', metavar='benchmark',
+        help=f'One of {", ".join(BENCHMARKS)}.  default: all of them',
+    )
+    parser.add_argument('--scale', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument(
+        '--tolerance', type=float, default=.25,
+        help=(
+            'Allowed slowdown from the baseline, as a fraction.  '
+            'default: %(default)s'
+        ),
+    )
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument(
+        '--update', action='store_true',
+        help='Record the results as the baseline instead of comparing.',
+    )
+    args = parser.parse_args(argv)
+    unknown = sorted(set(args.benchmarks) - set(BENCHMARKS))
+    if unknown:
+        parser.error(f'unknown benchmark: {", ".join(unknown)}')
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    else:
+        baseline = {'results': {}}
+
+    results: dict[str, Any] = {}
+    retv = 0
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in args.benchmarks or BENCHMARKS:
+            result = results[name] = measure(
+                BENCHMARKS[name], workdir,
+                scale=args.scale, repeat=args.repeat,
+            )
+            status = 'ok'
+            expected = baseline['results'].get(name)
+            if args.update:
+                status = 'recorded'
+            elif expected is None:
+                status = 'no baseline'
+            else:
+                regressed = compare(expected, result, args.tolerance)
+                if regressed:
+                    status = f'slower than baseline ({", ".join(regressed)})'
+                    retv = 1
+            print(
+                f'{name}: {result["mb_per_s"]:.1f} MB/s '
+                f'{result["files_per_s"]:.1f} files/s: {status}',
+            )
+
+    if args.update:
+        baseline = {
+            'python': sys.version,
+            'platform': platform.platform(),
+            'scale': args.scale,
+            'results': {**baseline['results'], **results},
+        }
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write('\n')
+    return retv
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
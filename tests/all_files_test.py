@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from pre_commit_hooks.all_files import all_files
+from pre_commit_hooks.all_files import tags
+from pre_commit_hooks.util import cmd_output
+from testing.util import git_commit
+
+
+@pytest.mark.parametrize(
+    ('contents', 'mode', 'expected'),
+    (
+        (b'{}', 0o644, {'file', 'non-executable', 'text', 'json'}),
+        (b'x\0y', 0o644, {'file', 'non-executable', 'binary'}),
+        (b'#!/bin/sh\n', 0o755, {'file', 'executable', 'text'}),
+        (b'#!\n', 0o755, {'file', 'executable', 'text'}),
+        (
+            b'#!/usr/bin/env -S python3.12 -u\n', 0o755,
+            {'file', 'executable', 'text', 'python'},
+        ),
+        (
+            b'#!/opt/pypy/bin/pypy3\n', 0o755,
+            {'file', 'executable', 'text', 'python'},
+        ),
+        # only executables are tagged by their interpreter
+        (b'#!/usr/bin/python\n', 0o644, {'file', 'non-executable', 'text'}),
+    ),
+)
+def test_tags(tmpdir, contents, mode, expected):
+    name = 'f.JSON' if contents == b'{}' else 'f'
+    f = tmpdir.join(name)
+    f.write_binary(contents)
+    f.chmod(mode)
+    assert tags(str(f)) == expected
+
+
+def test_tags_without_sniffing(tmpdir):
+    f = tmpdir.join('f')
+    f.write_binary(b'\0')
+    assert tags(str(f), sniff=False) == {'file', 'non-executable'}
+
+
+def test_tags_not_files(tmpdir):
+    tmpdir.join('link').mksymlinkto('missing')
+    assert tags(str(tmpdir.join('link'))) == {'symlink'}
+    assert tags(str(tmpdir)) == {'directory'}
+    os.mkfifo(tmpdir.join('fifo'))
+    assert tags(str(tmpdir.join('fifo'))) == set()
+    with pytest.raises(OSError):
+        tags(str(tmpdir.join('missing')))
+
+
+@pytest.fixture
+def repo(temp_git_dir):
+    with temp_git_dir.as_cwd():
+        temp_git_dir.join('a.py').write('')
+        temp_git_dir.join('b.txt').write('b\n')
+        temp_git_dir.join('bin').write_binary(b'\0')
+        temp_git_dir.join('sub').ensure_dir().join('c.yaml').write('')
+        temp_git_dir.join('deleted.py').write('')
+        temp_git_dir.join('untracked.py').write('')
+        cmd_output('git', 'add', 'a.py', 'b.txt', 'bin', 'sub', 'deleted.py')
+        os.remove('deleted.py')
+        yield temp_git_dir
+
+
+@pytest.mark.parametrize(
+    ('kwargs', 'expected'),
+    (
+        ({}, ['a.py', 'b.txt', 'bin', 'sub/c.yaml']),
+        ({'types': ('python',)}, ['a.py']),
+        ({'types': ('text',)}, ['a.py', 'b.txt', 'sub/c.yaml']),
+        ({'types': ('text', 'yaml')}, ['sub/c.yaml']),
+        ({'types': ('binary',)}, ['bin']),
+        ({'files': '^sub/'}, ['sub/c.yaml']),
+        ({'exclude': r'\.(py|txt)$'}, ['bin', 'sub/c.yaml']),
+    ),
+)
+def test_all_files(repo, kwargs, expected):
+    with repo.as_cwd():
+        assert list(all_files(**kwargs)) == expected
+
+
+def test_all_files_conflicted(temp_git_dir):
+    with temp_git_dir.as_cwd():
+        temp_git_dir.join('f').write('base\n')
+        cmd_output('git', 'add', 'f')
+        git_commit('-m', 'base')
+        cmd_output('git', 'checkout', '-b', 'other')
+        temp_git_dir.join('f').write('other\n')
+        git_commit('-am', 'other')
+        cmd_output('git', 'checkout', '-')
+        temp_git_dir.join('f').write('this\n')
+        git_commit('-am', 'this')
+        cmd_output('git', 'merge', 'other', retcode=None)
+        assert list(all_files()) == ['f']
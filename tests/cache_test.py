@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import argparse
+import functools
+import os.path
+import pickle
+import sqlite3
+import subprocess
+
+import pytest
+
+from pre_commit_hooks import cache
+from pre_commit_hooks import check_json
+from pre_commit_hooks.cache import blob_id
+from pre_commit_hooks.cache import Cached
+from pre_commit_hooks.cache import hook_version
+from pre_commit_hooks.cache import normalize_args
+from pre_commit_hooks.cache import ResultCache
+from pre_commit_hooks.util import cmd_output
+
+_calls: list[str] = []
+
+
+def _check(filename, *, fail_on=b'bad'):
+    _calls.append(filename)
+    with open(filename, 'rb') as f:
+        if fail_on in f.read():
+            print(f'{filename}: bad!')
+            return 1
+    return 0
+
+
+@pytest.fixture
+def calls():
+    _calls.clear()
+    yield _calls
+    _calls.clear()
+
+
+@pytest.fixture
+def result_cache(tmpdir):
+    yield ResultCache(str(tmpdir.join('cache', 'results.db')))
+
+
+def test_blob_id_matches_git(tmpdir):
+    f = tmpdir.join('f')
+    f.write_binary(b'hello world\n')
+    expected = subprocess.check_output(('git', 'hash-object', str(f)))
+    assert blob_id(b'hello world\n') == expected.decode().strip()
+
+
+def test_normalize_args():
+    args1 = argparse.Namespace(filenames=['a'], jobs=4, ignore={'b', 'a'})
+    args2 = argparse.Namespace(filenames=['b'], jobs=1, ignore={'a', 'b'})
+    args3 = argparse.Namespace(filenames=['b'], jobs=1, ignore={'a'})
+    args4 = argparse.Namespace(
+        filenames=[], jobs=1, ignore={'a', 'b'}, read_ahead=4,
+        all_files=True, files='^src/', exclude='^$',
+    )
+    assert normalize_args(args1) == normalize_args(args2)
+    assert normalize_args(args1) != normalize_args(args3)
+    assert normalize_args(args1) == normalize_args(args4)
+
+
+def test_normalize_args_other_types():
+    args = argparse.Namespace(key=bytes.lower, top_keys=['b', 'a'])
+    assert normalize_args(args) == (
+        '{"key": "<method \'lower\' of \'bytes\' objects>", '
+        '"top_keys": ["b", "a"]}'
+    )
+
+
+def test_cached_pass_shared_between_files(tmpdir, result_cache, calls):
+    f1, f2 = tmpdir.join('f1'), tmpdir.join('f2')
+    f1.write('ok')
+    f2.write('ok')
+    func = Cached(_check, argparse.Namespace(), result_cache)
+    assert func(str(f1)) == 0
+    assert func(str(f2)) == 0
+    assert calls == [str(f1)]
+
+
+def test_cached_failure_replays_output(tmpdir, result_cache, calls, capsys):
+    f1, f2 = tmpdir.join('f1'), tmpdir.join('f2')
+    f1.write('bad')
+    f2.write('bad')
+    func = Cached(_check, argparse.Namespace(), result_cache)
+    assert func(str(f1)) == 1
+    assert func(str(f1)) == 1
+    assert func(str(f2)) == 1
+    # failures are keyed by filename as the output names the file
+    assert calls == [str(f1), str(f2)]
+    out, _ = capsys.readouterr()
+    assert out == f'{f1}: bad!\n{f1}: bad!\n{f2}: bad!\n'
+
+
+def test_cache_key_includes_args(tmpdir, result_cache, calls):
+    f = tmpdir.join('f')
+    f.write('ok')
+    check1 = functools.partial(_check, fail_on=b'bad')
+    check2 = functools.partial(_check, fail_on=b'ok')
+    args1 = argparse.Namespace(fail_on='bad')
+    args2 = argparse.Namespace(fail_on='ok')
+    assert Cached(check1, args1, result_cache)(str(f)) == 0
+    assert Cached(check2, args2, result_cache)(str(f)) == 1
+    assert calls == [str(f), str(f)]
+
+
+def test_cache_changed_contents(tmpdir, result_cache, calls):
+    f = tmpdir.join('f')
+    func = Cached(_check, argparse.Namespace(), result_cache)
+    f.write('ok')
+    assert func(str(f)) == 0
+    f.write('bad')
+    assert func(str(f)) == 1
+    assert calls == [str(f), str(f)]
+
+
+def test_prune_evicts_least_recently_used(result_cache):
+    result_cache.max_entries = 2
+    result_cache.put('a', 0, b'', b'')
+    result_cache.put('b', 0, b'', b'')
+    result_cache.put('c', 0, b'', b'')
+    assert result_cache.get('a') is not None
+    result_cache.prune()
+    assert result_cache.get('b') is None
+    assert result_cache.get('a') is not None
+    assert result_cache.get('c') is not None
+
+
+def _used(result_cache, key):
+    query = 'SELECT used FROM results WHERE key = ?'
+    used, = result_cache.db.execute(query, (key,)).fetchone()
+    return used
+
+
+def test_puts_written_together(result_cache):
+    result_cache.put('a', 0, b'out', b'')
+    result_cache.put('b', 1, b'', b'err')
+    assert result_cache.get('a') == (0, b'out', b'')
+    count = 'SELECT COUNT(*) FROM results'
+    assert result_cache.db.execute(count).fetchone() == (0,)
+    result_cache.flush()
+    assert result_cache.db.execute(count).fetchone() == (2,)
+    assert result_cache._puts == {}
+    assert result_cache.get('b') == (1, b'', b'err')
+
+
+def test_get_touches_written_together(result_cache):
+    result_cache.put('a', 0, b'', b'')
+    result_cache.put('b', 0, b'', b'')
+    result_cache.flush()
+    used_a, used_b = _used(result_cache, 'a'), _used(result_cache, 'b')
+    assert result_cache.get('a') is not None
+    assert result_cache.get('b') is not None
+    assert result_cache.get('c') is None
+    assert (_used(result_cache, 'a'), _used(result_cache, 'b')) == (
+        used_a, used_b,
+    )
+    result_cache.close()
+    assert _used(result_cache, 'a') > used_a
+    assert _used(result_cache, 'b') > used_b
+    result_cache.close()
+    result_cache.close()
+
+
+def test_cached_close(tmpdir, result_cache):
+    class Check:
+        __wrapped__ = _check
+        closed = False
+
+        def __call__(self, filename):
+            return 0
+
+        def close(self):
+            self.closed = True
+
+    f = tmpdir.join('f')
+    f.write('ok')
+    check = Check()
+    func = Cached(check, argparse.Namespace(), result_cache)
+    assert func(str(f)) == 0
+    assert func(str(f)) == 0
+    func.close()
+    assert check.closed
+    assert result_cache._used == {}
+
+
+def test_cache_pickles_without_connection(result_cache):
+    result_cache.put('a', 0, b'', b'')
+    result_cache.flush()
+    result_cache.put('b', 0, b'', b'')
+    unpickled = pickle.loads(pickle.dumps(result_cache))
+    assert unpickled._db is None
+    assert unpickled.get('a') == (0, b'', b'')
+    # not stored yet, each process stores its own
+    assert unpickled.get('b') is None
+
+
+def test_hook_version_includes_dependencies(monkeypatch):
+    version = hook_version(_check)
+    cache._sources_version.cache_clear()
+    monkeypatch.setattr(cache, '_distribution_version', lambda name: '99')
+    assert hook_version(_check) != version
+    cache._sources_version.cache_clear()
+
+
+def test_distribution_version():
+    assert cache._distribution_version('ruamel.yaml')
+    assert cache._distribution_version('not-a-distribution') == ''
+
+
+def test_unusable_cache_falls_back(tmpdir, calls):
+    tmpdir.join('cache').write('not a directory')
+    cache = ResultCache(str(tmpdir.join('cache', 'results.db')))
+    f = tmpdir.join('f')
+    f.write('ok')
+    func = Cached(_check, argparse.Namespace(), cache)
+    assert func(str(f)) == 0
+    f.write('bad')
+    assert func(str(f)) == 1
+    func.prune()
+    assert calls == [str(f), str(f)]
+
+
+def test_unusable_cache_close(tmpdir, result_cache, monkeypatch):
+    def flush():
+        raise sqlite3.OperationalError('database is locked')
+    monkeypatch.setattr(result_cache, 'flush', flush)
+    Cached(_check, argparse.Namespace(), result_cache).close()
+
+
+def test_hook_cache(temp_git_dir, capsys):
+    with temp_git_dir.as_cwd():
+        temp_git_dir.join('f.json').write('{"a": 1, "a": 2}')
+        assert check_json.main(('--cache', 'f.json')) == 1
+        assert check_json.main(('--cache', 'f.json')) == 1
+        db = os.path.join('.git', 'pre-commit-hooks', 'results.db')
+        assert os.path.exists(db)
+    out, _ = capsys.readouterr()
+    msg = 'f.json: Failed to json decode (Duplicate key: a)\n'
+    assert out == msg * 2
+
+
+def test_hook_cache_outside_git_repo(tmpdir):
+    with tmpdir.as_cwd():
+        tmpdir.join('f.json').write('{}')
+        assert check_json.main(('--cache', 'f.json')) == 0
+
+
+def test_hook_cache_staged(temp_git_dir, capsys):
+    with temp_git_dir.as_cwd():
+        temp_git_dir.join('f.json').write('{')
+        cmd_output('git', 'add', 'f.json')
+        temp_git_dir.join('f.json').write('{}')
+        assert check_json.main(('--cache', '--staged', 'f.json')) == 1
+        assert check_json.main(('--cache', 'f.json')) == 0
+        assert check_json.main(('--cache', '--staged', 'f.json')) == 1
+
+
+def test_hook_cache_read_ahead(temp_git_dir, capsys):
+    with temp_git_dir.as_cwd():
+        temp_git_dir.join('ok.json').write('{}')
+        assert check_json.main(('--cache', 'ok.json')) == 0
+        temp_git_dir.join('bad.json').write('{')
+        argv = ('--cache', '--read-ahead', '2', 'ok.json', 'bad.json')
+        assert check_json.main(argv) == 1
+        assert check_json.main(argv) == 1
+    out, _ = capsys.readouterr()
+    assert out.count('bad.json: Failed to json decode') == 2
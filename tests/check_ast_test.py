@@ -12,3 +12,11 @@ def test_failing_file():
 def test_passing_file():
     ret = main([__file__])
     assert ret == 0
+
+
+def test_jobs(capsys):
+    bad = get_resource_path('cannot_parse_ast.notpy')
+    ret = main(['--jobs', '2', __file__, bad, __file__])
+    assert ret == 1
+    out, _ = capsys.readouterr()
+    assert out.startswith(f'{bad}: failed parsing with ')
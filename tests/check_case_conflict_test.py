@@ -122,3 +122,13 @@ def test_integration(temp_git_dir):
         cmd_output('git', 'add', 'F.py')
 
         assert main(argv=['F.py']) == 1
+
+
+def test_files_from(temp_git_dir):
+    with temp_git_dir.as_cwd():
+        temp_git_dir.join('f.py').write("print('hello world')")
+        temp_git_dir.join('F.py').write("print('hello world')")
+        cmd_output('git', 'add', 'f.py', 'F.py')
+        temp_git_dir.join('files').write_binary(b'f.py\0F.py\0')
+
+        assert main(argv=['-z', '--files-from', 'files']) == 1
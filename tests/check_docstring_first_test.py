@@ -67,3 +67,14 @@ def test_arbitrary_encoding(tmpdir):
     contents = '# -*- coding: cp1252\nx = "£"'.encode('cp1252')
     f.write_binary(contents)
     assert main([str(f)]) == 0
+
+
+def test_tokenize_error_after_finding(tmpdir, capsys):
+    f = tmpdir.join('f.py')
+    f.write_binary(b'x = 1\n"""docstring"""\n"""unterminated\n')
+    assert main([str(f)]) == 1
+    out, _ = capsys.readouterr()
+    assert out == (
+        f'{f}:2: Module docstring appears after code '
+        f'(code seen on line 1).\n'
+    )
@@ -3,6 +3,7 @@ from __future__ import annotations
 import pytest
 
 from pre_commit_hooks.check_json import main
+from pre_commit_hooks.util import cmd_output
 from testing.util import get_resource_path
 
 
@@ -26,3 +27,26 @@ def test_non_utf8_file(tmpdir):
     f = tmpdir.join('t.json')
     f.write_binary(b'\xa9\xfe\x12')
     assert main((str(f),))
+
+
+def test_staged(temp_git_dir, capsys):
+    with temp_git_dir.as_cwd():
+        temp_git_dir.join('f.json').write('{')
+        cmd_output('git', 'add', 'f.json')
+        temp_git_dir.join('f.json').write('{}')
+        assert main(['f.json']) == 0
+        assert main(['--staged', 'f.json']) == 1
+    out, _ = capsys.readouterr()
+    assert out.startswith('f.json: Failed to json decode')
+
+
+def test_all_files(temp_git_dir, capsys):
+    with temp_git_dir.as_cwd():
+        temp_git_dir.join('bad.json').write('{')
+        temp_git_dir.join('ok.json').write('{}')
+        temp_git_dir.join('not_json.txt').write('{')
+        cmd_output('git', 'add', '.')
+        assert main(['--all-files']) == 1
+    out, _ = capsys.readouterr()
+    assert out.startswith('bad.json: Failed to json decode')
+    assert 'not_json.txt' not in out
@@ -15,3 +15,13 @@ from testing.util import get_resource_path
 def test_main(filename, expected_retval):
     ret = main([get_resource_path(filename)])
     assert ret == expected_retval
+
+
+def test_error_names_file(tmpdir, capsys):
+    f = tmpdir.join('bad.xml')
+    f.write('<a>\n')
+    assert main((str(f),))
+    out, _ = capsys.readouterr()
+    assert out == (
+        f'{f}: Failed to xml parse ({f}:2:0: no element found)\n'
+    )
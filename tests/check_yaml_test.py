@@ -51,3 +51,12 @@ def test_main_unsafe_still_fails_on_syntax_errors(tmpdir):
     f = tmpdir.join('test.yaml')
     f.write('[')
     assert main(('--unsafe', str(f)))
+
+
+@pytest.mark.parametrize('args', ((), ('--multi',), ('--unsafe',)))
+def test_error_names_file(tmpdir, capsys, args):
+    f = tmpdir.join('bad.yaml')
+    f.write('a: [\n')
+    assert main((*args, str(f)))
+    out, _ = capsys.readouterr()
+    assert f'in "{f}", line 2' in out
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import os
+import socket
+import threading
+
+import pytest
+
+from pre_commit_hooks import client
+
+
+@pytest.fixture
+def runtime_dir(tmp_path_factory, monkeypatch):
+    # keep it short, unix socket paths are limited to ~100 characters
+    path = tmp_path_factory.mktemp('rt')
+    monkeypatch.setenv('XDG_RUNTIME_DIR', str(path))
+    yield path
+
+
+def test_repo_root(temp_git_dir):
+    subdir = temp_git_dir.join('a', 'b').ensure_dir()
+    assert client.repo_root(str(subdir)) == str(temp_git_dir)
+
+
+def test_repo_root_not_in_repo(tmpdir):
+    assert client.repo_root(str(tmpdir)) is None
+
+
+def test_socket_path(temp_git_dir, runtime_dir):
+    subdir = temp_git_dir.join('a').ensure_dir()
+    path = client.socket_path(str(temp_git_dir))
+    assert path is not None
+    assert path is not None
+    assert path.startswith(str(runtime_dir))
+    assert client.socket_path(str(subdir)) == path
+
+
+def test_socket_path_not_in_repo(tmpdir):
+    assert client.socket_path(str(tmpdir)) is None
+
+
+def test_socket_dir_tmpdir_fallback(monkeypatch):
+    monkeypatch.delenv('XDG_RUNTIME_DIR', raising=False)
+    monkeypatch.setenv('TMPDIR', '/some/tmp')
+    assert client.socket_dir() == f'/some/tmp/pre-commit-hooks-{os.getuid()}'
+
+
+def test_runs_in_process_without_daemon(temp_git_dir, runtime_dir, capsys):
+    with temp_git_dir.as_cwd():
+        temp_git_dir.join('f.json').write('{')
+        assert client.check_json(['f.json']) == 1
+    out, _ = capsys.readouterr()
+    assert out.startswith('f.json: Failed to json decode')
+
+
+def test_runs_in_process_not_in_repo(tmpdir, runtime_dir):
+    with tmpdir.as_cwd():
+        tmpdir.join('f.json').write('{}')
+        assert client.check_json(['f.json']) == 0
+
+
+def test_stale_socket(temp_git_dir, runtime_dir):
+    path = client.socket_path(str(temp_git_dir))
+    assert path is not None
+    os.makedirs(os.path.dirname(path), mode=0o700)
+    open(path, 'w').close()
+    with temp_git_dir.as_cwd():
+        temp_git_dir.join('f.json').write('{}')
+        assert client.check_json(['f.json']) == 0
+
+
+def test_ignores_socket_in_shared_dir(temp_git_dir, runtime_dir):
+    path = client.socket_path(str(temp_git_dir))
+    assert path is not None
+    os.makedirs(os.path.dirname(path), mode=0o755)
+    os.chmod(os.path.dirname(path), 0o755)
+    open(path, 'w').close()
+    with temp_git_dir.as_cwd():
+        temp_git_dir.join('f.json').write('{}')
+        ret = client._forward('pre_commit_hooks.check_json', ['f.json'])
+        assert ret is None
+
+
+def test_socket_dir_missing(tmpdir):
+    assert not client._socket_dir_is_private(str(tmpdir.join('a', 'b.sock')))
+
+
+def test_run_hook_default_argv(temp_git_dir, runtime_dir, monkeypatch):
+    monkeypatch.setattr('sys.argv', ['check-json', 'f.json'])
+    with temp_git_dir.as_cwd():
+        temp_git_dir.join('f.json').write('{}')
+        assert client.run_hook('check_json') == 0
+
+
+def test_entry_points_match_modules():
+    for name in client.MODULES:
+        assert callable(getattr(client, name))
+
+
+def test_daemon_without_result(temp_git_dir, runtime_dir, capsys):
+    path = client.socket_path(str(temp_git_dir))
+    assert path is not None
+    os.makedirs(os.path.dirname(path), mode=0o700)
+
+    def _hang_up():
+        conn, _ = listener.accept()
+        with conn:
+            while conn.recv(4096):
+                pass
+
+    with socket.socket(socket.AF_UNIX) as listener:
+        listener.bind(path)
+        listener.listen(1)
+        thread = threading.Thread(target=_hang_up)
+        thread.start()
+        with temp_git_dir.as_cwd():
+            assert client.check_json(['f.json']) == 1
+        thread.join()
+
+    _, err = capsys.readouterr()
+    assert err == (
+        'pre_commit_hooks.check_json: '
+        'pre-commit-hooks-daemon did not report a result\n'
+    )
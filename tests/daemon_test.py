@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import array
+import os
+import socket
+import sys
+
+import pytest
+
+from pre_commit_hooks import check_yaml
+from pre_commit_hooks import client
+from pre_commit_hooks import daemon
+
+
+@pytest.fixture
+def runtime_dir(tmp_path_factory, monkeypatch):
+    # keep it short, unix socket paths are limited to ~100 characters
+    path = tmp_path_factory.mktemp('rt')
+    monkeypatch.setenv('XDG_RUNTIME_DIR', str(path))
+    yield path
+
+
+@pytest.fixture
+def running_daemon(temp_git_dir, runtime_dir, monkeypatch):
+    # the daemon runs `python -m pre_commit_hooks.daemon`
+    root = os.path.dirname(os.path.dirname(daemon.__file__))
+    monkeypatch.setenv('PYTHONPATH', root)
+    with temp_git_dir.as_cwd():
+        assert daemon.main(('start',)) == 0
+        try:
+            yield temp_git_dir
+        finally:
+            assert daemon.main(('stop',)) == 0
+
+
+def _send(sock, request, fds=()):
+    fds_data = array.array('i', fds).tobytes()
+    sock.sendmsg([b'\0'], [(socket.SOL_SOCKET, socket.SCM_RIGHTS, fds_data)])
+    sock.sendall(repr(request).encode())
+    sock.shutdown(socket.SHUT_WR)
+
+
+@pytest.mark.parametrize('command', ('ping', 'stop'))
+def test_handle_commands(command):
+    listener = socket.socket(socket.AF_UNIX)
+    server, sock = socket.socketpair()
+    with listener, server, sock:
+        _send(sock, {'command': command})
+        assert daemon._handle(listener, server) is (command == 'ping')
+        assert sock.recv(1) == b'0'
+
+
+def test_handle_not_a_request():
+    listener = socket.socket(socket.AF_UNIX)
+    server, sock = socket.socketpair()
+    with listener, server, sock:
+        _send(sock, ['command', 'ping'])
+        with pytest.raises(ValueError):
+            daemon._handle(listener, server)
+
+
+def test_handle_run_forks(tmpdir):
+    tmpdir.join('f.json').write('{')
+    request = {
+        'command': 'run',
+        'module': 'pre_commit_hooks.check_json',
+        'argv': ['f.json'],
+        'cwd': str(tmpdir),
+        'env': dict(os.environ),
+    }
+    listener = socket.socket(socket.AF_UNIX)
+    server, sock = socket.socketpair()
+    with open(os.devnull, 'wb') as devnull, listener, server, sock:
+        fd = devnull.fileno()
+        _send(sock, request, (os.dup(fd), os.dup(fd), os.dup(fd)))
+        assert daemon._handle(listener, server) is True
+        server.close()
+        assert sock.recv(16) == b'1'
+    os.wait()
+
+
+@pytest.mark.parametrize(
+    ('exc', 'expected'),
+    (
+        (SystemExit(), 0),
+        (SystemExit(2), 2),
+        (SystemExit('message'), 1),
+    ),
+)
+def test_exit_code(exc, expected, capsys):
+    assert daemon._exit_code(exc) == expected
+
+
+def test_exit_code_message(capsys):
+    daemon._exit_code(SystemExit('bye'))
+    _, err = capsys.readouterr()
+    assert err == 'bye\n'
+
+
+def test_ensure_private_dir(tmpdir):
+    path = str(tmpdir.join('d'))
+    daemon._ensure_private_dir(path)
+    daemon._ensure_private_dir(path)
+    os.chmod(path, 0o755)
+    with pytest.raises(SystemExit):
+        daemon._ensure_private_dir(path)
+
+
+def test_not_in_repo(tmpdir, capsys):
+    with tmpdir.as_cwd():
+        assert daemon.main(('status',)) == 1
+    out, _ = capsys.readouterr()
+    assert out == 'pre-commit-hooks-daemon: not in a git repository\n'
+
+
+def test_warm():
+    daemon.warm()
+    assert set(daemon.LAZY_IMPORTS) <= set(sys.modules)
+    assert 'ruamel.yaml' in sys.modules
+    assert check_yaml._yaml.cache_info().currsize == 1
+
+
+def test_serve(temp_git_dir, runtime_dir, monkeypatch):
+    served: list[str] = []
+    monkeypatch.setattr(daemon, 'serve', served.append)
+    with temp_git_dir.as_cwd():
+        daemon.main(('serve',))
+    assert served == [client.socket_path(str(temp_git_dir))]
+
+
+def test_status_not_running(temp_git_dir, runtime_dir, capsys):
+    with temp_git_dir.as_cwd():
+        assert daemon.main(('status',)) == 1
+        assert daemon.main(('stop',)) == 1
+    out, _ = capsys.readouterr()
+    assert out == 'pre-commit-hooks-daemon: not running\n'
+
+
+def test_start_failure(temp_git_dir, runtime_dir, monkeypatch, capsys):
+    monkeypatch.setattr(sys, 'executable', 'false')
+    with temp_git_dir.as_cwd():
+        path = client.socket_path(str(temp_git_dir))
+        assert path is not None
+        assert daemon.start(path, timeout=.1) == 1
+    _, err = capsys.readouterr()
+    assert err == 'pre-commit-hooks-daemon: failed to start\n'
+
+
+def test_daemon(running_daemon, capfd):
+    assert daemon.main(('status',)) == 0
+    assert daemon.main(('start',)) == 0
+    out, _ = capfd.readouterr()
+    assert out == (
+        'pre-commit-hooks-daemon: running\n'
+        'pre-commit-hooks-daemon: already running\n'
+    )
+
+    running_daemon.join('f.json').write('{')
+    running_daemon.join('g.json').write('{}')
+    assert client.check_json(['f.json', 'g.json']) == 1
+    assert client.check_json(['g.json']) == 0
+    # argparse errors
+    assert client.check_json(['--wat']) == 2
+    # SystemExit with a message
+    assert client.removed(['a', 'b', 'c']) == 1
+    out, err = capfd.readouterr()
+    assert out.startswith('f.json: Failed to json decode')
+    assert 'unrecognized arguments: --wat' in err
+    assert '`a` has been removed -- use `b` from c' in err
+
+
+def test_daemon_uses_client_environment(running_daemon, monkeypatch, capfd):
+    running_daemon.join('f').write('key')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'key')
+    ret = client.detect_aws_credentials(['f', '--credentials-file=/dev/null'])
+    assert ret == 1
+    out, _ = capfd.readouterr()
+    assert out == 'AWS secret found in f: key*************************\n'
+
+
+def test_unknown_module(running_daemon, capfd):
+    assert client._forward('os', []) == 1
+    _, err = capfd.readouterr()
+    assert err == 'pre-commit-hooks-daemon: unknown hook os\n'
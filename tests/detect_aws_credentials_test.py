@@ -4,11 +4,14 @@ from unittest.mock import patch
 
 import pytest
 
+from pre_commit_hooks.detect_aws_credentials import check_file_for_aws_keys
 from pre_commit_hooks.detect_aws_credentials import get_aws_cred_files_from_env
 from pre_commit_hooks.detect_aws_credentials import get_aws_secrets_from_env
 from pre_commit_hooks.detect_aws_credentials import get_aws_secrets_from_file
 from pre_commit_hooks.detect_aws_credentials import main
+from pre_commit_hooks.util import cmd_output
 from testing.util import get_resource_path
+from testing.util import git_commit
 
 
 @pytest.mark.parametrize(
@@ -123,6 +126,15 @@ def test_detect_aws_credentials(filename, expected_retval):
     assert ret == expected_retval
 
 
+def test_check_file_for_aws_keys(tmpdir):
+    f = tmpdir.join('f')
+    f.write('key1 key2 key1\n')
+    filenames = (str(f),)
+    assert check_file_for_aws_keys(filenames, set()) == []
+    bad_files = check_file_for_aws_keys(filenames, {b'key1', b'other'})
+    assert [bad_file.key for bad_file in bad_files] == ['key1' + '*' * 24]
+
+
 def test_allows_arbitrarily_encoded_files(tmpdir):
     src_ini = tmpdir.join('src.ini')
     src_ini.write(
@@ -136,6 +148,32 @@ def test_allows_arbitrarily_encoded_files(tmpdir):
     assert ret == 0
 
 
+def test_only_changed_lines(temp_git_dir, capsys):
+    with temp_git_dir.as_cwd():
+        src_ini = temp_git_dir.join('src.ini')
+        src_ini.write(
+            '[default]\n'
+            'aws_access_key_id=AKIASDFASDF\n'
+            'aws_secret_Access_key=9018asdf23908190238123\n',
+        )
+        f = temp_git_dir.join('f')
+        f.write('9018asdf23908190238123\n')
+        cmd_output('git', 'add', 'f')
+        git_commit('-m', 'add f')
+        f.write('9018asdf23908190238123\nok\n')
+        cmd_output('git', 'add', 'f')
+        argv = ['f', '--only-changed-lines', '--credentials-file', 'src.ini']
+        assert main(argv) == 0
+
+        f.write('9018asdf23908190238123\nok\n9018asdf23908190238123\n')
+        cmd_output('git', 'add', 'f')
+        assert main(argv) == 1
+        out, _ = capsys.readouterr()
+        assert out == (
+            'AWS secret found in f:3: 9018************************\n'
+        )
+
+
 @patch('pre_commit_hooks.detect_aws_credentials.get_aws_secrets_from_file')
 @patch('pre_commit_hooks.detect_aws_credentials.get_aws_secrets_from_env')
 def test_non_existent_credentials(mock_secrets_env, mock_secrets_file, capsys):
@@ -57,3 +57,17 @@ def test_main_no_new_submodule(git_dir_with_git_dir):
     open('test.py', 'a+').close()
     subprocess.check_call(('git', 'add', 'test.py'))
     assert main(('test.py',)) == 0
+
+
+def test_main_existing_submodule(git_dir_with_git_dir):
+    subprocess.check_call(('git', 'submodule', 'add', './foo'))
+    git_commit('-m', 'new submodule')
+    assert main(('foo', '.gitmodules')) == 0
+
+
+def test_main_new_submodule_and_file(git_dir_with_git_dir, capsys):
+    open('test.py', 'a+').close()
+    subprocess.check_call(('git', 'add', 'test.py', 'foo'))
+    assert main(('test.py', 'foo')) == 1
+    out, _ = capsys.readouterr()
+    assert out.startswith('foo: new submodule introduced\n\n')
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import os
+import struct
+
+import pytest
+
+from pre_commit_hooks.git_index import IndexEntry
+from pre_commit_hooks.git_index import ls_files
+from pre_commit_hooks.git_index import ls_paths
+from pre_commit_hooks.git_index import read_index
+from pre_commit_hooks.git_index import UnsupportedIndex
+from pre_commit_hooks.util import CalledProcessError
+from pre_commit_hooks.util import cmd_output
+from testing.util import git_commit
+
+
+def _git_ls_files():
+    ret = []
+    for line in cmd_output('git', 'ls-files', '-z', '--stage').split('\0'):
+        if line:
+            metadata, path = line.split('\t', 1)
+            mode, oid, stage = metadata.split()
+            ret.append((path, int(mode, 8), oid, int(stage)))
+    return ret
+
+
+def _read_index(filename='.git/index', **kwargs):
+    return [
+        (entry.path, entry.mode, entry.oid, entry.stage)
+        for entry in read_index(filename, **kwargs)
+    ]
+
+
+def _add(*paths, mode='100644'):
+    oid = _hello_oid()
+    for path in paths:
+        cmd_output(
+            'git', 'update-index', '--add', '--cacheinfo',
+            f'{mode},{oid},{path}',
+        )
+
+
+def _hello_oid():
+    return cmd_output('git', 'hash-object', '-w', 'hello').strip()
+
+
+@pytest.fixture
+def index_repo(temp_git_dir):
+    with temp_git_dir.as_cwd():
+        temp_git_dir.join('hello').write('hello world\n')
+        temp_git_dir.join('exe').write('#!/bin/sh\n')
+        os.chmod('exe', 0o755)
+        temp_git_dir.join('sub').ensure_dir().join('f').write('f\n')
+        cmd_output('git', 'add', '.')
+        # a path > 0xfff long, whose length doesn't fit the flags
+        _add(f'{"d" * 200}/' * 21 + 'long')
+        # a long common prefix then a short path, a multi-byte varint
+        _add('a' * 200 + '/x', 'b')
+        # intent to add entries use the extended flags (version 3)
+        temp_git_dir.join('new').write('new\n')
+        cmd_output('git', 'add', '--intent-to-add', 'new')
+        yield temp_git_dir
+
+
+@pytest.mark.parametrize('version', ('2', '3', '4'))
+def test_read_index(index_repo, version):
+    with index_repo.as_cwd():
+        if version != '3':
+            cmd_output('git', 'rm', '--cached', '--quiet', 'new')
+        cmd_output('git', 'update-index', '--index-version', version)
+        assert _read_index() == _git_ls_files()
+
+
+def test_read_index_size(index_repo):
+    with index_repo.as_cwd():
+        entries = {entry.path: entry for entry in read_index('.git/index')}
+        assert entries['hello'] == IndexEntry(
+            'hello', 0o100644, 12, _hello_oid(), 0,
+        )
+        assert entries['exe'].mode == 0o100755
+
+
+def test_read_index_stages(temp_git_dir):
+    with temp_git_dir.as_cwd():
+        temp_git_dir.join('f').write('base\n')
+        cmd_output('git', 'add', 'f')
+        git_commit('-m', 'base')
+        cmd_output('git', 'checkout', '-b', 'other')
+        temp_git_dir.join('f').write('other\n')
+        git_commit('-am', 'other')
+        cmd_output('git', 'checkout', '-')
+        temp_git_dir.join('f').write('this\n')
+        git_commit('-am', 'this')
+        cmd_output('git', 'merge', 'other', retcode=None)
+        assert [stage for _, _, _, stage in _read_index()] == [1, 2, 3]
+        assert _read_index() == _git_ls_files()
+
+
+def test_read_index_sha256(tmpdir):
+    repo = tmpdir.join('repo')
+    cmd_output('git', 'init', '--object-format=sha256', str(repo))
+    with repo.as_cwd():
+        repo.join('f').write('f\n')
+        cmd_output('git', 'add', 'f')
+        assert [entry.oid for entry in ls_files()] == [
+            cmd_output('git', 'hash-object', 'f').strip(),
+        ]
+
+
+def _index(*entries, version=2, signature=b'DIRC'):
+    return struct.pack('>4sII', signature, version, len(entries)) + b''.join(
+        entries,
+    )
+
+
+def _entry(path, mode=0o100644):
+    entry = struct.pack('>10I', *(0,) * 6, mode, 0, 0, 0)
+    entry += b'\x12' * 20 + struct.pack('>H', len(path)) + path
+    return entry + b'\0' * (8 - len(entry) % 8)
+
+
+def test_read_index_manual(tmpdir):
+    index = tmpdir.join('index')
+    index.write_binary(_index(_entry(b'a'), _entry(b'b' * 9)))
+    assert _read_index(str(index)) == [
+        ('a', 0o100644, '12' * 20, 0), ('b' * 9, 0o100644, '12' * 20, 0),
+    ]
+
+
+@pytest.mark.parametrize(
+    'contents',
+    (
+        b'DIRC',
+        _index(signature=b'CRID'),
+        _index(version=5),
+    ),
+)
+def test_read_index_unsupported(tmpdir, contents):
+    index = tmpdir.join('index')
+    index.write_binary(contents)
+    with pytest.raises(UnsupportedIndex):
+        read_index(str(index))
+
+
+@pytest.mark.parametrize(
+    'contents',
+    (
+        _index(_entry(b'sparse/', mode=0o040000)),
+        _index(_entry(b'a'))[:-1],
+    ),
+)
+def test_read_index_unsupported_entries(tmpdir, contents):
+    index = tmpdir.join('index')
+    index.write_binary(contents)
+    with pytest.raises(UnsupportedIndex):
+        list(read_index(str(index)))
+
+
+def _paths(entries):
+    return [entry.path for entry in entries]
+
+
+def test_ls_files(index_repo):
+    with index_repo.as_cwd():
+        assert _paths(ls_files()) == [path for path, *_ in _git_ls_files()]
+        assert _paths(ls_files(['./hello', 'sub', 'missing'])) == [
+            'hello', 'sub/f',
+        ]
+        assert _paths(ls_files([str(index_repo.join('exe'))])) == ['exe']
+
+
+def test_ls_paths(index_repo):
+    with index_repo.as_cwd():
+        expected = {path for path, *_ in _git_ls_files()}
+        assert ls_paths() == expected
+        assert ls_paths() is ls_paths()
+
+
+def test_ls_files_index_file_env(index_repo, monkeypatch):
+    with index_repo.as_cwd():
+        cmd_output(
+            'git', 'read-tree', '--empty', env={
+                **os.environ, 'GIT_INDEX_FILE': str(index_repo.join('other')),
+            },
+        )
+        monkeypatch.setenv('GIT_INDEX_FILE', str(index_repo.join('other')))
+        assert _paths(ls_files()) == []
+
+
+@pytest.mark.parametrize(
+    ('config', 'env'),
+    (
+        ((), {'GIT_DIR': '.git'}),
+        (('index.sparse', 'true'), {}),
+        (('core.splitIndex', 'true'), {}),
+    ),
+)
+def test_ls_files_falls_back_to_git(index_repo, monkeypatch, config, env):
+    with index_repo.as_cwd():
+        if config:
+            cmd_output('git', 'config', *config)
+        expected = [path for path, *_ in _git_ls_files()]
+        for k, v in env.items():
+            monkeypatch.setenv(k, v)
+        assert _paths(ls_files()) == expected
+        assert _paths(ls_files(['sub'])) == ['sub/f']
+
+
+def test_ls_files_from_a_subdirectory(index_repo):
+    with index_repo.join('sub').as_cwd():
+        assert _paths(ls_files(['f'])) == ['f']
+
+
+def test_ls_files_no_index(temp_git_dir):
+    with temp_git_dir.as_cwd():
+        assert _paths(ls_files()) == []
+
+
+def test_ls_files_bad_git_dir(tmpdir):
+    with tmpdir.as_cwd():
+        tmpdir.join('.git').write('not a gitdir file\n')
+        with pytest.raises(CalledProcessError):
+            list(ls_files())
@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from pre_commit_hooks import git_repo
+from pre_commit_hooks.git_repo import common_dir
+from pre_commit_hooks.git_repo import config_value
+from pre_commit_hooks.git_repo import git_dir
+from pre_commit_hooks.git_repo import head_ref
+from pre_commit_hooks.git_repo import is_merging
+from pre_commit_hooks.git_repo import parse_config
+from pre_commit_hooks.util import CalledProcessError
+from pre_commit_hooks.util import cmd_output
+from testing.util import git_commit
+
+
+def _rev_parse(*args):
+    return cmd_output('git', 'rev-parse', *args).strip()
+
+
+@pytest.fixture(autouse=True)
+def no_git_env(monkeypatch):
+    for var in (
+            'GIT_DIR', 'GIT_COMMON_DIR',
+            *git_repo._DISCOVERY_ENV, *git_repo._CONFIG_ENV,
+    ):
+        monkeypatch.delenv(var, raising=False)
+
+
+def test_git_dir(temp_git_dir):
+    with temp_git_dir.as_cwd():
+        assert git_dir() == _rev_parse('--absolute-git-dir')
+    with temp_git_dir.join('sub').ensure_dir().as_cwd():
+        assert git_dir() == _rev_parse('--absolute-git-dir')
+
+
+def test_git_dir_reused(temp_git_dir, monkeypatch):
+    with temp_git_dir.as_cwd():
+        expected = git_dir()
+        monkeypatch.setattr(git_repo, '_discover', lambda cwd: 1 / 0)
+        assert git_dir() == expected
+        monkeypatch.setenv('GIT_DIR', 'elsewhere')
+        assert git_dir() == str(temp_git_dir.join('elsewhere'))
+
+
+def test_git_dir_inside_git_dir(temp_git_dir):
+    with temp_git_dir.join('.git').as_cwd():
+        assert git_dir() == str(temp_git_dir.join('.git'))
+
+
+def test_git_dir_env(temp_git_dir, monkeypatch):
+    monkeypatch.setenv('GIT_DIR', 'elsewhere')
+    with temp_git_dir.as_cwd():
+        assert git_dir() == str(temp_git_dir.join('elsewhere'))
+
+
+def test_git_dir_discovery_env(temp_git_dir, monkeypatch):
+    monkeypatch.setenv('GIT_CEILING_DIRECTORIES', str(temp_git_dir))
+    with temp_git_dir.join('sub').ensure_dir().as_cwd():
+        with pytest.raises(CalledProcessError):
+            git_dir()
+
+
+def test_git_dir_not_a_repository(tmpdir):
+    with tmpdir.as_cwd(), pytest.raises(CalledProcessError):
+        git_dir()
+
+
+def test_git_dir_filesystem_boundary(temp_git_dir, monkeypatch):
+    stat = os.stat
+
+    class _Stat:
+        st_dev = -1
+
+    def fake_stat(path, *args, **kwargs):
+        if path == str(temp_git_dir):
+            return _Stat()
+        return stat(path, *args, **kwargs)
+
+    sub = temp_git_dir.join('sub').ensure_dir()
+    monkeypatch.setattr(git_repo, '_rev_parse_git_dir', lambda: 'git')
+    monkeypatch.setattr(os, 'stat', fake_stat)
+    with sub.as_cwd():
+        assert git_dir() == 'git'
+
+
+def test_git_dir_bad_gitdir_file(tmpdir):
+    tmpdir.join('.git').write('nope\n')
+    with tmpdir.as_cwd(), pytest.raises(CalledProcessError):
+        git_dir()
+
+
+def test_worktree(temp_git_dir):
+    worktree = temp_git_dir.join('worktree')
+    with temp_git_dir.as_cwd():
+        git_commit('--allow-empty', '-m', 'initial')
+        cmd_output('git', 'worktree', 'add', '-b', 'topic', str(worktree))
+    with worktree.as_cwd():
+        gitdir = git_dir()
+        assert gitdir == _rev_parse('--absolute-git-dir')
+        assert common_dir(gitdir) == str(temp_git_dir.join('.git'))
+        assert head_ref(gitdir) == 'refs/heads/topic'
+
+
+def test_common_dir(temp_git_dir, monkeypatch):
+    gitdir = str(temp_git_dir.join('.git'))
+    assert common_dir(gitdir) == gitdir
+    monkeypatch.setenv('GIT_COMMON_DIR', 'common')
+    with temp_git_dir.as_cwd():
+        assert common_dir(gitdir) == str(temp_git_dir.join('common'))
+
+
+def test_head_ref(temp_git_dir):
+    gitdir = str(temp_git_dir.join('.git'))
+    with temp_git_dir.as_cwd():
+        expected = cmd_output('git', 'symbolic-ref', 'HEAD').strip()
+        assert head_ref(gitdir) == expected
+        git_commit('--allow-empty', '-m', 'initial')
+        cmd_output('git', 'checkout', '--detach')
+        assert head_ref(gitdir) is None
+
+
+@pytest.mark.parametrize('head', (None, 'ref: refs/heads/.invalid\n'))
+def test_head_ref_falls_back_to_git(temp_git_dir, tmpdir, head):
+    gitdir = tmpdir.join('gitdir').ensure_dir()
+    if head is not None:
+        gitdir.join('HEAD').write(head)
+    with temp_git_dir.as_cwd():
+        assert head_ref(str(gitdir)) == 'refs/heads/master'
+
+
+def test_is_merging(tmpdir):
+    assert not is_merging(str(tmpdir))
+    tmpdir.join('MERGE_MSG').ensure()
+    assert not is_merging(str(tmpdir))
+    tmpdir.join('MERGE_HEAD').ensure()
+    assert is_merging(str(tmpdir))
+
+
+@pytest.mark.parametrize(
+    ('contents', 'expected'),
+    (
+        ('', {}),
+        (
+            '# comment\n'
+            '[core]\n'
+            '\tfileMode = false\n'
+            '; comment\n'
+            '\tbare\n'
+            '[Remote "Origin"] # comment\n'
+            '\turl = https://example.com  # comment\n',
+            {
+                'core.filemode': 'false',
+                'core.bare': '',
+                'remote.Origin.url': 'https://example.com',
+            },
+        ),
+        (
+            '[a]\n'
+            '\tquoted = "  spaces ; kept  "\n'
+            '\tescaped = a\\tb\\"c\\\\\n'
+            '\tcontinued = one \\\n'
+            'two\n'
+            '\tlast = 1\n'
+            '\tlast = 2\n'
+            '[a "sub\\"quote"]\n'
+            '\tx = y\n'
+            '[old.Style]\n'
+            '\tx = y\n',
+            {
+                'a.quoted': '  spaces ; kept  ',
+                'a.escaped': 'a\tb"c\\',
+                'a.continued': 'one two',
+                'a.last': '2',
+                'a.sub"quote.x': 'y',
+                'old.style.x': 'y',
+            },
+        ),
+    ),
+)
+def test_parse_config(contents, expected):
+    assert parse_config(contents) == expected
+
+
+@pytest.mark.parametrize(
+    ('contents', 'exc'),
+    (
+        ('x = y\n', ValueError),
+        ('[core] x = y\n', ValueError),
+        ('[core\n', ValueError),
+        ('[core]\n\t= y\n', ValueError),
+        ('[core]\n\tx y\n', ValueError),
+        ('[core]\n\tx = "y\n', ValueError),
+        ('[core]\n\tx = \\q\n', KeyError),
+    ),
+)
+def test_parse_config_unsupported(contents, exc):
+    with pytest.raises(exc):
+        parse_config(contents)
+
+
+def test_config_value(temp_git_dir):
+    with temp_git_dir.as_cwd():
+        cmd_output('git', 'config', 'core.fileMode', 'false')
+        cmd_output('git', 'config', 'pch.Sub.key', 'value')
+        assert config_value('core.filemode') == 'false'
+        assert config_value('pch.sub.key') is None
+        assert config_value('PCH.Sub.KEY') == 'value'
+        assert config_value('pch.missing') is None
+
+
+def test_config_value_falls_back_to_git(temp_git_dir, monkeypatch):
+    with temp_git_dir.as_cwd():
+        cmd_output('git', 'config', 'core.fileMode', 'false')
+        cmd_output('git', 'config', 'include.path', 'other')
+        temp_git_dir.join('.git', 'other').write('[core]\nfileMode = true\n')
+        assert config_value('core.fileMode') == 'true'
+
+        monkeypatch.setenv('GIT_CONFIG_COUNT', '1')
+        monkeypatch.setenv('GIT_CONFIG_KEY_0', 'core.fileMode')
+        monkeypatch.setenv('GIT_CONFIG_VALUE_0', 'off')
+        assert config_value('core.fileMode') == 'off'
+
+
+def test_config_value_unreadable_config(temp_git_dir):
+    with temp_git_dir.as_cwd():
+        with open('.git/config', 'a') as f:
+            f.write('[core] filemode = false\n')
+        assert config_value('core.filemode') == 'false'
+
+
+def test_config_value_not_a_repository(tmpdir):
+    with tmpdir.as_cwd():
+        assert config_value('pch.missing') is None
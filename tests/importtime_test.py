@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import pytest
+
+from testing import importtime
+from testing.importtime import console_scripts
+from testing.importtime import heavy_imports
+from testing.importtime import import_cost
+from testing.importtime import parse_importtime
+
+
+def test_console_scripts():
+    scripts = console_scripts()
+    assert scripts['check-yaml'] == 'pre_commit_hooks.check_yaml'
+    assert scripts['name-tests-test'] == (
+        'pre_commit_hooks.tests_should_end_in_test'
+    )
+    assert scripts['pre-commit-hooks-daemon'] == 'pre_commit_hooks.daemon'
+
+
+def test_parse_importtime():
+    output = (
+        'import time: self [us] | cumulative | imported package\n'
+        'import time:       183 |        183 |   _io\n'
+        'import time:       100 |        283 | io\n'
+        'unrelated\n'
+    )
+    assert parse_importtime(output) == [('_io', 183, False), ('io', 283, True)]
+
+
+@pytest.mark.parametrize(
+    ('script', 'module'), sorted(console_scripts().items()),
+)
+def test_no_heavy_imports_at_startup(script, module):
+    assert heavy_imports(script, import_cost(module).modules) == []
+
+
+def test_daemon_client_imports():
+    modules = import_cost(importtime.DAEMON_CLIENT).modules
+    assert 'pre_commit_hooks.client' in modules
+    assert not modules & importtime.DAEMON_CLIENT_AVOIDS
+
+
+def test_main(capsys):
+    ret = importtime.main(('--repeat=2', '--budget-scale=100', 'check-json'))
+    assert ret == 0
+    ret = importtime.main(('--repeat=1', '--budget-scale=0', 'check-json'))
+    assert ret == 1
+    out, _ = capsys.readouterr()
+    assert out.splitlines()[1].endswith(': over budget')
+
+
+def test_main_heavy_import(monkeypatch, capsys):
+    monkeypatch.setattr(importtime, 'HEAVY_MODULES', frozenset(('argparse',)))
+    ret = importtime.main(('--repeat=1', '--budget-scale=100', 'check-json'))
+    assert ret == 1
+    out, _ = capsys.readouterr()
+    assert out.endswith(': imports argparse\n')
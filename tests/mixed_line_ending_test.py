@@ -2,6 +2,8 @@ from __future__ import annotations
 
 import pytest
 
+from pre_commit_hooks import util
+from pre_commit_hooks.mixed_line_ending import fix_filename
 from pre_commit_hooks.mixed_line_ending import main
 
 
@@ -116,3 +118,28 @@ def test_fix_lf_all_crlf(tmpdir):
 
     assert ret == 1
     assert path.read_binary() == b'foo\nbar\n'
+
+
+@pytest.mark.parametrize('jobs', ('1', '2'))
+def test_large_files_counted_in_ranges(tmpdir, monkeypatch, capsys, jobs):
+    monkeypatch.setattr(util, 'SPLIT_SIZE', 4)
+    tmpdir.join('mixed').write_binary(b'a\r\nbbbb\r\ncc\r\nd\n')
+    tmpdir.join('crlf').write_binary(b'a\r\nbbbb\r\ncc\r\n')
+    with tmpdir.as_cwd():
+        assert main(('--jobs', jobs, 'crlf', 'mixed', 'crlf')) == 1
+        expected = b'a\r\nbbbb\r\ncc\r\nd\r\n'
+        assert tmpdir.join('mixed').read_binary() == expected
+    out, _ = capsys.readouterr()
+    assert out == 'mixed: fixed mixed line endings\n'
+
+
+@pytest.mark.parametrize('split_size', (1024, 4))
+def test_fix_filename(tmpdir, monkeypatch, split_size):
+    monkeypatch.setattr(util, 'SPLIT_SIZE', split_size)
+    path = tmpdir.join('input.txt')
+    path.write_binary(b'a\r\nbbbb\r\ncc\r\nd\n')
+    assert fix_filename(str(path), 'auto') == 1
+    assert path.read_binary() == b'a\r\nbbbb\r\ncc\r\nd\r\n'
+    assert fix_filename(str(path), 'auto') == 0
+    assert fix_filename(str(path), 'lf') == 1
+    assert path.read_binary() == b'a\nbbbb\ncc\nd\n'
@@ -77,3 +77,8 @@ def test_default_branch_names(temp_git_dir, branch_name):
     with temp_git_dir.as_cwd():
         cmd_output('git', 'checkout', '-b', branch_name)
         assert main(()) == 1
+
+
+def test_not_in_a_repository(tmpdir):
+    with tmpdir.as_cwd():
+        assert main(()) == 0
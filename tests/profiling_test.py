@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import argparse
+import json
+
+import pytest
+
+from pre_commit_hooks import profiling
+from pre_commit_hooks.profiling import hook_name
+from pre_commit_hooks.profiling import load
+from pre_commit_hooks.profiling import summarize
+from pre_commit_hooks.profiling import summarize_memory
+from pre_commit_hooks.util import cmd_output
+from pre_commit_hooks.util import map_files
+
+
+@pytest.fixture
+def profile(tmpdir, monkeypatch):
+    path = tmpdir.join('profile.jsonl')
+    monkeypatch.setenv(profiling.PROFILE_ENV, str(path))
+    monkeypatch.setattr('sys.argv', ['check-foo'])
+    yield path
+
+
+def _read_and_git(filename):
+    with open(filename) as f:
+        f.read()
+    cmd_output('git', '--version')
+    return 0
+
+
+@pytest.mark.parametrize(
+    ('argv0', 'expected'),
+    (
+        ('/venv/bin/check-json', 'check-json'),
+        ('/src/pre_commit_hooks/check_json.py', 'check_json'),
+        ('pre_commit_hooks.check_json', 'check_json'),
+    ),
+)
+def test_hook_name(argv0, expected, monkeypatch):
+    monkeypatch.setattr('sys.argv', [argv0])
+    assert hook_name() == expected
+
+
+def test_disabled(tmpdir, monkeypatch):
+    monkeypatch.delenv(profiling.PROFILE_ENV, raising=False)
+    tmpdir.join('f').write('hello')
+    with tmpdir.as_cwd():
+        assert map_files(_read_and_git, ['f'], argparse.Namespace()) == [0]
+    assert tmpdir.listdir() == [tmpdir.join('f')]
+
+
+def test_profile_files_and_commands(tmpdir, profile):
+    tmpdir.join('f').write('hello')
+    with tmpdir.as_cwd():
+        assert map_files(_read_and_git, ['f'], argparse.Namespace()) == [0]
+        cmd_output('git', '--version')
+
+    cmd, file, top_cmd = load(str(profile))
+    assert cmd['kind'] == 'cmd'
+    assert cmd['name'] == 'git --version'
+    assert cmd['file'] == 'f'
+    assert cmd['subprocesses'] == 1
+    assert file['hook'] == 'check-foo'
+    assert file['kind'] == 'file'
+    assert file['name'] == 'f'
+    assert file['file'] is None
+    assert file['subprocesses'] == 1
+    assert file['read'] >= len('hello')
+    assert file['wall'] >= cmd['wall']
+    assert file['peak'] is None
+    assert file['maxrss'] >= cmd['maxrss'] > 0
+    assert top_cmd['file'] is None
+
+
+def _allocate(filename):
+    data = b'x' * (1 << 20)
+    return len(data) - (1 << 20)
+
+
+def test_profile_memory(tmpdir, profile, monkeypatch):
+    monkeypatch.setenv(profiling.MEMORY_ENV, '1')
+    with tmpdir.as_cwd():
+        assert map_files(_allocate, ['f'], argparse.Namespace()) == [0]
+        cmd_output('git', '--version')
+
+    file, cmd = load(str(profile))
+    assert file['peak'] >= 1 << 20
+    assert cmd['peak'] is None
+
+
+def test_profile_parallel(tmpdir, profile):
+    for name in ('a', 'b', 'c'):
+        tmpdir.join(name).write(name)
+    with tmpdir.as_cwd():
+        args = argparse.Namespace(jobs=3)
+        assert map_files(_read_and_git, ['a', 'b', 'c'], args) == [0, 0, 0]
+
+    entries = load(str(profile))
+    files = sorted(e['name'] for e in entries if e['kind'] == 'file')
+    assert files == ['a', 'b', 'c']
+    assert {e['hook'] for e in entries} == {'check-foo'}
+
+
+class _Prepared:
+    def __init__(self):
+        self.prepared = None
+        self.closed = False
+
+    def __call__(self, filename):
+        return 0
+
+    def prepare(self, filenames):
+        self.prepared = filenames
+
+    def close(self):
+        self.closed = True
+
+
+def test_profile_prepares_and_closes(tmpdir, profile):
+    func = _Prepared()
+    with tmpdir.as_cwd():
+        assert map_files(func, ['f'], argparse.Namespace()) == [0]
+    assert func.prepared == ['f']
+    assert func.closed
+
+
+def _entry(hook, kind, name, wall, file=None):
+    return {
+        'hook': hook, 'kind': kind, 'name': name, 'file': file,
+        'wall': wall, 'cpu': wall / 2, 'read': 2048, 'written': 0,
+        'subprocesses': int(kind == 'cmd'),
+    }
+
+
+ENTRIES = [
+    _entry('check-a', 'cmd', 'git ls-files', 1.5, file='x'),
+    _entry('check-a', 'file', 'x', 2.),
+    _entry('check-a', 'file', 'y', .5),
+    _entry('check-b', 'cmd', 'git diff', .25),
+]
+
+
+def test_summarize():
+    assert summarize(ENTRIES, top=1) == [
+        'slowest hooks:',
+        '     2.500s wall    1.250s cpu  check-a (2 files, 1 commands)',
+        'slowest files:',
+        '     2.000s wall    1.000s cpu      2KiB read       0B written  '
+        'check-a: x',
+        'slowest commands:',
+        '     1.500s wall    0.750s cpu      2KiB read       0B written  '
+        'check-a: git ls-files',
+    ]
+
+
+@pytest.mark.parametrize(
+    ('n', 'expected'),
+    ((0, '0B'), (1023, '1023B'), (5 << 20, '5MiB'), (3 << 30, '3GiB')),
+)
+def test_size(n, expected):
+    assert profiling._size(n) == expected
+
+
+MEMORY_ENTRIES = [
+    {
+        **_entry('check-a', 'file', 'x', 1.),
+        'peak': 3 << 20, 'maxrss': 40 << 20,
+    },
+    {
+        **_entry('check-a', 'file', 'y', 1.),
+        'peak': 1 << 20, 'maxrss': 50 << 20,
+    },
+    {
+        **_entry('check-b', 'file', 'z', 1.),
+        'peak': None, 'maxrss': 20 << 20,
+    },
+    {
+        **_entry('check-b', 'cmd', 'git diff', .25),
+        'maxrss': 30 << 20,
+    },
+]
+
+
+def test_summarize_memory():
+    assert summarize_memory(MEMORY_ENTRIES, top=2) == [
+        'largest memory files:',
+        '      3MiB peak  check-a: x',
+        '      1MiB peak  check-a: y',
+        'largest process peak rss hooks:',
+        '     50MiB rss  check-a',
+        '     30MiB rss  check-b',
+    ]
+
+
+def test_summarize_memory_untraced():
+    assert summarize_memory(ENTRIES, top=1) == [
+        'largest memory files:',
+        '  (not traced, set $PRE_COMMIT_HOOKS_PROFILE_MEMORY=1)',
+        'largest process peak rss hooks:',
+        '         - rss  check-a',
+    ]
+
+
+@pytest.mark.parametrize(
+    ('s', 'expected'),
+    (('100', 100), ('2k', 2048), ('3M', 3 << 20), ('1G', 1 << 30)),
+)
+def test_parse_size(s, expected):
+    assert profiling._parse_size(s) == expected
+
+
+@pytest.mark.parametrize('s', ('', 'M', '1T', '1.5M'))
+def test_parse_size_invalid(s):
+    with pytest.raises(argparse.ArgumentTypeError):
+        profiling._parse_size(s)
+
+
+def test_main_memory_report(tmpdir, capsys):
+    path = tmpdir.join('profile.jsonl')
+    path.write(''.join(f'{json.dumps(e)}\n' for e in MEMORY_ENTRIES))
+    argv = (str(path), '--memory-report', '--max-file-memory=2M')
+    assert profiling.main(argv) == 1
+    out, _ = capsys.readouterr()
+    assert 'largest memory files:' in out
+    assert out.splitlines()[-1] == 'check-a: x used 3MiB (limit 2MiB)'
+
+    assert profiling.main((str(path), '--max-file-memory=3M')) == 0
+
+
+def test_main_max_file_memory_untraced(tmpdir, capsys):
+    path = tmpdir.join('profile.jsonl')
+    path.write(''.join(f'{json.dumps(e)}\n' for e in ENTRIES))
+    with pytest.raises(SystemExit):
+        profiling.main((str(path), '--max-file-memory=3M'))
+    _, err = capsys.readouterr()
+    assert '--max-file-memory: no traced files' in err
+
+
+def test_main(tmpdir, capsys):
+    path = tmpdir.join('profile.jsonl')
+    path.write(''.join(f'{json.dumps(e)}\n' for e in ENTRIES) + '\n')
+    assert profiling.main((str(path), '--top=2')) == 0
+    out, _ = capsys.readouterr()
+    assert out.splitlines()[:3] == [
+        'slowest hooks:',
+        '     2.500s wall    1.250s cpu  check-a (2 files, 1 commands)',
+        '     0.250s wall    0.125s cpu  check-b (0 files, 1 commands)',
+    ]
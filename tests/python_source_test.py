@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import ast
+import collections
+import os
+import tokenize
+
+import pytest
+
+from pre_commit_hooks import check_ast
+from pre_commit_hooks import check_builtin_literals
+from pre_commit_hooks import debug_statement_hook
+from pre_commit_hooks import python_source
+from pre_commit_hooks.python_source import Source
+
+
+@pytest.fixture(autouse=True)
+def no_sources(monkeypatch):
+    monkeypatch.setattr(python_source, '_sources', collections.OrderedDict())
+
+
+def test_source():
+    source = Source('f.py', b'x = "\xc2\xa3"\n')
+    assert source.encoding == 'utf-8'
+    assert source.text == 'x = "\xa3"\n'
+    assert source.text is source.text
+    assert source.tree is source.tree
+    assert source.tokens is source.tokens
+    assert source.tokens[0].type == tokenize.ENCODING
+    assert source.tokens[3].string == '"\xa3"'
+
+
+def test_source_coding_cookie():
+    source = Source('f.py', '# coding: cp1252\nx = "£"\n'.encode('cp1252'))
+    assert source.encoding == 'cp1252'
+    assert source.text == '# coding: cp1252\nx = "£"\n'
+
+
+def test_source_syntax_error():
+    source = Source('f.py', b'x = (\n')
+    with pytest.raises(SyntaxError) as excinfo1:
+        source.tree
+    with pytest.raises(SyntaxError) as excinfo2:
+        source.tree
+    assert excinfo1.value is not excinfo2.value
+
+
+def test_get(tmpdir):
+    f = tmpdir.join('f.py')
+    f.write_binary(b'x = 1\n')
+    source = python_source.get(str(f))
+    assert source.data == b'x = 1\n'
+    assert python_source.get(str(f)) is source
+
+    f.write_binary(b'x = 12\n')
+    assert python_source.get(str(f)).data == b'x = 12\n'
+
+
+def test_get_replaced(tmpdir):
+    f = tmpdir.join('f.py')
+    f.write_binary(b'x = 1\n')
+    source = python_source.get(str(f))
+    st = os.stat(str(f))
+    tmpdir.join('tmp').write_binary(b'x = 2\n')
+    os.replace(str(tmpdir.join('tmp')), str(f))
+    os.utime(str(f), ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert python_source.get(str(f)) is not source
+
+
+def test_get_missing(tmpdir):
+    with pytest.raises(FileNotFoundError):
+        python_source.get(str(tmpdir.join('missing.py')))
+
+
+def test_get_least_recently_used_dropped(tmpdir, monkeypatch):
+    monkeypatch.setattr(python_source, 'MAX_SOURCES', 2)
+    a, b, c = (str(tmpdir.join(f'{name}.py').ensure()) for name in 'abc')
+    source_a = python_source.get(a)
+    python_source.get(b)
+    assert python_source.get(a) is source_a
+    python_source.get(c)
+    assert list(python_source._sources) == [a, c]
+
+
+def test_parsed_once_between_hooks(tmpdir, monkeypatch):
+    f = tmpdir.join('f.py')
+    f.write_binary(b'import pdb\n')
+    parses = []
+
+    def parse(*args, **kwargs):
+        parses.append(args)
+        return real_parse(*args, **kwargs)
+    real_parse = ast.parse
+    monkeypatch.setattr(ast, 'parse', parse)
+
+    assert check_ast.main((str(f),)) == 0
+    assert check_builtin_literals.main((str(f),)) == 0
+    assert debug_statement_hook.main((str(f),)) == 1
+    assert len(parses) == 1
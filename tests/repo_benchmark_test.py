@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import json
+import subprocess
+
+from testing import repo_benchmark
+from testing.repo_benchmark import compare
+from testing.repo_benchmark import make_repo
+
+
+def test_make_repo(tmpdir):
+    repo = str(tmpdir.join('repo'))
+    filenames = make_repo(repo, 250, depth=3, staged=5)
+    assert filenames[:3] == ['d0/d0/d0/f0', 'd0/d6/d4/f100', 'd0/d12/d8/f200']
+    assert filenames[3:] == ['staged/d0/d0/d0/f0', 'staged/d0/d0/d1/f1']
+
+    ls_files = subprocess.check_output(('git', '-C', repo, 'ls-files', '-s'))
+    modes = [line.split()[0] for line in ls_files.decode().splitlines()]
+    assert len(modes) == 252
+    # each of the symlinks was replaced with a regular file
+    assert '120000' not in modes
+    assert modes.count('100755') == 3
+
+    head = subprocess.check_output(
+        ('git', '-C', repo, 'ls-tree', '-r', 'HEAD'),
+    )
+    assert head.decode().count('120000 blob') == 3
+
+    staged = subprocess.check_output(
+        ('git', '-C', repo, 'diff', '--staged', '--name-only'),
+    )
+    assert sorted(staged.decode().splitlines()) == sorted(filenames)
+
+
+def test_compare():
+    old = {'results': [{'hook': 'a', 'paths': 10, 'seconds': 2.0}]}
+    new = {
+        'results': [
+            {'hook': 'a', 'paths': 10, 'seconds': 1.0},
+            {'hook': 'a', 'paths': 100, 'seconds': 1.0},
+        ],
+    }
+    assert compare(old, new) == ['a (10 paths): 2.000s -> 1.000s (x0.50)']
+
+
+def test_main(tmpdir, capsys):
+    workdir = str(tmpdir.join('work'))
+    output = str(tmpdir.join('out.json'))
+    argv = (
+        '--sizes=200', '--depth=2', '--staged=4', '--repeat=1',
+        f'--workdir={workdir}', '--hooks', 'destroyed_symlinks',
+    )
+    assert repo_benchmark.main((*argv, f'--output={output}')) == 0
+    # the second run reuses the generated repository
+    assert repo_benchmark.main((*argv, f'--compare={output}')) == 0
+
+    with open(output) as f:
+        results = json.load(f)
+    result, = results['results']
+    assert result['hook'] == 'destroyed_symlinks'
+    assert result['paths'] == 200
+    assert result['returncode'] == 1
+
+    out, _ = capsys.readouterr()
+    lines = out.splitlines()
+    assert lines[0].startswith('destroyed_symlinks (200 paths): ')
+    assert lines[2] == f'compared to {output}'
+    assert lines[3].startswith('destroyed_symlinks (200 paths): ')
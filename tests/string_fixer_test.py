@@ -54,3 +54,18 @@ def test_rewrite_crlf(tmpdir):
     f.write_binary(b'"foo"\r\n"bar"\r\n')
     assert main((str(f),))
     assert f.read_binary() == b"'foo'\r\n'bar'\r\n"
+
+
+@pytest.mark.parametrize(
+    'header',
+    (
+        b'# -*- coding: latin-1 -*-\n',
+        b'# -*- coding: not-an-encoding -*-\n',
+        b'\xef\xbb\xbf',
+    ),
+)
+def test_rewrite_declared_encoding(tmpdir, header):
+    f = tmpdir.join('f.py')
+    f.write_binary(header + b'x = "foo"\n')
+    assert main((str(f),)) == 1
+    assert f.read_binary() == header + b"x = 'foo'\n"
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import json
+import os.path
+import subprocess
+import sys
+
+import pytest
+
+from testing import throughput
+from testing.throughput import BENCHMARKS
+from testing.throughput import compare
+from testing.throughput import measure
+from testing.util import TESTING_DIR
+
+
+def test_compare():
+    baseline = {'mb_per_s': 10, 'files_per_s': 100}
+    assert compare(baseline, {'mb_per_s': 8, 'files_per_s': 100}, .25) == []
+    assert compare(baseline, {'mb_per_s': 7, 'files_per_s': 70}, .25) == [
+        'mb_per_s', 'files_per_s',
+    ]
+
+
+@pytest.mark.parametrize('name', sorted(BENCHMARKS))
+def test_measure(tmpdir, name):
+    result = measure(BENCHMARKS[name], str(tmpdir))
+    assert set(result) == {'mb_per_s', 'files_per_s'}
+    # the fixers' corpora have something to fix
+    changed = tmpdir.join('f0').read_binary() != BENCHMARKS[name].corpus(1)[0]
+    assert changed == (name != 'check_docstring_first')
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize('name', sorted(BENCHMARKS))
+def test_throughput(name):  # pragma: no cover (opt in, `-m benchmark`)
+    # in a fresh interpreter, untraced by coverage.  Lenient, timings on a
+    # shared machine vary a lot between runs
+    cmd = (
+        sys.executable, '-m', 'testing.throughput',
+        '--repeat=3', '--tolerance=.5', name,
+    )
+    proc = subprocess.run(
+        cmd, capture_output=True, cwd=os.path.dirname(TESTING_DIR), text=True,
+    )
+    assert proc.returncode == 0, proc.stdout + proc.stderr
+
+
+def test_main(tmpdir, capsys):
+    baseline = str(tmpdir.join('baseline.json'))
+    args = ('--repeat=1', f'--baseline={baseline}')
+    assert throughput.main((*args, '--update', 'string_fixer')) == 0
+    with open(baseline) as f:
+        assert list(json.load(f)['results']) == ['string_fixer']
+
+    ret = throughput.main(
+        (*args, '--tolerance=1', 'string_fixer', 'check_docstring_first'),
+    )
+    assert ret == 0
+    assert throughput.main((*args, '--tolerance=-100', 'string_fixer')) == 1
+    out, _ = capsys.readouterr()
+    lines = out.splitlines()
+    assert lines[0].endswith(': recorded')
+    assert lines[1].endswith(': ok')
+    assert lines[2].endswith(': no baseline')
+    assert lines[3].endswith(
+        ': slower than baseline (mb_per_s, files_per_s)',
+    )
+
+
+def test_main_unknown_benchmark(capsys):
+    with pytest.raises(SystemExit):
+        throughput.main(('nope',))
+    _, err = capsys.readouterr()
+    assert err.endswith('error: unknown benchmark: nope\n')
@@ -101,3 +101,21 @@ def test_markdown_with_custom_charset(tmpdir):
     ret = main([str(path), '--chars', ' ', '--markdown-linebreak-ext', '*'])
     assert ret == 1
     assert path.read() == '\ta \t  \n'
+
+
+def test_fixes_in_parallel(tmpdir, capsys):
+    paths = [tmpdir.join(f'f{i}') for i in range(4)]
+    for path in paths:
+        path.write('foo \nbar\n')
+    assert main(('--jobs', '2', *(str(path) for path in paths))) == 1
+    assert all(path.read() == 'foo\nbar\n' for path in paths)
+    out, _ = capsys.readouterr()
+    assert out == ''.join(f'Fixing {path}\n' for path in paths)
+
+
+def test_fixes_in_place(tmpdir):
+    f = tmpdir.join('f.txt')
+    f.write_binary(b'foo\nbar \n')
+    tmpdir.join('link').mklinkto(f)
+    assert main((str(f),)) == 1
+    assert tmpdir.join('link').read_binary() == b'foo\nbar\n'
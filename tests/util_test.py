@@ -1,10 +1,53 @@
 from __future__ import annotations
 
+import argparse
+import base64
+import io
+import mmap
+import os
+import random
+import subprocess
+import sys
+import timeit
+
 import pytest
 
+from pre_commit_hooks import util
+from pre_commit_hooks.cache import blob_id
+from pre_commit_hooks.detect_private_key import BLACKLIST
+from pre_commit_hooks.util import _call_captured
+from pre_commit_hooks.util import _common_prefix
+from pre_commit_hooks.util import _lpt_batches
+from pre_commit_hooks.util import added_files
+from pre_commit_hooks.util import add_changed_lines_argument
+from pre_commit_hooks.util import add_execution_arguments
+from pre_commit_hooks.util import add_files_from_arguments
+from pre_commit_hooks.util import add_read_ahead_argument
+from pre_commit_hooks.util import add_staged_argument
 from pre_commit_hooks.util import CalledProcessError
+from pre_commit_hooks.util import changed_lines
 from pre_commit_hooks.util import cmd_output
+from pre_commit_hooks.util import Contents
+from pre_commit_hooks.util import GitCatFile
+from pre_commit_hooks.util import line_chunks
+from pre_commit_hooks.util import map_buffers
+from pre_commit_hooks.util import map_contents
+from pre_commit_hooks.util import map_files
+from pre_commit_hooks.util import map_lines
+from pre_commit_hooks.util import map_ranges
+from pre_commit_hooks.util import memoize_git
+from pre_commit_hooks.util import MultiPattern
+from pre_commit_hooks.util import ObjectInfo
+from pre_commit_hooks.util import parse_args
+from pre_commit_hooks.util import parse_hook_ids
+from pre_commit_hooks.util import read_ahead
+from pre_commit_hooks.util import rewrite
+from pre_commit_hooks.util import split_lines
+from pre_commit_hooks.util import staged_blob_ids
+from pre_commit_hooks.util import stream_fix
+from pre_commit_hooks.util import write_changes
 from pre_commit_hooks.util import zsplit
+from testing.util import git_commit
 
 
 def test_raises_on_error():
@@ -25,3 +68,834 @@ def test_check_zsplits_str_correctly(out):
 @pytest.mark.parametrize('out', ('\0\0', '\0', ''))
 def test_check_zsplit_returns_empty(out):
     assert zsplit(out) == []
+
+
+def _parse_execution_args(*argv):
+    parser = argparse.ArgumentParser()
+    add_execution_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def test_jobs_default():
+    assert _parse_execution_args().jobs == 1
+
+
+def test_jobs_zero_means_cpu_count():
+    assert _parse_execution_args('--jobs', '0').jobs >= 1
+
+
+def test_jobs_negative():
+    with pytest.raises(SystemExit):
+        _parse_execution_args('--jobs', '-1')
+
+
+def _report(filename):
+    print(f'stdout {filename}')
+    print(f'stderr {filename}', file=sys.stderr)
+    return int(filename.endswith('1'))
+
+
+@pytest.mark.parametrize('jobs', ('1', '3'))
+def test_map_files_output_in_order(jobs, capsys):
+    filenames = [f'f{i}' for i in range(20)]
+    args = _parse_execution_args('--jobs', jobs)
+    ret = map_files(_report, filenames, args)
+    assert ret == [int(filename.endswith('1')) for filename in filenames]
+    out, err = capsys.readouterr()
+    assert out == ''.join(f'stdout {filename}\n' for filename in filenames)
+    assert err == ''.join(f'stderr {filename}\n' for filename in filenames)
+
+
+@pytest.mark.parametrize(
+    ('sizes', 'jobs', 'expected'),
+    (
+        ((), 2, []),
+        ((1, 100, 5, 50), 1, [[1], [3], [2], [0]]),
+        ((1,) * 9 + (100,), 1, [[9], [0, 1], [2, 3], [4, 5], [6, 7], [8]]),
+        ((0, 0, 0), 2, [[0], [1], [2]]),
+    ),
+)
+def test_lpt_batches(sizes, jobs, expected):
+    assert _lpt_batches(sizes, jobs) == expected
+
+
+def test_map_files_largest_first(tmpdir, capsys):
+    # the largest (last) files are checked first, output is still in order
+    filenames = [str(tmpdir.join(f'f{i}')) for i in range(20)]
+    for i, filename in enumerate(filenames):
+        with open(filename, 'w') as f:
+            f.write('x' * i * 1000)
+    args = _parse_execution_args('--jobs', '3')
+    ret = map_files(_report, filenames, args)
+    assert ret == [int(filename.endswith('1')) for filename in filenames]
+    out, _ = capsys.readouterr()
+    assert out == ''.join(f'stdout {filename}\n' for filename in filenames)
+
+
+def test_call_captured():
+    assert _call_captured(_report, 'f1') == (1, b'stdout f1\n', b'stderr f1\n')
+
+
+def _hash_object(contents):
+    return subprocess.check_output(
+        ('git', 'hash-object', '-w', '--stdin'), input=contents,
+    ).decode().strip()
+
+
+def test_git_cat_file(temp_git_dir):
+    with temp_git_dir.as_cwd():
+        # enough objects that the requests and answers don't fit in a pipe
+        blobs = [f'blob {i}\n'.encode() * 500 for i in range(100)]
+        oids = [_hash_object(blob) for blob in blobs]
+        missing = '0' * 40
+        with GitCatFile() as cat_file:
+            infos = cat_file.info([*oids, missing])
+            assert infos[0] == ObjectInfo(oids[0], 'blob', len(blobs[0]))
+            assert infos[-1] is None
+            assert cat_file.contents([*oids, missing]) == [*blobs, None]
+            # the processes are reused between calls
+            assert cat_file.contents(oids[:1]) == blobs[:1]
+            assert cat_file.info([]) == []
+
+
+def test_git_cat_file_error(tmpdir):
+    with tmpdir.as_cwd(), GitCatFile() as cat_file:
+        with pytest.raises(CalledProcessError):
+            cat_file.info(['HEAD'])
+
+
+def _files_from_parser():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('filenames', nargs='*')
+    add_files_from_arguments(parser)
+    return parser
+
+
+def test_files_from_file(tmpdir):
+    files_from = tmpdir.join('files')
+    files_from.write_binary(b'b\nc d\n\n')
+    argv = ('a', '--files-from', str(files_from))
+    args = parse_args(_files_from_parser(), argv)
+    assert args.filenames == ['a', 'b', 'c d']
+
+
+def test_files_from_stdin_null(monkeypatch):
+    stdin = io.TextIOWrapper(io.BytesIO(b'a\nb\0c\0'))
+    monkeypatch.setattr(sys, 'stdin', stdin)
+    args = parse_args(_files_from_parser(), ('-z', '--files-from', '-'))
+    assert args.filenames == ['a\nb', 'c']
+
+
+def test_no_files_from():
+    assert parse_args(_files_from_parser(), ('a',)).filenames == ['a']
+
+
+def test_all_files(temp_git_dir):
+    with temp_git_dir.as_cwd():
+        temp_git_dir.join('a.json').write('{}')
+        temp_git_dir.join('b.json').write('{}')
+        temp_git_dir.join('c.py').write('')
+        cmd_output('git', 'add', '.')
+        parser = argparse.ArgumentParser()
+        parser.add_argument('filenames', nargs='*')
+        add_files_from_arguments(parser, types=('json',))
+        args = parse_args(parser, ('x', '--all-files', '--exclude', '^b'))
+        assert args.filenames == ['x', 'a.json']
+        args = parse_args(parser, ('--all-files', '--files', 'b'))
+        assert args.filenames == ['b.json']
+
+
+def test_require_filenames(tmpdir, capsys):
+    files_from = tmpdir.join('files')
+    files_from.write('a\n')
+    parser = _files_from_parser()
+    argv = ('--files-from', str(files_from))
+    args = parse_args(parser, argv, require_filenames=True)
+    assert args.filenames == ['a']
+
+    files_from.write('')
+    with pytest.raises(SystemExit):
+        parse_args(parser, argv, require_filenames=True)
+    _, err = capsys.readouterr()
+    assert err.endswith('the following arguments are required: filenames\n')
+
+
+def test_parse_hook_ids():
+    hook_ids = ('check-json', 'check-yaml')
+    assert parse_hook_ids(' check-yaml,,check-json ', hook_ids) == [
+        'check-yaml', 'check-json',
+    ]
+    with pytest.raises(argparse.ArgumentTypeError) as excinfo:
+        parse_hook_ids('check-yaml,wat', hook_ids)
+    msg, = excinfo.value.args
+    assert msg == "unknown hook 'wat' (choose from check-json, check-yaml)"
+
+
+def _first_line(filename, contents):
+    print(f'{filename}: {contents.splitlines()[0].decode()}')
+    return 0
+
+
+@pytest.fixture
+def staged_repo(temp_git_dir):
+    with temp_git_dir.as_cwd():
+        temp_git_dir.join('staged').write('staged\n')
+        temp_git_dir.join('sub').ensure_dir().join('f[1]').write('staged\n')
+        os.symlink('staged', 'link')
+        cmd_output('git', 'add', 'staged', 'sub', 'link')
+        temp_git_dir.join('staged').write('working tree\n')
+        temp_git_dir.join('untracked').write('untracked\n')
+        yield temp_git_dir
+
+
+def test_staged_blob_ids(staged_repo):
+    filenames = ['staged', './sub/f[1]', 'link', 'untracked']
+    blob_ids = staged_blob_ids(filenames)
+    assert blob_ids == dict.fromkeys(
+        ('staged', './sub/f[1]'), _hash_object(b'staged\n'),
+    )
+
+
+def test_staged_blob_ids_each_spelling(staged_repo):
+    blob_ids = staged_blob_ids(['staged', './staged', 'untracked'])
+    assert blob_ids == dict.fromkeys(
+        ('staged', './staged'), _hash_object(b'staged\n'),
+    )
+
+
+def test_map_contents_staged_each_spelling(staged_repo, capsys):
+    args = argparse.Namespace(staged=True)
+    assert map_contents(_first_line, ['staged', './staged'], args) == [0, 0]
+    out, _ = capsys.readouterr()
+    assert out == 'staged: staged\n./staged: staged\n'
+
+
+@pytest.mark.parametrize(
+    ('argv', 'expected'),
+    (
+        ((), 'staged: working tree\nuntracked: untracked\n'),
+        (('--staged',), 'staged: staged\nuntracked: untracked\n'),
+        (
+            ('--read-ahead', '2'),
+            'staged: working tree\nuntracked: untracked\n',
+        ),
+        (
+            ('--staged', '--read-ahead', '2'),
+            'staged: staged\nuntracked: untracked\n',
+        ),
+    ),
+)
+def test_map_contents(staged_repo, argv, expected, capsys):
+    parser = argparse.ArgumentParser()
+    add_staged_argument(parser)
+    add_read_ahead_argument(parser)
+    args = parser.parse_args(argv)
+    assert map_contents(_first_line, ['staged', 'untracked'], args) == [0, 0]
+    out, _ = capsys.readouterr()
+    assert out == expected
+
+
+def test_map_contents_staged_jobs(staged_repo, capsys):
+    args = argparse.Namespace(staged=True, jobs=2)
+    filenames = ['staged', 'untracked']
+    assert map_contents(_first_line, filenames, args) == [0, 0]
+    out, _ = capsys.readouterr()
+    assert out == 'staged: staged\nuntracked: untracked\n'
+
+
+def test_staged_contents_prepared_per_batch(staged_repo, capsys):
+    per_file = util._StagedContents(_first_line, ['staged', 'untracked'])
+    assert per_file.contents == {}
+    per_file.prepare(['untracked'])
+    assert per_file.contents == {}
+    # not among the prepared files, read on its own
+    assert per_file('staged') == 0
+    per_file.close()
+    assert per_file.contents == {}
+    out, _ = capsys.readouterr()
+    assert out == 'staged: staged\n'
+
+
+def test_staged_contents_blob_id(staged_repo, capsys):
+    per_file = util._StagedContents(_first_line, ['staged', 'untracked'])
+    assert per_file.blob_id('staged') == per_file.blob_ids['staged']
+    # not staged, read once from the working tree
+    assert per_file.blob_id('untracked') == blob_id(b'untracked\n')
+    assert per_file.unstaged.kept == ('untracked', b'untracked\n')
+    assert per_file('untracked') == 0
+    assert per_file.unstaged.kept is None
+    out, _ = capsys.readouterr()
+    assert out == 'untracked: untracked\n'
+
+
+def test_file_contents_blob_id_read_once(tmpdir, monkeypatch, capsys):
+    f, g = str(tmpdir.join('f')), str(tmpdir.join('g'))
+    tmpdir.join('f').write('f\n')
+    tmpdir.join('g').write('g\n')
+    reads: list[str] = []
+    read_file = util._read_file
+
+    def _read_file(filename):
+        reads.append(filename)
+        return read_file(filename)
+    monkeypatch.setattr(util, '_read_file', _read_file)
+
+    per_file = util._FileContents(_first_line)
+    assert per_file.blob_id(f) == blob_id(b'f\n')
+    assert per_file(f) == 0
+    # what was read isn't kept for another file
+    per_file.blob_id(f)
+    assert per_file(g) == 0
+    assert reads == [f, f, g]
+    out, _ = capsys.readouterr()
+    assert out == f'{f}: f\n{g}: g\n'
+
+
+def _buffer_size(filename, contents):
+    print(f'{filename}: {len(contents.data)}')
+    return 0
+
+
+def _kept_mmap(per_file):
+    assert per_file.kept is not None
+    data = per_file.kept[1].data
+    assert isinstance(data, mmap.mmap)
+    return data
+
+
+def test_file_buffers_blob_id(tmpdir, monkeypatch, capsys):
+    monkeypatch.setattr(util, 'MMAP_MIN_SIZE', 0)
+    f, g = str(tmpdir.join('f')), str(tmpdir.join('g'))
+    tmpdir.join('f').write('f\n')
+    tmpdir.join('g').write('gg\n')
+
+    per_file = util._FileBuffers(_buffer_size)
+    assert per_file.blob_id(f) == blob_id(b'f\n')
+    kept_f = _kept_mmap(per_file)
+    assert per_file(f) == 0
+    assert kept_f.closed
+
+    per_file.blob_id(f)
+    kept_f = _kept_mmap(per_file)
+    per_file.blob_id(g)
+    assert kept_f.closed
+    kept_g = _kept_mmap(per_file)
+    assert per_file(f) == 0
+    assert kept_g.closed
+    per_file.blob_id(g)
+    per_file.close()
+    assert per_file.kept is None
+    out, _ = capsys.readouterr()
+    assert out == f'{f}: 2\n{f}: 2\n'
+
+
+def test_read_ahead_negative():
+    parser = argparse.ArgumentParser()
+    add_read_ahead_argument(parser)
+    with pytest.raises(SystemExit):
+        parser.parse_args(('--read-ahead', '-1'))
+
+
+def test_read_ahead(tmpdir):
+    filenames = [str(tmpdir.join(f'f{i}')) for i in range(10)]
+    for i, filename in enumerate(filenames):
+        with open(filename, 'wb') as f:
+            f.write(b'%d\n' % i)
+    assert list(read_ahead(filenames, 3)) == [
+        (filename, b'%d\n' % i) for i, filename in enumerate(filenames)
+    ]
+
+
+def test_read_ahead_error(tmpdir):
+    tmpdir.join('f').write('f\n')
+    files = read_ahead([str(tmpdir.join('f')), str(tmpdir.join('missing'))], 2)
+    assert next(files) == (str(tmpdir.join('f')), b'f\n')
+    with pytest.raises(FileNotFoundError):
+        next(files)
+
+
+def test_read_ahead_stopped_early(tmpdir):
+    filenames = [str(tmpdir.join(f'f{i}').ensure()) for i in range(5)]
+    files = read_ahead(filenames, 2)
+    assert next(files) == (filenames[0], b'')
+    files.close()
+
+
+@pytest.mark.parametrize('jobs', ('1', '3'))
+def test_map_contents_read_ahead_order(tmpdir, jobs, capsys):
+    filenames = [str(tmpdir.join(f'f{i}')) for i in range(5)]
+    for filename in filenames:
+        with open(filename, 'w') as f:
+            f.write(f'{os.path.basename(filename)}\n')
+    parser = argparse.ArgumentParser()
+    add_execution_arguments(parser)
+    add_read_ahead_argument(parser)
+    args = parser.parse_args(('--jobs', jobs, '--read-ahead', '2'))
+    assert map_contents(_first_line, filenames, args) == [0] * 5
+    out, _ = capsys.readouterr()
+    assert out == ''.join(
+        f'{filename}: {os.path.basename(filename)}\n' for filename in filenames
+    )
+
+
+def test_read_ahead_out_of_order(tmpdir, capsys):
+    tmpdir.join('a').write('a\n')
+    tmpdir.join('b').write('b\n')
+    with tmpdir.as_cwd():
+        per_file = util._ReadAhead(_first_line, ['a', 'b'], 2)
+        assert (per_file('b'), per_file('a')) == (0, 0)
+    out, _ = capsys.readouterr()
+    assert out == 'b: b\na: a\n'
+
+
+def test_changed_lines(temp_git_dir):
+    with temp_git_dir.as_cwd():
+        temp_git_dir.join('modified').write('1\n2\n3\n4\n')
+        temp_git_dir.join('deleted').write('gone\n')
+        cmd_output('git', 'add', 'modified', 'deleted')
+        git_commit('-m', 'initial')
+
+        temp_git_dir.join('modified').write('1\nchanged\n3\n4\nadded')
+        temp_git_dir.join('deleted').remove()
+        temp_git_dir.join('new file').write('new\n')
+        temp_git_dir.join('\u2603').write_binary(b'no newline')
+        temp_git_dir.join('unstaged').write('unstaged\n')
+        cmd_output('git', 'add', '--all', '--', '.', ':!unstaged')
+
+        filenames = ['./modified', 'deleted', 'new file', '\u2603', 'unstaged']
+        assert changed_lines(filenames) == {
+            './modified': [(2, b'changed\n'), (5, b'added')],
+            'deleted': [],
+            'new file': [(1, b'new\n')],
+            '\u2603': [(1, b'no newline')],
+            'unstaged': [],
+        }
+
+
+def test_changed_lines_each_spelling(temp_git_dir):
+    with temp_git_dir.as_cwd():
+        temp_git_dir.join('f').write('new\n')
+        cmd_output('git', 'add', 'f')
+        assert changed_lines(['f', './f']) == {
+            'f': [(1, b'new\n')],
+            './f': [(1, b'new\n')],
+        }
+
+
+def test_changed_lines_no_newline_removed(temp_git_dir):
+    with temp_git_dir.as_cwd():
+        temp_git_dir.join('f').write_binary(b'1\n2\n3')
+        cmd_output('git', 'add', 'f')
+        git_commit('-m', 'initial')
+
+        temp_git_dir.join('f').write_binary(b'0\n1\n2\n')
+        cmd_output('git', 'add', 'f')
+        # the marker is about the removed line, not the added one
+        assert changed_lines(['f']) == {'f': [(1, b'0\n')]}
+
+
+def _numbered(filename, numbered):
+    for i, line in numbered:
+        print(f'{filename}:{i}: {line.decode().strip()}')
+    return 0
+
+
+@pytest.mark.parametrize(
+    ('argv', 'expected'),
+    (
+        ((), 'staged:1: working tree\n'),
+        (('--staged',), 'staged:1: staged\n'),
+        (('--only-changed-lines',), 'staged:1: staged\n'),
+    ),
+)
+def test_map_lines(staged_repo, argv, expected, capsys):
+    parser = argparse.ArgumentParser()
+    add_staged_argument(parser)
+    add_changed_lines_argument(parser)
+    args = parser.parse_args(argv)
+    assert map_lines(_numbered, ['staged'], args) == [0]
+    out, _ = capsys.readouterr()
+    assert out == expected
+
+
+def test_map_lines_binary(tmpdir, capsys):
+    f = tmpdir.join('f')
+    f.write_binary(b'\0\n<<<<<<< HEAD\n')
+    assert map_lines(_numbered, [str(f)], argparse.Namespace()) == [0]
+    out, _ = capsys.readouterr()
+    assert out == f'{f}:1: \0\n{f}:2: <<<<<<< HEAD\n'
+
+
+def test_map_lines_changed_jobs(staged_repo, capsys):
+    args = argparse.Namespace(only_changed_lines=True, jobs=2)
+    assert map_lines(_numbered, ['staged', 'sub/f[1]'], args) == [0, 0]
+    out, _ = capsys.readouterr()
+    assert out == 'staged:1: staged\nsub/f[1]:1: staged\n'
+
+
+def test_changed_lines_unprepared(staged_repo, capsys):
+    per_file = util._ChangedLines(_numbered)
+    assert per_file('staged') == 0
+    per_file.close()
+    assert per_file.lines == {}
+    out, _ = capsys.readouterr()
+    assert out == 'staged:1: staged\n'
+
+
+@pytest.mark.parametrize('min_size', (1024 * 1024, 1))
+def test_contents(tmpdir, monkeypatch, min_size):
+    monkeypatch.setattr(util, 'MMAP_MIN_SIZE', min_size)
+    f = tmpdir.join('f')
+    f.write_binary(b'hello\r\nworld\nno newline')
+    with Contents.open(str(f)) as contents:
+        assert isinstance(contents.data, bytes) == (min_size > 1)
+        assert b'world' in contents
+        assert b'planet' not in contents
+        assert not contents.is_binary
+        # cached
+        assert not contents.is_binary
+        assert list(contents.lines()) == [
+            b'hello\r\n', b'world\n', b'no newline',
+        ]
+        # the lines can be read more than once
+        assert len(list(contents.lines())) == 3
+
+
+def test_contents_is_binary(tmpdir):
+    assert Contents(b'\x89PNG\r\n\x1a\n\0\0\0').is_binary
+    # only the first block is looked at
+    contents = Contents(b'x' * util.BINARY_SNIFF_SIZE + b'\0')
+    assert not contents.is_binary
+
+
+def _has_tree(filename, contents):
+    print(f'{filename}: {b"tree" in contents}')
+    return 0
+
+
+@pytest.mark.parametrize(
+    ('argv', 'expected'),
+    (
+        ((), 'staged: True\nuntracked: False\n'),
+        (('--staged',), 'staged: False\nuntracked: False\n'),
+    ),
+)
+def test_map_buffers(staged_repo, argv, expected, capsys):
+    parser = argparse.ArgumentParser()
+    add_staged_argument(parser)
+    args = parser.parse_args(argv)
+    assert map_buffers(_has_tree, ['staged', 'untracked'], args) == [0, 0]
+    out, _ = capsys.readouterr()
+    assert out == expected
+
+
+@pytest.mark.parametrize(
+    ('a', 'b', 'expected'),
+    (
+        (b'', b'', 0),
+        (b'abc', b'abc', 3),
+        (b'abc', b'abd', 2),
+        (b'abc', b'ab', 2),
+        (b'xbc', b'abc', 0),
+        (b'a' * 200000 + b'b', b'a' * 200000 + b'c', 200000),
+        (b'a' * 70000, b'a' * 65536 + b'b' * 10, 65536),
+    ),
+)
+def test_common_prefix(a, b, expected):
+    assert _common_prefix(a, b) == expected
+    assert _common_prefix(b, a) == expected
+
+
+def test_multi_pattern_groups():
+    patterns = MultiPattern((b'BEGIN RSA', b'BEGIN DSA', b'xy', b'BEGIN RSA'))
+    assert patterns.patterns == (b'BEGIN DSA', b'BEGIN RSA', b'xy')
+    assert [anchor for anchor, _ in patterns._groups] == [b'BEGIN ', b'xy']
+
+
+@pytest.mark.parametrize('patterns', ((), (b'a', b'')))
+def test_multi_pattern_empty(patterns):
+    with pytest.raises(ValueError):
+        MultiPattern(patterns)
+
+
+def test_multi_pattern_finditer(tmpdir):
+    patterns = MultiPattern((b'abcd', b'abcde', b'cdef', b'ef', b'zz'))
+    data = b'abcdef abcd ef'
+    expected = [
+        (0, b'abcd'), (0, b'abcde'), (2, b'cdef'), (4, b'ef'),
+        (7, b'abcd'), (12, b'ef'),
+    ]
+    assert list(patterns.finditer(data)) == expected
+    assert patterns.search(data) == (0, b'abcd')
+    assert patterns.search(b'nothing') is None
+
+    f = tmpdir.join('f')
+    f.write_binary(data)
+    with open(f, 'rb') as fp:
+        with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            assert list(patterns.finditer(m)) == expected
+
+
+def test_multi_pattern_match():
+    patterns = MultiPattern((b'=======\n', b'======= ', b'<<<<<<< '))
+    assert patterns.match(b'======= x\n') == b'======= '
+    assert patterns.match(b'=======\n') == b'=======\n'
+    assert patterns.match(b'=======') is None
+    assert patterns.match(b'x<<<<<<< ') is None
+    assert patterns.match(b'x<<<<<<< ', 1) == b'<<<<<<< '
+    assert patterns.match(b'') is None
+
+
+def test_multi_pattern_finditer_chunks():
+    patterns = MultiPattern((b'abcd', b'cd', b'xx'))
+    data = b'abcd..abcd.xxx'
+    expected = list(patterns.finditer(data))
+    for size in (1, 2, 3, 5, 100):
+        chunks = [data[i:i + size] for i in range(0, len(data), size)]
+        assert list(patterns.finditer_chunks(chunks)) == expected
+
+
+def _random_b64(rand, size):  # pragma: no cover (benchmark)
+    return base64.b64encode(rand.getrandbits(size * 8).to_bytes(size, 'big'))
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize('name', ('private_keys', 'keys2', 'keys5', 'keys50'))
+def test_multi_pattern_benchmark(name):  # pragma: no cover (opt in)
+    rand = random.Random(0)
+    if name == 'private_keys':
+        patterns = BLACKLIST
+    else:
+        n = int(name[len('keys'):])
+        patterns = [_random_b64(rand, 30) for _ in range(n)]
+    data = _random_b64(rand, 3_000_000) + patterns[-1]
+    multi = MultiPattern(patterns)
+
+    def each_pattern():
+        # the baseline: a pass over `data` per pattern
+        for pattern in patterns:
+            pos = data.find(pattern)
+            while pos != -1:
+                pos = data.find(pattern, pos + 1)
+
+    def scan():
+        for _ in multi.finditer(data):
+            pass
+
+    baseline = min(timeit.repeat(each_pattern, number=1, repeat=5))
+    # lenient, timings on a shared machine vary a lot between runs
+    assert min(timeit.repeat(scan, number=1, repeat=5)) <= baseline * 1.5
+
+
+class _RecordingBytesIO(io.BytesIO):
+    def __init__(self, initial_bytes):
+        super().__init__(initial_bytes)
+        self.writes: list[bytes] = []
+
+    def write(self, data):
+        self.writes.append(bytes(data))
+        return super().write(data)
+
+
+def test_rewrite_only_writes_changes():
+    f = _RecordingBytesIO(b'unchanged\nold\n')
+    rewrite(f, f.getvalue(), b'unchanged\nnew\nlonger\n')
+    assert f.getvalue() == b'unchanged\nnew\nlonger\n'
+    assert f.writes == [b'new\nlonger\n']
+
+    rewrite(f, f.getvalue(), b'unchanged\n')
+    assert f.getvalue() == b'unchanged\n'
+
+
+def test_write_changes(tmpdir):
+    f = tmpdir.join('f')
+    f.write_binary(b'hello\r\nworld\r\n')
+    write_changes(str(f), b'hello\r\nworld\r\n', b'hello\r\nworld\n')
+    assert f.read_binary() == b'hello\r\nworld\n'
+
+
+def test_write_changes_atomic(tmpdir):
+    f = tmpdir.join('f')
+    f.write_binary(b'old\n')
+    f.chmod(0o755)
+    link = tmpdir.join('link')
+    link.mksymlinkto('f')
+    write_changes(str(link), b'old\n', b'new\n', atomic=True)
+    assert link.islink()
+    assert f.read_binary() == b'new\n'
+    assert f.stat().mode & 0o777 == 0o755
+    assert sorted(tmpdir.listdir()) == [f, link]
+
+
+def test_write_changes_atomic_error(tmpdir, monkeypatch):
+    f = tmpdir.join('f')
+    f.write_binary(b'old\n')
+
+    def replace(src, dst):
+        raise OSError('nope')
+
+    monkeypatch.setattr(os, 'replace', replace)
+    with pytest.raises(OSError):
+        write_changes(str(f), b'old\n', b'new\n', atomic=True)
+    assert f.read_binary() == b'old\n'
+    assert tmpdir.listdir() == [f]
+
+
+@pytest.mark.parametrize(
+    ('contents', 'cr', 'expected'),
+    (
+        (b'', False, []),
+        (b'ab\ncd\nef', False, [b'ab\n', b'cd\n', b'ef']),
+        (b'a\nb\nc\nd\n', False, [b'a\n', b'b\nc\n', b'd\n']),
+        (b'abcdefg\nh\n', False, [b'abcdefg\n', b'h\n']),
+        (b'a\rb\rc\n', False, [b'a\rb\rc\n']),
+        (b'a\rb\rc\n', True, [b'a\r', b'b\rc\n']),
+        (b'ab\r\nc\r', True, [b'ab\r\n', b'c\r']),
+    ),
+)
+def test_line_chunks(contents, cr, expected):
+    chunks = list(line_chunks(io.BytesIO(contents), cr=cr, size=3))
+    assert chunks == expected
+
+
+@pytest.mark.parametrize(
+    ('contents', 'expected'),
+    (
+        (b'', [(0, 0)]),
+        (b'abc\n', [(0, 4)]),
+        (b'aaaa\nbb\nccccccc\nd', [(0, 5), (5, 16), (16, 17)]),
+        (b'ab\ncdefgh', [(0, 9)]),
+        (b'ab\ncd\n', [(0, 6)]),
+    ),
+)
+def test_split_lines(tmpdir, contents, expected):
+    f = tmpdir.join('f')
+    f.write_binary(contents)
+    assert split_lines(str(f), 4) == expected
+
+
+def _range(filename, start, end):
+    return os.path.basename(filename), start, end
+
+
+@pytest.mark.parametrize('jobs', ('1', '2'))
+def test_map_ranges(tmpdir, monkeypatch, jobs):
+    monkeypatch.setattr(util, 'SPLIT_SIZE', 4)
+    tmpdir.join('a').write_binary(b'aaaa\nbb\nccccccc\nd')
+    tmpdir.join('b').write_binary(b'')
+    with tmpdir.as_cwd():
+        args = _parse_execution_args('--jobs', jobs)
+        assert map_ranges(_range, ['a', 'b'], args) == [
+            [('a', 0, 5), ('a', 5, 16), ('a', 16, 17)],
+            [('b', 0, 0)],
+        ]
+
+
+def test_stream_fix_unchanged(tmpdir):
+    f = tmpdir.join('f')
+    f.write_binary(b'a\nb\n')
+    before = f.stat()
+    assert not stream_fix(str(f), bytes.lower, size=2)
+    assert f.read_binary() == b'a\nb\n'
+    assert (f.stat().ino, f.stat().mtime) == (before.ino, before.mtime)
+
+
+def _upper_e(s):
+    return s.replace(b'e', b'E')
+
+
+def _drop_e(s):
+    return s.replace(b'e\n', b'')
+
+
+def _crlf(s):
+    return s.replace(b'\n', b'\r\n')
+
+
+def _repeat_from_d(s):
+    # far longer than what has been read
+    return s.replace(b'D\n', b'D\n' * 10000)
+
+
+@pytest.mark.parametrize(
+    ('func', 'expected'),
+    (
+        (_upper_e, b'a\nb\nc\nD\nE\nF\n'),
+        (_drop_e, b'a\nb\nc\nD\nF\n'),
+        (_crlf, b'a\r\nb\r\nc\r\nD\r\ne\r\nF\r\n'),
+        (_repeat_from_d, b'a\nb\nc\n' + b'D\n' * 10000 + b'e\nF\n'),
+    ),
+)
+def test_stream_fix(tmpdir, func, expected):
+    f = tmpdir.join('f')
+    f.write_binary(b'a\nb\nc\nD\ne\nF\n')
+    f.chmod(0o755)
+    tmpdir.join('link').mklinkto(f)
+    ino = f.stat().ino
+    assert stream_fix(str(f), func, size=4)
+    assert f.read_binary() == expected
+    # in place, a hard link sees the change
+    assert f.stat().ino == ino
+    assert tmpdir.join('link').read_binary() == expected
+    assert f.stat().mode & 0o777 == 0o755
+
+
+def test_stream_fix_atomic(tmpdir):
+    f = tmpdir.join('f')
+    f.write_binary(b'a\nb\nc\nD\ne\nF\n')
+    f.chmod(0o755)
+    ino = f.stat().ino
+    assert stream_fix(str(f), bytes.lower, size=4, atomic=True)
+    assert f.read_binary() == b'a\nb\nc\nd\ne\nf\n'
+    assert f.stat().ino != ino
+    assert f.stat().mode & 0o777 == 0o755
+    assert tmpdir.listdir() == [f]
+
+
+def _counting():
+    calls = []
+
+    @memoize_git
+    def func(*args, **kwargs):
+        calls.append((args, kwargs))
+        return len(calls)
+    return func
+
+
+def test_memoize_git(temp_git_dir, monkeypatch):
+    func = _counting()
+    with temp_git_dir.as_cwd():
+        assert func() == func() == 1
+        assert func('a', k=1) == func('a', k=1) == 2
+        assert func() == 1
+
+        temp_git_dir.join('f').write('f\n')
+        cmd_output('git', 'add', 'f')
+        assert func() == func() == 3
+        cmd_output('git', 'checkout', '-q', '-b', 'topic')
+        assert func() == 4
+        cmd_output('git', 'config', 'pch.key', 'value')
+        assert func() == 5
+        monkeypatch.setenv('GIT_INDEX_FILE', str(temp_git_dir.join('other')))
+        assert func() == func() == 6
+    with temp_git_dir.join('sub').ensure_dir().as_cwd():
+        assert func() == 7
+
+
+def test_memoize_git_not_a_repository(tmpdir):
+    func = _counting()
+    with tmpdir.as_cwd():
+        assert (func(), func()) == (1, 2)
+
+
+def test_added_files(temp_git_dir):
+    with temp_git_dir.as_cwd():
+        git_commit('--allow-empty', '-m', 'initial')
+        assert added_files() == frozenset()
+        temp_git_dir.join('f').write('f\n')
+        cmd_output('git', 'add', 'f')
+        assert added_files() == {'f'}
+        git_commit('-m', 'add f')
+        assert added_files() == frozenset()
+        cmd_output('git', 'reset', '--soft', 'HEAD^')
+        assert added_files() == {'f'}
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import ctypes
+import os
+import struct
+import sys
+
+import pytest
+
+from pre_commit_hooks import watch
+from pre_commit_hooks.util import cmd_output
+from pre_commit_hooks.watch import changes
+from pre_commit_hooks.watch import check
+from pre_commit_hooks.watch import IN_CLOSE_WRITE
+from pre_commit_hooks.watch import IN_ISDIR
+from pre_commit_hooks.watch import IN_Q_OVERFLOW
+from pre_commit_hooks.watch import Inotify
+from pre_commit_hooks.watch import main
+from pre_commit_hooks.watch import tracked_dirs
+
+pytestmark = pytest.mark.skipif(
+    not sys.platform.startswith('linux'), reason='inotify is linux only',
+)
+
+
+def test_tracked_dirs():
+    paths = ('a', 'b/c', 'b/d/e', 'b/d/f', 'g/h')
+    assert tracked_dirs(paths) == {'.', 'b', 'b/d', 'g'}
+
+
+def test_inotify_unavailable(monkeypatch):
+    monkeypatch.setattr(ctypes, 'CDLL', lambda *args, **kwargs: object())
+    with pytest.raises(OSError):
+        Inotify()
+
+
+def test_inotify_add_watch_missing(tmpdir):
+    with Inotify() as inotify, pytest.raises(OSError):
+        inotify.add_watch(str(tmpdir.join('missing')))
+
+
+def test_inotify_read(tmpdir):
+    with tmpdir.as_cwd(), Inotify() as inotify:
+        inotify.add_watch('.')
+        assert inotify.read(0) == []
+        tmpdir.join('f').write('f\n')
+        tmpdir.join('tmp').write('g\n')
+        os.rename('tmp', 'g')
+        os.mkdir('d')
+        paths = [path for path, _ in inotify.read()]
+        assert paths == ['f', 'f', 'tmp', 'tmp', 'g', 'd']
+
+
+def test_inotify_read_overflow(tmpdir, monkeypatch):
+    with Inotify() as inotify:
+        inotify.add_watch(str(tmpdir))
+        tmpdir.join('f').write('f\n')  # something to read
+        events = (
+            struct.pack('iIII', -1, IN_Q_OVERFLOW, 0, 0) +
+            # a watch which was since removed
+            struct.pack('iIII', 12345, IN_CLOSE_WRITE, 0, 16) +
+            b'gone'.ljust(16, b'\0')
+        )
+        monkeypatch.setattr(os, 'read', lambda fd, size: events)
+        assert inotify.read() == [('', IN_Q_OVERFLOW)]
+
+
+class FakeInotify:
+    def __init__(self, *batches: list[tuple[str, int]]) -> None:
+        self.batches = list(batches)
+        self.watched: list[str] = []
+
+    def add_watch(self, path: str) -> None:
+        self.watched.append(path)
+
+    def read(self, timeout: float | None = None) -> list[tuple[str, int]]:
+        return self.batches.pop(0) if self.batches else []
+
+
+def test_changes(tmpdir):
+    with tmpdir.as_cwd(), Inotify() as inotify:
+        inotify.add_watch('.')
+        tmpdir.join('f').write('f\n')
+        tmpdir.join('d', 'e').ensure_dir().join('g').write('g\n')
+        assert next(changes(inotify, .01)) == {'f', 'd/e/g'}
+        tmpdir.join('d', 'e', 'g').write('changed\n')
+        assert next(changes(inotify, .01)) == {'d/e/g'}
+
+
+def test_changes_settle():
+    inotify = FakeInotify([('a', 0)], [('b', 0)])
+    assert next(changes(inotify, 0)) == {'a', 'b'}
+
+
+def test_changes_overflow():
+    inotify = FakeInotify([('a', 0), ('', IN_Q_OVERFLOW)])
+    assert next(changes(inotify, 0)) is None
+
+
+def test_changes_new_directory(tmpdir):
+    with tmpdir.as_cwd():
+        tmpdir.join('d', 'e').ensure_dir().join('f').write('f\n')
+        inotify = FakeInotify([('d', IN_ISDIR)])
+        assert next(changes(inotify, 0)) == {'d/e/f'}
+        assert inotify.watched == ['d', 'd/e']
+
+
+def test_changes_directory_removed(tmpdir, monkeypatch):
+    with tmpdir.as_cwd(), Inotify() as inotify:
+        tmpdir.join('d').ensure_dir().join('f').write('f\n')
+
+        def add_watch(path):
+            raise FileNotFoundError(path)
+        monkeypatch.setattr(inotify, 'add_watch', add_watch)
+        fake = FakeInotify([('d', IN_ISDIR)])
+        monkeypatch.setattr(inotify, 'read', fake.read)
+        assert next(changes(inotify, 0)) == set()
+
+
+@pytest.fixture
+def repo(temp_git_dir):
+    with temp_git_dir.as_cwd():
+        temp_git_dir.join('bad.yaml').write('a: [\n')
+        temp_git_dir.join('ok.json').write('{}\n')
+        temp_git_dir.join('space.txt').write('x \n')
+        temp_git_dir.join('deleted.txt').write('x \n')
+        cmd_output('git', 'add', '.')
+        os.remove('deleted.txt')
+        temp_git_dir.join('untracked.txt').write('x \n')
+        yield temp_git_dir
+
+
+def test_check(repo):
+    hook_argvs: dict[str, list[str]] = {
+        'check-yaml': [], 'trailing-whitespace': [],
+    }
+    failing = {('check-yaml', 'deleted.txt'), ('other-hook', 'bad.yaml')}
+    filenames = os.listdir('.') + ['deleted.txt']
+    check(hook_argvs, filenames, failing)
+    assert failing == {
+        ('check-yaml', 'bad.yaml'),
+        ('other-hook', 'bad.yaml'),
+        ('trailing-whitespace', 'space.txt'),
+    }
+    assert repo.join('space.txt').read() == 'x\n'
+    assert repo.join('untracked.txt').read() == 'x \n'
+
+    repo.join('bad.yaml').write('a: 1\n')
+    check(hook_argvs, ['bad.yaml', 'space.txt'], failing)
+    assert failing == {('other-hook', 'bad.yaml')}
+
+
+def test_check_caches(repo):
+    check({'check-yaml': []}, ['bad.yaml'], set())
+    assert repo.join('.git', 'pre-commit-hooks', 'results.db').exists()
+
+
+def test_check_argument_error(repo, capsys):
+    failing: set[tuple[str, str]] = set()
+    check({'check-json': ['--not-an-argument']}, ['ok.json'], failing)
+    assert failing == {('check-json', 'ok.json')}
+
+
+def _fake_changes(*batches):
+    def changes(inotify, delay):
+        yield from batches
+    return changes
+
+
+def test_main(repo, monkeypatch, capsys):
+    monkeypatch.setattr(watch, 'changes', _fake_changes({'bad.yaml'}, None))
+    argv = ('--hooks', 'check-yaml', '--hook-args', 'check-yaml=--unsafe')
+    assert main(argv) == 1
+    out, _ = capsys.readouterr()
+    assert out.startswith('watching 1 directories\n')
+    assert out.endswith('1 failing:\n    check-yaml: bad.yaml\n')
+
+
+def test_main_initial(repo, monkeypatch, capsys):
+    def changes(inotify, delay):
+        repo.join('bad.yaml').write('a: 1\n')
+        yield {'bad.yaml'}
+        raise KeyboardInterrupt
+    monkeypatch.setattr(watch, 'changes', changes)
+    assert main(('--hooks', 'check-yaml,check-json', '--initial')) == 0
+    out, _ = capsys.readouterr()
+    assert '1 failing:\n    check-yaml: bad.yaml\n' in out
+    assert out.endswith('all passing\n')
+
+
+def test_main_not_a_repository(tmpdir, capsys):
+    with tmpdir.as_cwd():
+        assert main(('--hooks', 'check-yaml')) == 1
+    _, err = capsys.readouterr()
+    assert err.startswith('pre-commit-hooks-watch: ')
+
+
+@pytest.mark.parametrize(
+    'argv',
+    (
+        ('--hooks', 'no-such-hook'),
+        ('--hooks', 'check-yaml', '--hook-args', 'check-json=--autofix'),
+    ),
+)
+def test_main_bad_arguments(argv, capsys):
+    with pytest.raises(SystemExit):
+        main(argv)